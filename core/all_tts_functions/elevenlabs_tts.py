@@ -1,14 +1,109 @@
 from pathlib import Path
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import json
+import base64
 import os, sys
+import wave
+from io import BytesIO
 from time import sleep
+from contextlib import contextmanager
+from functools import lru_cache
+from itertools import islice
+from concurrent.futures import ThreadPoolExecutor, as_completed
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+try:
+    import httpx
+    import h2  # httpx 需要 h2 才能启用 HTTP/2
+    HTTPX_AVAILABLE = True
+except ImportError:
+    HTTPX_AVAILABLE = False
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
 from core.config_utils import load_key
 
 BASE_URL = "https://api.elevenlabs.io/v2/text-to-speech"
+CONFIG_PATH = "config.yaml"  # load_key 读取的配置文件，用其修改时间判断缓存的配置是否过期
+STREAM_BLOCK_SIZE = 64 * 1024
+RETRY_TOTAL = 3
+RETRY_BACKOFF = 1
+RETRY_STATUSES = (429, 500, 502, 503, 504)
 
-def elevenlabs_tts(text, save_path):
+# 复用连接池，避免每个分段都重新建立 TCP+TLS 连接；429/5xx 由 urllib3 自动重试（遵循 Retry-After）
+_SESSION = requests.Session()
+_SESSION.mount("https://", HTTPAdapter(
+    pool_connections=4,
+    pool_maxsize=10,
+    max_retries=Retry(
+        total=RETRY_TOTAL,
+        backoff_factor=RETRY_BACKOFF,
+        status_forcelist=list(RETRY_STATUSES),
+        allowed_methods=["POST"]
+    )
+))
+
+# 安装了 h2 时优先使用 HTTP/2：并发的分段请求复用同一个 TLS 连接多路传输
+if HTTPX_AVAILABLE:
+    _CLIENT = httpx.Client(
+        timeout=httpx.Timeout(300.0, connect=5.0),
+        transport=httpx.HTTPTransport(
+            http2=True,
+            retries=RETRY_TOTAL,
+            limits=httpx.Limits(max_keepalive_connections=4, max_connections=10)
+        )
+    )
+    _REQUEST_ERRORS = (requests.exceptions.RequestException, httpx.HTTPError)
+else:
+    _CLIENT = None
+    _REQUEST_ERRORS = (requests.exceptions.RequestException,)
+
+@contextmanager
+def _stream_post(url, headers, payload):
+    """以流式方式发送 POST 请求，httpx 不可用时回退到 requests 会话"""
+    # headers 中已声明 Content-Type: application/json，这里直接发送序列化后的请求体
+    body = orjson.dumps(payload) if ORJSON_AVAILABLE else json.dumps(payload).encode('utf-8')
+    
+    if not HTTPX_AVAILABLE:
+        with _SESSION.post(url, headers=headers, data=body, stream=True, timeout=(5, 300)) as response:
+            yield response
+        return
+    
+    # httpx 的 transport 只重试连接错误，429/5xx 在这里按 Retry-After 或指数退避重试
+    for attempt in range(RETRY_TOTAL + 1):
+        with _CLIENT.stream("POST", url, headers=headers, content=body) as response:
+            if response.status_code not in RETRY_STATUSES or attempt == RETRY_TOTAL:
+                yield response
+                return
+            try:
+                delay = float(response.headers.get("Retry-After", ""))
+            except ValueError:
+                delay = RETRY_BACKOFF * 2 ** attempt
+        sleep(delay)
+
+def _iter_body(response):
+    if HTTPX_AVAILABLE:
+        return response.iter_bytes(chunk_size=STREAM_BLOCK_SIZE)
+    return response.iter_content(chunk_size=STREAM_BLOCK_SIZE)
+
+def _error_text(response):
+    if HTTPX_AVAILABLE:
+        response.read()
+    return response.text
+
+def _config_mtime():
+    try:
+        return os.stat(CONFIG_PATH).st_mtime_ns
+    except OSError:
+        return None
+
+@lru_cache(maxsize=1)
+def _load_settings(config_mtime):
+    """读取并缓存 ElevenLabs 配置，避免每次合成都重新解析配置文件；
+    缓存以配置文件的修改时间为键，设置页保存后下一次合成即读取新配置"""
     API_KEY = load_key("elevenlabs.api_key")
     voice_id = load_key("elevenlabs.voice_id")
     model_id = load_key("elevenlabs.model_id", default="eleven_multilingual_v2")
@@ -39,8 +134,7 @@ def elevenlabs_tts(text, save_path):
         "xi-api-key": API_KEY
     }
 
-    payload = {
-        "text": text,
+    base_payload = {
         "model_id": model_id,
         "voice_settings": voice_settings,
         "output_format": "wav",
@@ -48,86 +142,134 @@ def elevenlabs_tts(text, save_path):
         "pronunciation_dictionary": advanced_settings["pronunciation_dictionary"],
         "return_timestamps": True
     }
+    return voice_id, headers, base_payload, advanced_settings
+
+def _merge_timestamps(parts, offsets):
+    """合并各分段的时间戳：对齐信息按分段起始时间平移后拼接，其余字段沿用第一个分段"""
+    merged = dict(parts[0])
+    for key in ("alignment", "normalized_alignment"):
+        alignments = [part.get(key) for part in parts]
+        if not all(alignments):
+            continue
+        merged[key] = {
+            "characters": [char for alignment in alignments for char in alignment["characters"]],
+            **{
+                field: [
+                    time + offset
+                    for alignment, offset in zip(alignments, offsets)
+                    for time in alignment[field]
+                ]
+                for field in ("character_start_times_seconds", "character_end_times_seconds")
+            }
+        }
+    return merged
+
+def _save_timestamps(timestamps, save_path):
+    timestamp_file = Path(save_path).with_suffix('.json')
+    with open(timestamp_file, 'w', encoding='utf-8') as f:
+        json.dump(timestamps, f, ensure_ascii=False, indent=2)
+    print(f"✅ Timestamps saved to {timestamp_file}")
+
+def elevenlabs_tts(text, save_path):
+    voice_id, headers, base_payload, advanced_settings = _load_settings(_config_mtime())
+    payload = {**base_payload, "text": text}
+    
+    chunk_length = advanced_settings["text_processing"]["chunk_length"]
+    max_chunks = advanced_settings["text_processing"]["max_chunks"]
     
-    # 如果文本过长，进行分段处理
-    if len(text) > advanced_settings["text_processing"]["chunk_length"]:
-        chunks = [text[i:i + advanced_settings["text_processing"]["chunk_length"]] 
-                 for i in range(0, len(text), advanced_settings["text_processing"]["chunk_length"])]
-        chunks = chunks[:advanced_settings["text_processing"]["max_chunks"]]
+    # 如果文本过长，进行分段处理（只切出前 max_chunks 段，不生成多余分段）
+    if len(text) > chunk_length:
+        chunks = list(islice((text[i:i + chunk_length] for i in range(0, len(text), chunk_length)), max_chunks))
         
-        # 创建临时文件存储每个分段的音频
-        temp_files = []
-        for i, chunk in enumerate(chunks):
-            temp_file = f"{save_path}.part{i}"
-            payload["text"] = chunk
-            if process_chunk(payload, headers, temp_file):
-                temp_files.append(temp_file)
-            else:
-                # 清理临时文件
-                for f in temp_files:
-                    if os.path.exists(f):
-                        os.remove(f)
-                return False
+        # 并发请求各分段音频，每个分段使用独立的 payload，音频写入内存缓冲区而不落盘；
+        # 时间戳交回主线程合并后只写一次，避免多个线程同时写同一个 JSON 文件
+        buffers = [BytesIO() for _ in chunks]
+        chunk_timestamps = [{} for _ in chunks]
+        success = True
+        with ThreadPoolExecutor(max_workers=min(len(chunks), 5)) as executor:
+            futures = [
+                executor.submit(
+                    process_chunk, voice_id, {**payload, "text": chunk}, headers, save_path, buffer, timestamps
+                )
+                for chunk, buffer, timestamps in zip(chunks, buffers, chunk_timestamps)
+            ]
+            for future in as_completed(futures):
+                try:
+                    success = future.result()
+                except Exception:
+                    # 未预期的异常照常抛出，但先取消尚未开始的分段
+                    for f in futures:
+                        f.cancel()
+                    raise
+                if not success:
+                    for f in futures:
+                        f.cancel()
+                    break
         
-        # 合并所有音频片段
-        from pydub import AudioSegment
-        combined = AudioSegment.empty()
-        for temp_file in temp_files:
-            segment = AudioSegment.from_wav(temp_file)
-            combined += segment
-            os.remove(temp_file)  # 删除临时文件
+        if not success:
+            return False
         
+        # 合并所有音频片段：各分段格式一致，直接拷贝 PCM 帧，无需经过 pydub/ffmpeg 解析
         speech_file_path = Path(save_path)
         speech_file_path.parent.mkdir(parents=True, exist_ok=True)
-        combined.export(speech_file_path, format="wav")
+        offsets = []
+        elapsed = 0.0
+        with wave.open(str(speech_file_path), 'wb') as out:
+            for i, buffer in enumerate(buffers):
+                with wave.open(buffer, 'rb') as part:
+                    if i == 0:
+                        out.setparams(part.getparams())
+                    offsets.append(elapsed)
+                    elapsed += part.getnframes() / part.getframerate()
+                    out.writeframes(part.readframes(part.getnframes()))
         print(f"✅ Combined audio saved to {speech_file_path}")
+        
+        if any(chunk_timestamps):
+            _save_timestamps(_merge_timestamps(chunk_timestamps, offsets), save_path)
         return True
     else:
-        return process_chunk(payload, headers, save_path)
+        return process_chunk(voice_id, payload, headers, save_path)
 
-def process_chunk(payload, headers, save_path):
-    max_retries = 3
-    retry_delay = 1
-    
-    for attempt in range(max_retries):
-        try:
-            response = requests.post(
-                f"{BASE_URL}/{voice_id}",
-                headers=headers,
-                json=payload
-            )
+def process_chunk(voice_id, payload, headers, save_path, sink=None, timestamp_sink=None):
+    """请求单段音频；传入 sink（如 BytesIO）时写入该缓冲区，否则写入 save_path。
+    传入 timestamp_sink（dict）时时间戳写入该字典，由调用方统一保存，否则另存为同名 JSON 文件"""
+    try:
+        with _stream_post(f"{BASE_URL}/{voice_id}", headers, payload) as response:
+            if response.status_code != 200:
+                print(f"❌ Error: {response.status_code}")
+                print(f"Response: {_error_text(response)}")
+                return False
+            
+            # 带时间戳的响应为 JSON：音频以 base64 内嵌，只解析一次，其余字段另存为同名 JSON 文件
+            timestamps = None
+            if response.headers.get('Content-Type', '').startswith('application/json'):
+                if HTTPX_AVAILABLE:
+                    response.read()
+                timestamps = response.json()
+                blocks = [base64.b64decode(timestamps.pop('audio_base64'))]
+            else:
+                # 边接收边写入，避免将整个音频缓存在响应对象中
+                blocks = _iter_body(response)
             
-            if response.status_code == 200:
+            if sink is None:
                 with open(save_path, 'wb') as f:
-                    f.write(response.content)
+                    for block in blocks:
+                        f.write(block)
                 print(f"✅ Audio chunk saved to {save_path}")
-                
-                # 如果返回了时间戳信息，保存到同名的JSON文件中
-                if response.headers.get('Content-Type') == 'application/json':
-                    timestamp_file = Path(save_path).with_suffix('.json')
-                    with open(timestamp_file, 'w', encoding='utf-8') as f:
-                        json.dump(response.json(), f, ensure_ascii=False, indent=2)
-                    print(f"✅ Timestamps saved to {timestamp_file}")
-                return True
-            elif response.status_code == 429:  # Rate limit
-                if attempt < max_retries - 1:
-                    wait_time = retry_delay * (attempt + 1)
-                    print(f"⚠️ Rate limit reached. Waiting {wait_time} seconds...")
-                    sleep(wait_time)
-                    continue
             else:
-                print(f"❌ Error: {response.status_code}")
-                print(f"Response: {response.text}")
-                
-        except Exception as e:
-            print(f"❌ Error: {str(e)}")
-            if attempt < max_retries - 1:
-                print(f"Retrying... (Attempt {attempt + 1}/{max_retries})")
-                sleep(retry_delay)
-                continue
-            raise
-    
-    return False
+                for block in blocks:
+                    sink.write(block)
+                sink.seek(0)
+            
+            if timestamps is not None:
+                if timestamp_sink is None:
+                    _save_timestamps(timestamps, save_path)
+                else:
+                    timestamp_sink.update(timestamps)
+            return True
+    except _REQUEST_ERRORS as e:
+        print(f"❌ Error: {str(e)}")
+        return False
 
 if __name__ == "__main__":
     elevenlabs_tts("Hi! Welcome to VideoLingo!", "test.wav")
\ No newline at end of file
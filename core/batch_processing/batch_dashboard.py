@@ -4,31 +4,144 @@ Batch Processing Dashboard Module
 Provides Streamlit UI for batch video processing management.
 """
 
+import importlib.util
 import json
 import os
+import shutil
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from functools import lru_cache
 from typing import List, Dict, Any, Optional
 
 try:
     import streamlit as st
-    import plotly.express as px
-    import plotly.graph_objects as go
-    import pandas as pd
     STREAMLIT_AVAILABLE = True
 except ImportError:
     STREAMLIT_AVAILABLE = False
 
+# Plotting/table libraries are slow to import and only some tabs use them, so
+# they are imported on first use; find_spec checks presence without importing.
+PLOTTING_AVAILABLE = all(importlib.util.find_spec(name) is not None for name in ("plotly", "pandas", "numpy"))
+
+@lru_cache(maxsize=None)
+def _px():
+    import plotly.express as px
+    return px
+
+@lru_cache(maxsize=None)
+def _pd():
+    import pandas as pd
+    return pd
+
+@lru_cache(maxsize=None)
+def _np():
+    import numpy as np
+    return np
+
 from .batch_manager import BatchManager
-from .task_queue import TaskStatus, TaskPriority
+from .task_queue import TaskDefinition, TaskStatus, TaskPriority
+
+_PROCESSING_TYPES = ["video_translation", "audio_extraction", "subtitle_generation", "video_transcoding"]
+
+_PROC_TYPE_LABELS = {
+    "video_translation": "🎬 视频翻译",
+    "audio_extraction": "🎵 音频提取",
+    "subtitle_generation": "📝 字幕生成",
+    "video_transcoding": "🎞️ 视频转码"
+}
+
+_PRIORITY_LABELS = {
+    TaskPriority.LOW: "🟢 低",
+    TaskPriority.NORMAL: "🟡 普通",
+    TaskPriority.HIGH: "🟠 高",
+    TaskPriority.CRITICAL: "🔴 紧急"
+}
+
+def _save_upload(uploaded_file, temp_dir: str) -> str:
+    """Stream an uploaded file into temp_dir and return its path."""
+    temp_path = os.path.join(temp_dir, uploaded_file.name)
+    uploaded_file.seek(0)
+    with open(temp_path, "wb") as f:
+        shutil.copyfileobj(uploaded_file, f, length=1024 * 1024)
+    return temp_path
+
+# Snapshot caching: each rerun (any button click) re-renders every tab, so the
+# expensive queue scans are shared for a short TTL and cleared on mutations.
+if STREAMLIT_AVAILABLE:
+    _cache_snapshot = st.cache_data(ttl=2, show_spinner=False)
+else:
+    def _cache_snapshot(func):
+        return func
+
+@_cache_snapshot
+def _task_snapshot(manager_key: int, _batch_manager: BatchManager, limit: Optional[int] = None) -> List[TaskDefinition]:
+    """Snapshot of the tasks in the queue, newest first."""
+    return _batch_manager.task_queue.list_tasks(limit=limit)
+
+@_cache_snapshot
+def _system_status_snapshot(manager_key: int, _batch_manager: BatchManager) -> Dict[str, Any]:
+    """Snapshot of the overall system status."""
+    return _batch_manager.get_system_status()
+
+@_cache_snapshot
+def _projects_snapshot(manager_key: int, _batch_manager: BatchManager) -> List[Dict[str, Any]]:
+    """Snapshot of all batch projects."""
+    return _batch_manager.list_batch_projects()
+
+# Figure caching: identical chart inputs reuse the already built Plotly figure
+if STREAMLIT_AVAILABLE:
+    _cache_figure = st.cache_data(ttl=5, show_spinner=False)
+else:
+    def _cache_figure(func):
+        return func
+
+@_cache_figure
+def _status_pie_figure(labels: tuple, values: tuple):
+    """Pie chart of task status distribution."""
+    fig = _px().pie(values=list(values), names=list(labels), title="任务状态分布")
+    fig.update_layout(uirevision="stable")
+    return fig
+
+@_cache_figure
+def _completion_line_figure(dates: tuple, counts: tuple):
+    """Line chart of daily completed tasks."""
+    fig = _px().line(
+        x=list(dates),
+        y=list(counts),
+        title="每日任务完成数量",
+        labels={"x": "日期", "y": "完成任务数"}
+    )
+    fig.update_layout(uirevision="stable")
+    return fig
+
+@_cache_figure
+def _duration_histogram_figure(durations):
+    """Histogram of task processing durations."""
+    fig = _px().histogram(
+        x=durations,
+        nbins=20,
+        title="处理时间分布",
+        labels={"x": "处理时间（分钟）", "y": "任务数量"}
+    )
+    fig.update_layout(uirevision="stable")
+    return fig
 
 class BatchProcessingDashboard:
     """Streamlit dashboard for batch processing."""
     
     def __init__(self):
-        if not STREAMLIT_AVAILABLE:
+        if not (STREAMLIT_AVAILABLE and PLOTTING_AVAILABLE):
             raise ImportError("Streamlit and plotting libraries are required for the batch processing dashboard")
         
         self.batch_manager = BatchManager()
+        self._manager_key = id(self.batch_manager)
+    
+    def _invalidate_snapshots(self):
+        """Drop cached snapshots after the queue or scheduler state changes."""
+        _task_snapshot.clear()
+        _system_status_snapshot.clear()
+        _projects_snapshot.clear()
     
     def render_dashboard(self):
         """Render the complete batch processing dashboard."""
@@ -69,21 +182,24 @@ class BatchProcessingDashboard:
         with col1:
             if st.button("▶️ 启动处理系统"):
                 self.batch_manager.start_processing()
+                self._invalidate_snapshots()
                 st.success("处理系统已启动")
                 st.rerun()
         
         with col2:
             if st.button("⏹️ 停止处理系统"):
                 self.batch_manager.stop_processing()
+                self._invalidate_snapshots()
                 st.success("处理系统已停止")
                 st.rerun()
         
         with col3:
             if st.button("🔄 刷新状态"):
+                self._invalidate_snapshots()
                 st.rerun()
         
         # System status
-        system_status = self.batch_manager.get_system_status()
+        system_status = _system_status_snapshot(self._manager_key, self.batch_manager)
         
         # Key metrics
         col1, col2, col3, col4 = st.columns(4)
@@ -98,8 +214,9 @@ class BatchProcessingDashboard:
         
         with col3:
             queue_stats = system_status["queue_statistics"]
-            running_tasks = queue_stats["by_status"].get("running", 0)
-            pending_tasks = queue_stats["by_status"].get("pending", 0) + queue_stats["by_status"].get("queued", 0)
+            status_counts = queue_stats["by_status"]
+            running_tasks = status_counts["running"]
+            pending_tasks = status_counts["pending"] + status_counts["queued"]
             st.metric("队列任务", f"{running_tasks}运行 / {pending_tasks}等待")
         
         with col4:
@@ -108,23 +225,20 @@ class BatchProcessingDashboard:
         # Recent tasks
         st.subheader("🕒 最近任务")
         
-        all_tasks = self.batch_manager.task_queue.list_tasks()
-        recent_tasks = all_tasks[:10]  # Show last 10 tasks
+        recent_tasks = _task_snapshot(self._manager_key, self.batch_manager, limit=10)  # Show last 10 tasks
         
         if recent_tasks:
-            task_data = []
+            task_data = {"任务ID": [], "类型": [], "项目": [], "输入文件": [], "状态": [], "进度": [], "创建时间": []}
             for task in recent_tasks:
-                task_data.append({
-                    "任务ID": task.task_id[:8],
-                    "类型": task.task_type,
-                    "项目": task.project_id,
-                    "输入文件": os.path.basename(task.input_file),
-                    "状态": task.status.value,
-                    "进度": f"{task.progress_percentage:.1f}%",
-                    "创建时间": task.created_at[:19]
-                })
+                task_data["任务ID"].append(task.short_id)
+                task_data["类型"].append(task.task_type)
+                task_data["项目"].append(task.project_id)
+                task_data["输入文件"].append(task.input_basename)
+                task_data["状态"].append(task.status.value)
+                task_data["进度"].append(f"{task.progress_percentage:.1f}%")
+                task_data["创建时间"].append(task.created_at[:19])
             
-            df = pd.DataFrame(task_data)
+            df = _pd().DataFrame(task_data, copy=False)
             st.dataframe(df, use_container_width=True)
         else:
             st.info("暂无任务")
@@ -136,14 +250,10 @@ class BatchProcessingDashboard:
             status_data = queue_stats["by_status"]
             
             # Create pie chart
-            labels = list(status_data.keys())
-            values = list(status_data.values())
+            labels = tuple(status_data.keys())
+            values = tuple(status_data.values())
             
-            fig = px.pie(
-                values=values,
-                names=labels,
-                title="任务状态分布"
-            )
+            fig = _status_pie_figure(labels, values)
             st.plotly_chart(fig, use_container_width=True)
     
     def _render_create_batch(self):
@@ -153,13 +263,8 @@ class BatchProcessingDashboard:
         # Processing type selection
         processing_type = st.selectbox(
             "处理类型",
-            ["video_translation", "audio_extraction", "subtitle_generation", "video_transcoding"],
-            format_func=lambda x: {
-                "video_translation": "🎬 视频翻译",
-                "audio_extraction": "🎵 音频提取",
-                "subtitle_generation": "📝 字幕生成",
-                "video_transcoding": "🎞️ 视频转码"
-            }.get(x, x)
+            _PROCESSING_TYPES,
+            format_func=_PROC_TYPE_LABELS.get
         )
         
         # File upload
@@ -199,12 +304,7 @@ class BatchProcessingDashboard:
                 "任务优先级",
                 [TaskPriority.LOW, TaskPriority.NORMAL, TaskPriority.HIGH, TaskPriority.CRITICAL],
                 index=1,
-                format_func=lambda x: {
-                    TaskPriority.LOW: "🟢 低",
-                    TaskPriority.NORMAL: "🟡 普通",
-                    TaskPriority.HIGH: "🟠 高",
-                    TaskPriority.CRITICAL: "🔴 紧急"
-                }[x]
+                format_func=_PRIORITY_LABELS.__getitem__
             )
             
             tags_input = st.text_input(
@@ -276,11 +376,10 @@ class BatchProcessingDashboard:
                 temp_dir = "./temp_uploads"
                 os.makedirs(temp_dir, exist_ok=True)
                 
-                for uploaded_file in uploaded_files:
-                    temp_path = os.path.join(temp_dir, uploaded_file.name)
-                    with open(temp_path, "wb") as f:
-                        f.write(uploaded_file.getbuffer())
-                    video_files.append(temp_path)
+                # Copies release the GIL, so large uploads are written concurrently
+                with st.spinner("正在保存上传文件..."):
+                    with ThreadPoolExecutor(max_workers=min(len(uploaded_files), 4)) as executor:
+                        video_files.extend(executor.map(lambda f: _save_upload(f, temp_dir), uploaded_files))
             
             # From file paths
             if file_paths_text.strip():
@@ -295,13 +394,14 @@ class BatchProcessingDashboard:
                 try:
                     if use_pipeline and pipeline_stages:
                         # Pipeline processing
-                        task_ids = self.batch_manager.add_pipeline_batch(
-                            video_files=video_files,
-                            output_directory=output_dir,
-                            pipeline_stages=pipeline_stages,
-                            project_id=project_id if project_id else None,
-                            priority=priority
-                        )
+                        with st.spinner("提交中..."):
+                            task_ids = self.batch_manager.add_pipeline_batch(
+                                video_files=video_files,
+                                output_directory=output_dir,
+                                pipeline_stages=pipeline_stages,
+                                project_id=project_id if project_id else None,
+                                priority=priority
+                            )
                         
                         total_tasks = sum(len(stage_tasks) for stage_tasks in task_ids.values())
                         st.success(f"✅ 成功创建流水线批量任务！")
@@ -313,19 +413,22 @@ class BatchProcessingDashboard:
                     
                     else:
                         # Single type processing
-                        task_ids = self.batch_manager.add_video_batch(
-                            video_files=video_files,
-                            output_directory=output_dir,
-                            project_id=project_id if project_id else None,
-                            processing_type=processing_type,
-                            config_override=config_override,
-                            priority=priority,
-                            tags=tags
-                        )
+                        with st.spinner("提交中..."):
+                            task_ids = self.batch_manager.add_video_batch(
+                                video_files=video_files,
+                                output_directory=output_dir,
+                                project_id=project_id if project_id else None,
+                                processing_type=processing_type,
+                                config_override=config_override,
+                                priority=priority,
+                                tags=tags
+                            )
                         
                         st.success(f"✅ 成功创建批量任务！")
                         st.info(f"📊 共添加 {len(task_ids)} 个任务到处理队列")
                     
+                    self._invalidate_snapshots()
+                    
                     # Start processing if not already running
                     system_status = self.batch_manager.get_system_status()
                     if not system_status["batch_processing_active"]:
@@ -343,7 +446,7 @@ class BatchProcessingDashboard:
         st.subheader("📊 项目管理")
         
         # List all projects
-        projects = self.batch_manager.list_batch_projects()
+        projects = _projects_snapshot(self._manager_key, self.batch_manager)
         
         if not projects:
             st.info("暂无批量处理项目")
@@ -379,22 +482,24 @@ class BatchProcessingDashboard:
                 with col2:
                     if st.button("🔄 重试失败", key=f"retry_{project['project_id']}"):
                         retried = self.batch_manager.retry_failed_tasks(project['project_id'])
+                        self._invalidate_snapshots()
                         st.success(f"重试了 {retried} 个失败任务")
                         st.rerun()
                 
                 with col3:
                     if st.button("🚫 取消项目", key=f"cancel_{project['project_id']}"):
                         cancelled = self.batch_manager.cancel_batch(project['project_id'])
+                        self._invalidate_snapshots()
                         st.success(f"取消了 {cancelled} 个任务")
                         st.rerun()
                 
                 with col4:
                     if st.button("📊 导出报告", key=f"export_{project['project_id']}"):
-                        report = self.batch_manager.export_batch_report(project['project_id'])
+                        report_data = self.batch_manager.export_batch_report_json(project['project_id'])
                         
                         st.download_button(
                             label="下载报告",
-                            data=json.dumps(report, ensure_ascii=False, indent=2),
+                            data=report_data,
                             file_name=f"batch_report_{project['project_id']}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json",
                             mime="application/json",
                             key=f"download_{project['project_id']}"
@@ -405,7 +510,7 @@ class BatchProcessingDashboard:
         st.subheader("⚙️ 系统监控")
         
         # Real-time metrics
-        system_status = self.batch_manager.get_system_status()
+        system_status = _system_status_snapshot(self._manager_key, self.batch_manager)
         scheduler_stats = system_status["scheduler_statistics"]
         
         # System resources
@@ -436,19 +541,18 @@ class BatchProcessingDashboard:
         worker_status = self.batch_manager.scheduler.get_worker_status()
         
         if worker_status:
-            worker_data = []
+            worker_data = {"工作线程ID": [], "状态": [], "当前任务": [], "已完成": [], "失败数": [], "成功率": [], "最后活动": []}
             for worker in worker_status:
-                worker_data.append({
-                    "工作线程ID": worker.worker_id,
-                    "状态": worker.status.value,
-                    "当前任务": worker.current_task[:8] if worker.current_task else "无",
-                    "已完成": worker.tasks_completed,
-                    "失败数": worker.tasks_failed,
-                    "成功率": f"{worker.tasks_completed/(worker.tasks_completed+worker.tasks_failed)*100:.1f}%" if (worker.tasks_completed+worker.tasks_failed) > 0 else "N/A",
-                    "最后活动": worker.last_activity[:19]
-                })
+                finished = worker.tasks_completed + worker.tasks_failed
+                worker_data["工作线程ID"].append(worker.worker_id)
+                worker_data["状态"].append(worker.status.value)
+                worker_data["当前任务"].append(worker.current_task[:8] if worker.current_task else "无")
+                worker_data["已完成"].append(worker.tasks_completed)
+                worker_data["失败数"].append(worker.tasks_failed)
+                worker_data["成功率"].append(f"{worker.tasks_completed/finished*100:.1f}%" if finished > 0 else "N/A")
+                worker_data["最后活动"].append(worker.last_activity[:19])
             
-            df = pd.DataFrame(worker_data)
+            df = _pd().DataFrame(worker_data, copy=False)
             st.dataframe(df, use_container_width=True)
         else:
             st.info("无活跃工作线程")
@@ -472,7 +576,7 @@ class BatchProcessingDashboard:
         
         with col4:
             # Calculate throughput (tasks per hour)
-            completed_tasks = queue_stats["by_status"].get("completed", 0)
+            completed_tasks = queue_stats["by_status"]["completed"]
             if avg_exec_time > 0:
                 throughput = 60 / avg_exec_time  # tasks per hour
                 st.metric("处理吞吐量", f"{throughput:.1f}任务/时")
@@ -496,68 +600,66 @@ class BatchProcessingDashboard:
         with col2:
             task_type_filter = st.selectbox(
                 "任务类型筛选",
-                ["全部"] + ["video_translation", "audio_extraction", "subtitle_generation", "video_transcoding"]
+                ["全部"] + _PROCESSING_TYPES
             )
         
         # Get statistics
-        all_tasks = self.batch_manager.task_queue.list_tasks()
+        all_tasks = _task_snapshot(self._manager_key, self.batch_manager)
         
-        if task_type_filter != "全部":
-            all_tasks = [t for t in all_tasks if t.task_type == task_type_filter]
+        # Aggregate type counts, daily completions and durations in one pass
+        type_counts = defaultdict(lambda: {"total": 0, "completed": 0, "failed": 0})
+        completion_dates = Counter()
+        durations = []
+        
+        for task in all_tasks:
+            if task_type_filter != "全部" and task.task_type != task_type_filter:
+                continue
+            
+            counts = type_counts[task.task_type]
+            counts["total"] += 1
+            if task.status == TaskStatus.COMPLETED:
+                counts["completed"] += 1
+                if task.completed_at:
+                    completion_dates[task.completed_at[:10]] += 1  # YYYY-MM-DD
+                    if task.actual_duration:
+                        durations.append(task.actual_duration)
+            elif task.status == TaskStatus.FAILED:
+                counts["failed"] += 1
         
-        if not all_tasks:
+        if not type_counts:
             st.info("暂无统计数据")
             return
         
         # Task completion over time
         st.subheader("📊 任务完成趋势")
         
-        completed_tasks = [t for t in all_tasks if t.status == TaskStatus.COMPLETED and t.completed_at]
-        
-        if completed_tasks:
-            # Group by date
-            completion_dates = {}
-            for task in completed_tasks:
-                date = task.completed_at[:10]  # YYYY-MM-DD
-                completion_dates[date] = completion_dates.get(date, 0) + 1
-            
+        if completion_dates:
             # Create time series chart
-            dates = sorted(completion_dates.keys())
-            counts = [completion_dates[date] for date in dates]
+            dates = tuple(sorted(completion_dates))
+            counts = tuple(completion_dates[date] for date in dates)
             
-            fig = px.line(
-                x=dates,
-                y=counts,
-                title="每日任务完成数量",
-                labels={"x": "日期", "y": "完成任务数"}
-            )
+            fig = _completion_line_figure(dates, counts)
             st.plotly_chart(fig, use_container_width=True)
         
         # Processing time analysis
         st.subheader("⏱️ 处理时间分析")
         
-        tasks_with_duration = [t for t in completed_tasks if t.actual_duration]
-        
-        if tasks_with_duration:
-            durations = [t.actual_duration for t in tasks_with_duration]
+        if durations:
+            np = _np()
+            durations = np.asarray(durations, dtype=np.float64)
             
             col1, col2 = st.columns(2)
             
             with col1:
                 # Duration histogram
-                fig = px.histogram(
-                    x=durations,
-                    nbins=20,
-                    title="处理时间分布",
-                    labels={"x": "处理时间（分钟）", "y": "任务数量"}
-                )
+                fig = _duration_histogram_figure(durations)
                 st.plotly_chart(fig, use_container_width=True)
             
             with col2:
                 # Duration statistics
-                avg_duration = sum(durations) / len(durations)
-                min_duration = min(durations)
-                max_duration = max(durations)
+                avg_duration = float(durations.mean())
+                min_duration = float(durations.min())
+                max_duration = float(durations.max())
                 
                 st.metric("平均处理时间", f"{avg_duration:.1f} 分钟")
                 st.metric("最短处理时间", f"{min_duration:.1f} 分钟")
@@ -566,31 +668,17 @@ class BatchProcessingDashboard:
         # Task type breakdown
         st.subheader("📋 任务类型分析")
         
-        type_counts = {}
-        for task in all_tasks:
-            task_type = task.task_type
-            if task_type not in type_counts:
-                type_counts[task_type] = {"total": 0, "completed": 0, "failed": 0}
-            
-            type_counts[task_type]["total"] += 1
-            if task.status == TaskStatus.COMPLETED:
-                type_counts[task_type]["completed"] += 1
-            elif task.status == TaskStatus.FAILED:
-                type_counts[task_type]["failed"] += 1
-        
         # Create breakdown table
-        breakdown_data = []
+        breakdown_data = {"任务类型": [], "总数": [], "已完成": [], "失败": [], "成功率": []}
         for task_type, counts in type_counts.items():
             success_rate = (counts["completed"] / counts["total"] * 100) if counts["total"] > 0 else 0
-            breakdown_data.append({
-                "任务类型": task_type,
-                "总数": counts["total"],
-                "已完成": counts["completed"],
-                "失败": counts["failed"],
-                "成功率": f"{success_rate:.1f}%"
-            })
-        
-        df = pd.DataFrame(breakdown_data)
+            breakdown_data["任务类型"].append(task_type)
+            breakdown_data["总数"].append(counts["total"])
+            breakdown_data["已完成"].append(counts["completed"])
+            breakdown_data["失败"].append(counts["failed"])
+            breakdown_data["成功率"].append(f"{success_rate:.1f}%")
+        
+        df = _pd().DataFrame(breakdown_data, copy=False)
         st.dataframe(df, use_container_width=True)
     
     def _show_project_details(self, project_id: str):
@@ -633,16 +721,14 @@ class BatchProcessingDashboard:
         # Task list
         st.subheader("📋 任务列表")
         
-        task_data = []
+        task_data = {"任务ID": [], "任务类型": [], "输入文件": [], "状态": [], "进度": [], "错误": []}
         for task in batch_status["tasks"]:
-            task_data.append({
-                "任务ID": task["task_id"][:8],
-                "任务类型": task["task_type"],
-                "输入文件": task["input_file"],
-                "状态": task["status"],
-                "进度": f"{task['progress']:.1f}%",
-                "错误": task["error"][:50] + "..." if task["error"] and len(task["error"]) > 50 else task["error"] or ""
-            })
-        
-        df = pd.DataFrame(task_data)
+            task_data["任务ID"].append(task["task_id"][:8])
+            task_data["任务类型"].append(task["task_type"])
+            task_data["输入文件"].append(task["input_file"])
+            task_data["状态"].append(task["status"])
+            task_data["进度"].append(f"{task['progress']:.1f}%")
+            task_data["错误"].append(task["error"][:50] + "..." if task["error"] and len(task["error"]) > 50 else task["error"] or "")
+        
+        df = _pd().DataFrame(task_data, copy=False)
         st.dataframe(df, use_container_width=True)
\ No newline at end of file
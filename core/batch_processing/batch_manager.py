@@ -5,24 +5,73 @@ High-level interface for managing batch video processing operations.
 """
 
 import os
+import bisect
 import json
+import logging
 import shutil
+import stat
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Iterator, Optional, Set, Tuple
 from pathlib import Path
 
-from .task_queue import TaskQueue, TaskDefinition, TaskStatus, TaskPriority
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+from .task_queue import (
+    TaskQueue, TaskDefinition, TaskStatus, TaskPriority, PENDING_STATUSES, FINISHED_STATUSES,
+    TERMINAL_STATUSES, MAX_FINISHED_TASKS
+)
 from .job_scheduler import JobScheduler
 
+logger = logging.getLogger(__name__)
+
+# Project summary counters bumped for each status
+PROJECT_STATUS_COUNTERS = {
+    TaskStatus.COMPLETED: "completed_count",
+    TaskStatus.FAILED: "failed_count",
+    TaskStatus.RUNNING: "running_count"
+}
+
+# Threads used for per-video stat/mkdir calls when submitting a batch
+FILE_IO_WORKERS = 16
+
+# Keys of each detailed_tasks row in a batch report, in output order
+REPORT_TASK_KEYS = (
+    "task_id", "task_type", "input_file", "output_dir", "status", "created_at",
+    "started_at", "completed_at", "estimated_duration", "actual_duration",
+    "progress", "error_message", "retry_count"
+)
+
 class BatchManager:
     """High-level manager for batch video processing."""
     
-    def __init__(self, max_concurrent_jobs: int = 4):
-        self.task_queue = TaskQueue()
-        self.scheduler = JobScheduler(max_workers=max_concurrent_jobs)
-        self.batch_storage_dir = Path("batch_processing")
+    def __init__(self, max_concurrent_jobs: int = 4, storage_dir: str = "batch_processing",
+                 max_finished_tasks: Optional[int] = MAX_FINISHED_TASKS):
+        self.task_queue = TaskQueue(storage_dir, max_finished_tasks=max_finished_tasks)
+        # Share one queue so the manager sees the status changes made by workers
+        self.scheduler = JobScheduler(max_workers=max_concurrent_jobs, task_queue=self.task_queue)
+        self.batch_storage_dir = Path(storage_dir)
         self.batch_storage_dir.mkdir(exist_ok=True)
         
+        # Per-project aggregates of tasks already in a terminal state
+        self._project_terminal_cache: Dict[str, Dict[str, Any]] = {}
+        
+        # Project summaries, kept current by the queue's status-change callback
+        self._projects: Dict[str, Dict[str, Any]] = {}
+        # (-created_at_epoch, project_id) kept sorted, i.e. newest project first
+        self._project_order: List[Tuple[float, str]] = []
+        self._project_sort_keys: Dict[str, Tuple[float, str]] = {}
+        with self.task_queue.lock:
+            self._rebuild_projects()
+            self.task_queue.on_status_change(self._on_task_status_change)
+            self.task_queue.on_task_removed(self._on_task_removed)
+        
         # Default processing configurations
         self.default_configs = {
             "video_translation": {
@@ -78,42 +127,39 @@ class BatchManager:
         # Ensure output directory exists
         Path(output_directory).mkdir(parents=True, exist_ok=True)
         
-        # Merge configurations
-        config = self.default_configs.get(processing_type, {}).copy()
-        if config_override:
-            config.update(config_override)
+        # Merge configurations once; all tasks in the batch share this dict
+        config = {**self.default_configs.get(processing_type, {}), **(config_override or {})}
         
-        task_ids = []
+        tasks = []
+        # Stat inputs and create per-video output directories in parallel
+        file_info_cache = self._prepare_videos(video_files, output_directory)
         
         for video_file in video_files:
-            if not os.path.exists(video_file):
-                print(f"⚠️ Warning: Video file not found: {video_file}")
+            _, video_output_dir, file_size_mb = file_info_cache[video_file]
+            if file_size_mb is None:
+                logger.warning("⚠️ Video file not found: %s", video_file)
                 continue
             
-            # Create individual output directory for this video
-            video_name = Path(video_file).stem
-            video_output_dir = Path(output_directory) / video_name
-            video_output_dir.mkdir(exist_ok=True)
-            
             # Estimate processing duration based on file size and type
-            estimated_duration = self._estimate_processing_time(video_file, processing_type)
+            estimated_duration = self._estimate_from_size(file_size_mb, processing_type)
             
-            # Add task to queue
-            task_id = self.task_queue.add_task(
+            # Build task locally, submitted to the queue in one batch below
+            task = self.task_queue.create_task(
                 task_type=processing_type,
                 project_id=project_id,
                 input_file=video_file,
-                output_dir=str(video_output_dir),
+                output_dir=video_output_dir,
                 config=config,
                 priority=priority,
                 tags=tags or [],
                 estimated_duration=estimated_duration
             )
             
-            task_ids.append(task_id)
-            print(f"📝 Added task {task_id}: {video_file}")
+            tasks.append(task)
+            logger.debug("📝 Added task %s: %s", task.task_id, video_file)
         
-        print(f"🎬 Added {len(task_ids)} videos to batch processing queue")
+        task_ids = self._submit_tasks(tasks)
+        logger.info("🎬 Added %d videos to batch processing queue", len(task_ids))
         return task_ids
     
     def add_pipeline_batch(
@@ -131,73 +177,113 @@ class BatchManager:
             project_id = f"pipeline_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
         
         stage_task_ids = {}
+        tasks = []
+        
+        # Merge each stage's config once; every video's task for that stage shares it
+        stage_configs = {
+            stage: {**self.default_configs.get(stage, {}), **((config_overrides or {}).get(stage) or {})}
+            for stage in pipeline_stages
+        }
+        file_info_cache = self._prepare_videos(video_files, output_directory, create_missing=True)
         
         for video_file in video_files:
-            video_name = Path(video_file).stem
-            video_output_dir = Path(output_directory) / video_name
-            video_output_dir.mkdir(parents=True, exist_ok=True)
+            video_name, video_output_dir, file_size_mb = file_info_cache[video_file]
+            if file_size_mb is None:
+                file_size_mb = 100  # Default assumption
             
             previous_task_ids = []
             
             for stage_index, stage in enumerate(pipeline_stages):
-                # Get config for this stage
-                config = self.default_configs.get(stage, {}).copy()
-                if config_overrides and stage in config_overrides:
-                    config.update(config_overrides[stage])
-                
                 # Estimate duration
-                estimated_duration = self._estimate_processing_time(video_file, stage)
+                estimated_duration = self._estimate_from_size(file_size_mb, stage)
                 
-                # Add task with dependencies on previous stages
-                task_id = self.task_queue.add_task(
+                # Build task with dependencies on previous stages; ids are assigned
+                # up front so later stages can reference them before submission
+                task = self.task_queue.create_task(
                     task_type=stage,
                     project_id=project_id,
                     input_file=video_file,
-                    output_dir=str(video_output_dir),
-                    config=config,
+                    output_dir=video_output_dir,
+                    config=stage_configs[stage],
                     priority=priority,
                     dependencies=previous_task_ids.copy(),
                     tags=[f"pipeline_stage_{stage_index+1}", f"video_{video_name}"],
                     estimated_duration=estimated_duration
                 )
                 
+                tasks.append(task)
+                
                 if stage not in stage_task_ids:
                     stage_task_ids[stage] = []
-                stage_task_ids[stage].append(task_id)
+                stage_task_ids[stage].append(task.task_id)
                 
-                previous_task_ids = [task_id]  # Next stage depends on this one
+                previous_task_ids = [task.task_id]  # Next stage depends on this one
         
-        print(f"🔄 Added pipeline batch with {len(pipeline_stages)} stages for {len(video_files)} videos")
+        self._submit_tasks(tasks)
+        logger.info("🔄 Added pipeline batch with %d stages for %d videos", len(pipeline_stages), len(video_files))
         return stage_task_ids
     
+    def _submit_tasks(self, tasks: List[TaskDefinition]) -> List[str]:
+        """Queue a batch and write it out at once, so it survives a restart even
+        when the scheduler (and its write-behind flusher) is not running."""
+        
+        task_ids = self.task_queue.add_tasks(tasks)
+        self.task_queue.flush()
+        return task_ids
+    
     def get_batch_status(self, project_id: str) -> Dict[str, Any]:
         """Get status of a batch project."""
         
         tasks = self.task_queue.list_tasks(project_filter=project_id)
+        return self._summarize_tasks(project_id, tasks)
+    
+    def _summarize_tasks(
+        self, project_id: str, tasks: List[TaskDefinition], include_tasks: bool = True
+    ) -> Dict[str, Any]:
+        """Build the batch status summary for a project's tasks."""
         
         if not tasks:
             return {"error": "Project not found"}
         
-        # Calculate statistics
+        # Single pass: count statuses, accumulate progress/remaining time and serialize
         total_tasks = len(tasks)
-        completed = len([t for t in tasks if t.status == TaskStatus.COMPLETED])
-        failed = len([t for t in tasks if t.status == TaskStatus.FAILED])
-        running = len([t for t in tasks if t.status == TaskStatus.RUNNING])
-        pending = len([t for t in tasks if t.status in [TaskStatus.PENDING, TaskStatus.QUEUED]])
+        status_counts = Counter()
+        total_progress = 0.0
+        running_tasks_time = 0.0
+        pending_tasks_time = 0
+        serialized_tasks = []
+        now_epoch = time.time()
+        
+        for t in tasks:
+            status = t.status
+            status_counts[status] += 1
+            total_progress += t.progress_percentage
+            
+            if status == TaskStatus.RUNNING and t.started_at_epoch is not None:
+                elapsed_minutes = (now_epoch - t.started_at_epoch) / 60
+                running_tasks_time += max(0, t.estimated_duration - elapsed_minutes)
+            elif status in PENDING_STATUSES:
+                pending_tasks_time += t.estimated_duration
+            
+            if include_tasks:
+                serialized_tasks.append({
+                    "task_id": t.task_id,
+                    "task_type": t.task_type,
+                    "input_file": t.input_basename,
+                    "status": status.value,
+                    "progress": t.progress_percentage,
+                    "error": t.error_message
+                })
         
-        # Calculate overall progress
-        total_progress = sum(t.progress_percentage for t in tasks)
-        overall_progress = total_progress / total_tasks if total_tasks > 0 else 0
+        completed = status_counts[TaskStatus.COMPLETED]
+        failed = status_counts[TaskStatus.FAILED]
+        running = status_counts[TaskStatus.RUNNING]
+        pending = status_counts[TaskStatus.PENDING] + status_counts[TaskStatus.QUEUED]
         
-        # Estimate remaining time
-        running_tasks_time = sum(
-            max(0, t.estimated_duration - ((datetime.now() - datetime.fromisoformat(t.started_at)).total_seconds() / 60))
-            for t in tasks if t.status == TaskStatus.RUNNING and t.started_at
-        )
-        pending_tasks_time = sum(t.estimated_duration for t in tasks if t.status in [TaskStatus.PENDING, TaskStatus.QUEUED])
+        overall_progress = total_progress / total_tasks if total_tasks > 0 else 0
         estimated_remaining_time = running_tasks_time + pending_tasks_time
         
-        return {
+        summary = {
             "project_id": project_id,
             "total_tasks": total_tasks,
             "completed": completed,
@@ -207,32 +293,21 @@ class BatchManager:
             "overall_progress": overall_progress,
             "completion_rate": (completed / total_tasks * 100) if total_tasks > 0 else 0,
             "failure_rate": (failed / total_tasks * 100) if total_tasks > 0 else 0,
-            "estimated_remaining_minutes": int(estimated_remaining_time),
-            "tasks": [
-                {
-                    "task_id": t.task_id,
-                    "task_type": t.task_type,
-                    "input_file": os.path.basename(t.input_file),
-                    "status": t.status.value,
-                    "progress": t.progress_percentage,
-                    "error": t.error_message
-                }
-                for t in tasks
-            ]
+            "estimated_remaining_minutes": int(estimated_remaining_time)
         }
+        if include_tasks:
+            summary["tasks"] = serialized_tasks
+        
+        return summary
     
     def cancel_batch(self, project_id: str) -> int:
         """Cancel all tasks in a batch project."""
         
-        tasks = self.task_queue.list_tasks(project_filter=project_id)
-        cancelled_count = 0
-        
-        for task in tasks:
-            if task.status not in [TaskStatus.COMPLETED, TaskStatus.FAILED, TaskStatus.CANCELLED]:
-                if self.task_queue.cancel_task(task.task_id):
-                    cancelled_count += 1
+        tasks = self.task_queue.get_tasks_by_ids(self.task_queue.get_project_task_ids(project_id))
+        cancellable = [t.task_id for t in tasks if t.status not in FINISHED_STATUSES]
+        cancelled_count = self.task_queue.cancel_tasks(cancellable)
         
-        print(f"🚫 Cancelled {cancelled_count} tasks in project {project_id}")
+        logger.info("🚫 Cancelled %d tasks in project %s", cancelled_count, project_id)
         return cancelled_count
     
     def retry_failed_tasks(self, project_id: str) -> int:
@@ -243,63 +318,102 @@ class BatchManager:
             status_filter=TaskStatus.FAILED
         )
         
-        retried_count = 0
-        for task in failed_tasks:
-            if self.task_queue.retry_task(task.task_id):
-                retried_count += 1
+        retried_count = self.task_queue.retry_tasks([task.task_id for task in failed_tasks])
         
-        print(f"🔄 Retried {retried_count} failed tasks in project {project_id}")
+        logger.info("🔄 Retried %d failed tasks in project %s", retried_count, project_id)
         return retried_count
     
     def list_batch_projects(self) -> List[Dict[str, Any]]:
         """List all batch projects."""
         
-        all_tasks = self.task_queue.list_tasks()
-        
-        # Group by project ID
-        projects = {}
-        for task in all_tasks:
-            project_id = task.project_id
-            if project_id not in projects:
-                projects[project_id] = {
-                    "project_id": project_id,
-                    "created_at": task.created_at,
-                    "task_count": 0,
-                    "completed_count": 0,
-                    "failed_count": 0,
-                    "running_count": 0,
-                    "task_types": set()
-                }
+        project_list = []
+        # _project_order is already newest first, so no sort is needed here
+        for _, project_id in list(self._project_order):
+            project = self._projects.get(project_id)
+            if not project or not project["task_count"]:
+                continue
             
-            project = projects[project_id]
+            # Copy so callers never see the live summary change underneath them
+            project = dict(project, task_types=list(project["task_types"]))
+            project["completion_rate"] = project["completed_count"] / project["task_count"] * 100
+            project_list.append(project)
+        
+        return project_list
+    
+    def _rebuild_projects(self):
+        """Rebuild the project summaries from the tasks currently in the queue.
+        
+        Callers must hold task_queue.lock, which the status-change callback also runs under.
+        """
+        self._projects = {}
+        self._project_order = []
+        self._project_sort_keys = {}
+        for task in list(self.task_queue.tasks.values()):
+            self._on_task_status_change(task, None)
+    
+    def _on_task_status_change(self, task: TaskDefinition, old_status: Optional[TaskStatus]):
+        """Update the project summary for an added task (old_status None) or a status change."""
+        
+        project = self._projects.get(task.project_id)
+        if project is None:
+            project = self._projects[task.project_id] = {
+                "project_id": task.project_id,
+                "created_at": task.created_at,
+                "task_count": 0,
+                "completed_count": 0,
+                "failed_count": 0,
+                "running_count": 0,
+                "task_types": set()
+            }
+            self._add_project_order(task)
+        
+        if old_status is None:
             project["task_count"] += 1
             project["task_types"].add(task.task_type)
-            
-            if task.status == TaskStatus.COMPLETED:
-                project["completed_count"] += 1
-            elif task.status == TaskStatus.FAILED:
-                project["failed_count"] += 1
-            elif task.status == TaskStatus.RUNNING:
-                project["running_count"] += 1
-            
-            # Keep the earliest creation time
+            # Keep the earliest creation time; an older task re-keys the project's order
             if task.created_at < project["created_at"]:
+                self._project_order.remove(self._project_sort_keys[task.project_id])
+                self._add_project_order(task)
                 project["created_at"] = task.created_at
+        elif old_status in PROJECT_STATUS_COUNTERS:
+            project[PROJECT_STATUS_COUNTERS[old_status]] -= 1
         
-        # Convert to list and add computed fields
-        project_list = []
-        for project in projects.values():
-            project["task_types"] = list(project["task_types"])
-            project["completion_rate"] = (
-                project["completed_count"] / project["task_count"] * 100
-                if project["task_count"] > 0 else 0
-            )
-            project_list.append(project)
-        
-        # Sort by creation time (newest first)
-        project_list.sort(key=lambda p: p["created_at"], reverse=True)
-        
-        return project_list
+        if task.status in PROJECT_STATUS_COUNTERS:
+            project[PROJECT_STATUS_COUNTERS[task.status]] += 1
+    
+    def _on_task_removed(self, task: TaskDefinition):
+        """Take an evicted or cleared task out of its project's summary and cached aggregates."""
+        
+        project = self._projects.get(task.project_id)
+        if project is not None:
+            project["task_count"] -= 1
+            if task.status in PROJECT_STATUS_COUNTERS:
+                project[PROJECT_STATUS_COUNTERS[task.status]] -= 1
+            if project["task_count"] == 0:
+                del self._projects[task.project_id]
+                self._project_order.remove(self._project_sort_keys.pop(task.project_id))
+        
+        cache = self._project_terminal_cache.get(task.project_id)
+        if cache is None or task.task_id not in cache["seen"]:
+            return
+        cache["seen"].discard(task.task_id)
+        decrements = [("task_types", 1)]
+        if task.status == TaskStatus.COMPLETED:
+            decrements.append(("completed_by_type", 1))
+            if task.actual_duration:
+                decrements += [("duration_sum_by_type", task.actual_duration), ("duration_count_by_type", 1)]
+        for name, amount in decrements:
+            counter = cache[name]
+            counter[task.task_type] -= amount
+            if counter[task.task_type] <= 0:
+                # Reports iterate these counters, so types with nothing left must go
+                del counter[task.task_type]
+    
+    def _add_project_order(self, task: TaskDefinition):
+        """Insert the task's project into _project_order keyed by the task's creation time."""
+        sort_key = (-task.created_at_epoch, task.project_id)
+        self._project_sort_keys[task.project_id] = sort_key
+        bisect.insort(self._project_order, sort_key)
     
     def get_system_status(self) -> Dict[str, Any]:
         """Get overall system status."""
@@ -317,87 +431,230 @@ class BatchManager:
     def cleanup_old_data(self, days_old: int = 30) -> Dict[str, int]:
         """Clean up old batch processing data."""
         
-        # Clean up completed tasks
-        cleared_tasks = self.task_queue.clear_completed_tasks(days_old)
+        # Clean up completed tasks; the removal callback keeps the project summaries current
+        cleared_tasks = self.task_queue.pop_completed_tasks(days_old)
         
-        # Clean up old output directories (implement if needed)
+        # Clean up the cleared tasks' stale output directories, removed in parallel
+        cutoff_epoch = time.time() - days_old * 86400
+        stale_dirs = self._find_stale_directories(
+            {task.output_dir for task in cleared_tasks if task.output_dir}, cutoff_epoch
+        )
         cleared_dirs = 0
+        if stale_dirs:
+            with ThreadPoolExecutor(max_workers=min(FILE_IO_WORKERS, len(stale_dirs))) as executor:
+                cleared_dirs = sum(executor.map(self._remove_directory, stale_dirs))
         
         return {
-            "cleared_tasks": cleared_tasks,
+            "cleared_tasks": len(cleared_tasks),
             "cleared_directories": cleared_dirs
         }
     
+    def _find_stale_directories(self, candidates: Set[str], cutoff_epoch: float) -> List[str]:
+        """List the candidate directories last modified before cutoff_epoch.
+        
+        Directories still used by a task left in the queue are kept.
+        """
+        
+        with self.task_queue.lock:
+            in_use = {task.output_dir for task in self.task_queue.tasks.values()}
+        
+        stale_dirs = []
+        for path in sorted(candidates - in_use):
+            try:
+                info = os.stat(path, follow_symlinks=False)
+            except OSError:
+                continue  # Already gone
+            if stat.S_ISDIR(info.st_mode) and info.st_mtime < cutoff_epoch:
+                stale_dirs.append(path)
+        return stale_dirs
+    
+    def _remove_directory(self, path: str) -> bool:
+        """Remove a directory tree, returning whether it succeeded."""
+        
+        try:
+            shutil.rmtree(path)
+            return True
+        except OSError as e:
+            logger.warning("⚠️ Could not remove %s: %s", path, e)
+            return False
+    
     def export_batch_report(self, project_id: str) -> Dict[str, Any]:
         """Export detailed report for a batch project."""
         
-        batch_status = self.get_batch_status(project_id)
         tasks = self.task_queue.list_tasks(project_filter=project_id)
+        report = self._build_report_summary(project_id, tasks)
+        report["detailed_tasks"] = [self._report_task_row(t) for t in tasks]
+        return report
+    
+    def iter_batch_report(self, project_id: str) -> Iterator[bytes]:
+        """Stream the batch report as UTF-8 JSON chunks.
         
-        # Calculate detailed statistics
-        task_types = {}
-        processing_times = []
-        
-        for task in tasks:
-            task_type = task.task_type
-            if task_type not in task_types:
-                task_types[task_type] = {
-                    "total": 0,
-                    "completed": 0,
-                    "failed": 0,
-                    "avg_duration": 0
-                }
-            
-            task_types[task_type]["total"] += 1
-            
-            if task.status == TaskStatus.COMPLETED:
-                task_types[task_type]["completed"] += 1
-                if task.actual_duration:
-                    processing_times.append(task.actual_duration)
-            elif task.status == TaskStatus.FAILED:
-                task_types[task_type]["failed"] += 1
-        
-        # Calculate average durations
-        for task_type_stats in task_types.values():
-            if task_type_stats["completed"] > 0:
-                completed_tasks = [t for t in tasks if t.task_type == task_type and t.actual_duration]
-                if completed_tasks:
-                    total_duration = sum(t.actual_duration for t in completed_tasks)
-                    task_type_stats["avg_duration"] = total_duration / len(completed_tasks)
+        The summary comes first, then one chunk per detailed task, so rows
+        are never collected into a list before serializing.
+        """
+        
+        tasks = self.task_queue.list_tasks(project_filter=project_id)
+        summary = self._dump_json(self._build_report_summary(project_id, tasks))
+        # Reopen the summary object to append the detailed_tasks array
+        yield summary[:-1] + b',"detailed_tasks":['
+        for i, task in enumerate(tasks):
+            row = self._dump_json(self._report_task_row(task))
+            yield b"," + row if i else row
+        yield b"]}"
+    
+    def _build_report_summary(self, project_id: str, tasks: List[TaskDefinition]) -> Dict[str, Any]:
+        """Build the batch report without its detailed_tasks rows."""
+        
+        # The per-task list is left out here; the detailed_tasks rows carry the full records
+        batch_status = self._summarize_tasks(project_id, tasks, include_tasks=False)
+        
+        # Calculate detailed statistics, starting from the cached terminal aggregates
+        terminal, live_tasks = self._fold_terminal_tasks(project_id, tasks)
+        task_types = {
+            task_type: {
+                "total": total,
+                "completed": terminal["completed_by_type"][task_type],
+                "failed": 0,
+                "avg_duration": 0
+            }
+            for task_type, total in terminal["task_types"].items()
+        }
+        
+        for task in live_tasks:
+            task_type_stats = task_types.setdefault(task.task_type, {
+                "total": 0,
+                "completed": 0,
+                "failed": 0,
+                "avg_duration": 0
+            })
+            task_type_stats["total"] += 1
+            if task.status == TaskStatus.FAILED:
+                task_type_stats["failed"] += 1
+        
+        # Calculate average durations from the running sums
+        duration_sums = terminal["duration_sum_by_type"]
+        duration_counts = terminal["duration_count_by_type"]
+        for task_type, duration_count in duration_counts.items():
+            task_types[task_type]["avg_duration"] = duration_sums[task_type] / duration_count
+        
+        total_processing_time = sum(duration_sums.values())
+        processing_count = sum(duration_counts.values())
         
         return {
             "report_generated": datetime.now().isoformat(),
             "project_summary": batch_status,
             "task_type_breakdown": task_types,
-            "average_processing_time": sum(processing_times) / len(processing_times) if processing_times else 0,
-            "total_processing_time": sum(processing_times),
-            "detailed_tasks": [
-                {
-                    "task_id": t.task_id,
-                    "task_type": t.task_type,
-                    "input_file": t.input_file,
-                    "output_dir": t.output_dir,
-                    "status": t.status.value,
-                    "created_at": t.created_at,
-                    "started_at": t.started_at,
-                    "completed_at": t.completed_at,
-                    "estimated_duration": t.estimated_duration,
-                    "actual_duration": t.actual_duration,
-                    "progress": t.progress_percentage,
-                    "error_message": t.error_message,
-                    "retry_count": t.retry_count
-                }
-                for t in tasks
-            ]
+            "average_processing_time": total_processing_time / processing_count if processing_count else 0,
+            "total_processing_time": total_processing_time
         }
     
-    def _estimate_processing_time(self, video_file: str, processing_type: str) -> int:
-        """Estimate processing time based on file size and type."""
+    @staticmethod
+    def _report_task_row(task: TaskDefinition) -> Dict[str, Any]:
+        """Build one detailed_tasks row of a batch report."""
+        
+        return dict(zip(REPORT_TASK_KEYS, (
+            task.task_id, task.task_type, task.input_file, task.output_dir,
+            task.status.value, task.created_at, task.started_at, task.completed_at,
+            task.estimated_duration, task.actual_duration, task.progress_percentage,
+            task.error_message, task.retry_count
+        )))
+    
+    def export_batch_report_json(self, project_id: str) -> bytes:
+        """Export the batch report as compact UTF-8 JSON bytes."""
+        
+        return b"".join(self.iter_batch_report(project_id))
+    
+    @staticmethod
+    def _dump_json(data: Any) -> bytes:
+        """Serialize data to compact UTF-8 JSON, with orjson when installed."""
+        
+        if ORJSON_AVAILABLE:
+            return orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS)
+        return json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    
+    def _fold_terminal_tasks(
+        self, project_id: str, tasks: List[TaskDefinition]
+    ) -> Tuple[Dict[str, Counter], List[TaskDefinition]]:
+        """Fold newly finished tasks into the project's cached aggregates.
+        
+        Returns copies of the cached counters and the tasks that are not yet
+        terminal. Each terminal task is counted once and skipped on later calls.
+        Runs under the queue lock, like _on_task_removed, so an eviction cannot
+        interleave with the fold; tasks removed since they were listed are skipped.
+        """
+        
+        with self.task_queue.lock:
+            cache = self._project_terminal_cache.get(project_id)
+            if cache is None:
+                cache = self._project_terminal_cache[project_id] = {
+                    "seen": set(),
+                    "task_types": Counter(),
+                    "completed_by_type": Counter(),
+                    "duration_sum_by_type": Counter(),
+                    "duration_count_by_type": Counter()
+                }
+            
+            seen = cache["seen"]
+            queued = self.task_queue.tasks
+            live_tasks = []
+            for task in tasks:
+                if task.task_id in seen or queued.get(task.task_id) is not task:
+                    continue
+                if task.status not in TERMINAL_STATUSES:
+                    live_tasks.append(task)
+                    continue
+                
+                seen.add(task.task_id)
+                cache["task_types"][task.task_type] += 1
+                if task.status == TaskStatus.COMPLETED:
+                    cache["completed_by_type"][task.task_type] += 1
+                    if task.actual_duration:
+                        cache["duration_sum_by_type"][task.task_type] += task.actual_duration
+                        cache["duration_count_by_type"][task.task_type] += 1
+            
+            totals = {name: counter.copy() for name, counter in cache.items() if name != "seen"}
+        
+        return totals, live_tasks
+    
+    def _prepare_video(
+        self, video_file: str, output_directory: str, create_missing: bool
+    ) -> Tuple[str, str, Optional[float]]:
+        """Stat a video and create its output directory.
+        
+        Returns (video_name, output_dir, size in MB); size is None if the file is missing.
+        Plain os.path string ops are used since this runs once per video.
+        """
         
         try:
-            file_size_mb = os.path.getsize(video_file) / (1024 * 1024)
+            file_size_mb = os.stat(video_file).st_size / (1024 * 1024)
         except OSError:
-            file_size_mb = 100  # Default assumption
+            file_size_mb = None
+        
+        video_name = os.path.splitext(os.path.basename(video_file))[0]
+        video_output_dir = os.path.join(output_directory, video_name)
+        if file_size_mb is not None or create_missing:
+            os.makedirs(video_output_dir, exist_ok=True)
+        
+        return video_name, video_output_dir, file_size_mb
+    
+    def _prepare_videos(
+        self, video_files: List[str], output_directory: str, create_missing: bool = False
+    ) -> Dict[str, Tuple[str, str, Optional[float]]]:
+        """Prepare each distinct video once, on a thread pool since stat/mkdir release the GIL."""
+        
+        unique_files = list(dict.fromkeys(video_files))
+        if len(unique_files) <= 1:
+            return {f: self._prepare_video(f, output_directory, create_missing) for f in unique_files}
+        
+        with ThreadPoolExecutor(max_workers=min(FILE_IO_WORKERS, len(unique_files))) as executor:
+            results = executor.map(
+                lambda f: self._prepare_video(f, output_directory, create_missing),
+                unique_files
+            )
+            return dict(zip(unique_files, results))
+    
+    def _estimate_from_size(self, file_size_mb: float, processing_type: str) -> int:
+        """Estimate processing time based on file size and type."""
         
         # Base time estimates per MB (in minutes)
         time_per_mb = {
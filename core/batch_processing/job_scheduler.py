@@ -4,6 +4,8 @@ Job Scheduler Module
 Manages the execution of queued tasks with worker threads and resource management.
 """
 
+import itertools
+import logging
 import threading
 import time
 import os
@@ -14,12 +16,26 @@ try:
 except ImportError:
     PSUTIL_AVAILABLE = False
 from datetime import datetime
-from typing import Dict, List, Optional, Callable, Any
+from typing import Dict, FrozenSet, List, Optional, Callable, Any
 from dataclasses import dataclass
 from enum import Enum
 
 from .task_queue import TaskQueue, TaskDefinition, TaskStatus, TaskPriority
 
+logger = logging.getLogger(__name__)
+
+# Task types the built-in handlers cover; workers share one set instead of each holding a list
+DEFAULT_CAPABILITIES: FrozenSet[str] = frozenset({
+    "video_translation", "audio_extraction", "subtitle_generation", "video_transcoding"
+})
+
+# Minimum seconds between CPU usage samples
+CPU_SAMPLE_INTERVAL = 2.0
+
+# Seconds a worker waits before re-checking resources, and before replacing itself after an error
+RESOURCE_WAIT = 1.0
+ERROR_BACKOFF = 10.0
+
 class WorkerStatus(Enum):
     """Worker thread status."""
     IDLE = "idle"
@@ -33,7 +49,7 @@ class WorkerInfo:
     worker_id: str
     status: WorkerStatus
     current_task: Optional[str]
-    capabilities: List[str]
+    capabilities: FrozenSet[str]
     created_at: str
     last_activity: str
     tasks_completed: int
@@ -42,8 +58,16 @@ class WorkerInfo:
 class JobScheduler:
     """Manages task execution with worker threads."""
     
-    def __init__(self, max_workers: int = 4, max_cpu_usage: float = 80.0, max_memory_usage: float = 85.0):
-        self.task_queue = TaskQueue()
+    def __init__(
+        self,
+        max_workers: int = 4,
+        max_cpu_usage: float = 80.0,
+        max_memory_usage: float = 85.0,
+        task_queue: Optional[TaskQueue] = None,
+        storage_dir: str = "batch_processing"
+    ):
+        # storage_dir is only used when no queue is passed in
+        self.task_queue = task_queue or TaskQueue(storage_dir)
         self.max_workers = max_workers
         self.max_cpu_usage = max_cpu_usage
         self.max_memory_usage = max_memory_usage
@@ -51,9 +75,22 @@ class JobScheduler:
         self.workers: Dict[str, WorkerInfo] = {}
         self.worker_threads: Dict[str, threading.Thread] = {}
         self.is_running = False
-        self.scheduler_thread: Optional[threading.Thread] = None
+        # Set by stop(); workers wait on it so they can be interrupted
+        self._stop_event = threading.Event()
+        self._worker_seq = itertools.count(1)
         self.lock = threading.Lock()
         
+        # Last CPU usage sample; psutil measures each non-blocking call against the previous one
+        self._last_cpu_percent = 0.0
+        self._last_cpu_sample_ts = 0.0
+        if PSUTIL_AVAILABLE:
+            psutil.cpu_percent(interval=None)  # Prime the counter; the first reading is meaningless
+            self._last_cpu_sample_ts = time.monotonic()
+        
+        # Lifetime totals, bumped under self.lock and read without it
+        self._tasks_completed_total = 0
+        self._tasks_failed_total = 0
+        
         # Task execution callbacks
         self.task_handlers: Dict[str, Callable] = {}
         
@@ -68,61 +105,48 @@ class JobScheduler:
             "subtitle_generation": self._handle_subtitle_generation,
             "video_transcoding": self._handle_video_transcoding
         }
+        self.capabilities = DEFAULT_CAPABILITIES
     
     def register_task_handler(self, task_type: str, handler: Callable[[TaskDefinition], bool]):
         """Register a custom task handler."""
         self.task_handlers[task_type] = handler
+        # Running workers read their capabilities on every loop, so hand them the new set
+        # and wake idle ones, which may now run tasks of this type that are already waiting
+        with self.lock:
+            self.capabilities = self.capabilities | {task_type}
+            for worker in self.workers.values():
+                worker.capabilities = self.capabilities
+        self.task_queue.wake_workers()
     
     def start(self):
-        """Start the job scheduler."""
+        """Start the job scheduler and its workers."""
         if self.is_running:
             return
         
         self.is_running = True
+        self._stop_event.clear()
+        self.task_queue.start_persistence()
         
-        # Start scheduler thread
-        self.scheduler_thread = threading.Thread(target=self._scheduler_loop, daemon=True)
-        self.scheduler_thread.start()
+        # Workers run for the scheduler's lifetime; one that hits an error replaces itself
+        self._cleanup_workers()
+        for _ in range(self.max_workers):
+            self._start_worker()
         
-        print(f"🚀 Job scheduler started with {self.max_workers} workers")
+        logger.info("🚀 Job scheduler started with %d workers", self.max_workers)
     
     def stop(self):
         """Stop the job scheduler."""
         self.is_running = False
+        self._stop_event.set()
         
-        # Stop all workers
+        # Stop all workers, waking any waiting for a task; the stop event is set
+        # first, so a worker that has not started waiting yet will not wait at all
         for worker_id in list(self.workers.keys()):
             self._stop_worker(worker_id)
+        self.task_queue.wake_workers()
         
-        # Wait for scheduler thread
-        if self.scheduler_thread and self.scheduler_thread.is_alive():
-            self.scheduler_thread.join(timeout=5)
-        
-        print("🛑 Job scheduler stopped")
-    
-    def _scheduler_loop(self):
-        """Main scheduler loop."""
-        while self.is_running:
-            try:
-                # Check system resources
-                if not self._check_system_resources():
-                    time.sleep(10)  # Wait before checking again
-                    continue
-                
-                # Manage workers
-                self._manage_workers()
-                
-                # Assign tasks to idle workers
-                self._assign_tasks()
-                
-                # Cleanup finished workers
-                self._cleanup_workers()
-                
-                time.sleep(2)  # Check every 2 seconds
-                
-            except Exception as e:
-                print(f"❌ Scheduler error: {e}")
-                time.sleep(5)
+        self.task_queue.stop_persistence()
+        logger.info("🛑 Job scheduler stopped")
     
     def _check_system_resources(self) -> bool:
         """Check if system resources are available for new tasks."""
@@ -132,8 +156,7 @@ class JobScheduler:
             
         try:
             # Check CPU usage
-            cpu_percent = psutil.cpu_percent(interval=1)
-            if cpu_percent > self.max_cpu_usage:
+            if self._sample_cpu_percent() > self.max_cpu_usage:
                 return False
             
             # Check memory usage
@@ -147,26 +170,27 @@ class JobScheduler:
             # If we can't check resources, assume they're available
             return True
     
-    def _manage_workers(self):
-        """Manage worker threads."""
-        with self.lock:
-            active_workers = len([w for w in self.workers.values() if w.status != WorkerStatus.STOPPED])
-            
-            # Start new workers if needed
-            if active_workers < self.max_workers:
-                needed_workers = self.max_workers - active_workers
-                for _ in range(needed_workers):
-                    self._start_worker()
+    def _sample_cpu_percent(self) -> float:
+        """CPU usage since the previous sample, without blocking.
+        
+        Samples are at least CPU_SAMPLE_INTERVAL apart; calls in between
+        return the last value.
+        """
+        now = time.monotonic()
+        if now - self._last_cpu_sample_ts >= CPU_SAMPLE_INTERVAL:
+            self._last_cpu_percent = psutil.cpu_percent(interval=None)
+            self._last_cpu_sample_ts = now
+        return self._last_cpu_percent
     
     def _start_worker(self):
         """Start a new worker thread."""
-        worker_id = f"worker_{len(self.workers)+1}_{int(time.time())}"
+        worker_id = f"worker_{next(self._worker_seq)}_{int(time.time())}"
         
         worker_info = WorkerInfo(
             worker_id=worker_id,
             status=WorkerStatus.IDLE,
             current_task=None,
-            capabilities=["video_translation", "audio_extraction", "subtitle_generation", "video_transcoding"],
+            capabilities=self.capabilities,
             created_at=datetime.now().isoformat(),
             last_activity=datetime.now().isoformat(),
             tasks_completed=0,
@@ -176,11 +200,13 @@ class JobScheduler:
         worker_thread = threading.Thread(target=self._worker_loop, args=(worker_id,), daemon=True)
         
         with self.lock:
+            worker_info.capabilities = self.capabilities  # Current as of registration, see register_task_handler
             self.workers[worker_id] = worker_info
             self.worker_threads[worker_id] = worker_thread
         
+        self.task_queue.register_worker(worker_id)
         worker_thread.start()
-        print(f"👷 Started worker: {worker_id}")
+        logger.info("👷 Started worker: %s", worker_id)
     
     def _stop_worker(self, worker_id: str):
         """Stop a specific worker."""
@@ -192,6 +218,9 @@ class JobScheduler:
             worker = self.workers.get(worker_id)
             if worker and worker.current_task:
                 self.task_queue.cancel_task(worker.current_task)
+        
+        # Remove workers stopped earlier whose threads have exited by now
+        self._cleanup_workers()
     
     def _worker_loop(self, worker_id: str):
         """Main worker loop."""
@@ -205,24 +234,39 @@ class JobScheduler:
                     if worker.status == WorkerStatus.STOPPED:
                         break
                 
-                # Get next task
-                task = self.task_queue.get_next_task(worker.capabilities)
+                # Hold off new tasks while the system is busy
+                if not self._check_system_resources():
+                    self._stop_event.wait(RESOURCE_WAIT)
+                    continue
+                
+                # Own heap first, then another worker's, then the shared ready heap,
+                # which waits for a new task instead of sleeping when nothing is ready
+                task = (
+                    self.task_queue.pop_local(worker_id, worker.capabilities)
+                    or self.task_queue.steal(worker_id, worker.capabilities)
+                    or self.task_queue.get_next_task(
+                        worker.capabilities, timeout=5.0, stop_event=self._stop_event
+                    )
+                )
                 
                 if task:
                     self._execute_task(worker_id, task)
-                else:
-                    # No tasks available, wait
-                    time.sleep(5)
                 
             except Exception as e:
-                print(f"❌ Worker {worker_id} error: {e}")
+                logger.error("❌ Worker %s error: %s", worker_id, e)
                 with self.lock:
                     if worker_id in self.workers:
                         self.workers[worker_id].status = WorkerStatus.ERROR
-                time.sleep(10)
+                
+                # Back off, then hand over to a fresh worker and let this thread exit
+                if not self._stop_event.wait(ERROR_BACKOFF):
+                    self._stop_worker(worker_id)
+                    self._start_worker()
+                break
     
     def _execute_task(self, worker_id: str, task: TaskDefinition):
         """Execute a task."""
+        cancel_event = self.task_queue.get_cancel_event(task.task_id)
         try:
             # Update worker status
             with self.lock:
@@ -231,10 +275,12 @@ class JobScheduler:
                 worker.current_task = task.task_id
                 worker.last_activity = datetime.now().isoformat()
             
-            # Update task status
-            self.task_queue.update_task_status(task.task_id, TaskStatus.RUNNING)
+            # Update task status; a task cancelled between claim and start is not run at all
+            if not self.task_queue.update_task_status(task.task_id, TaskStatus.RUNNING):
+                logger.info("🚫 Worker %s skipped cancelled task %s", worker_id, task.task_id)
+                return
             
-            print(f"🔄 Worker {worker_id} starting task {task.task_id} ({task.task_type})")
+            logger.info("🔄 Worker %s starting task %s (%s)", worker_id, task.task_id, task.task_type)
             
             # Execute task
             handler = self.task_handlers.get(task.task_type)
@@ -243,46 +289,47 @@ class JobScheduler:
             
             success = handler(task)
             
-            if success:
+            if cancel_event.is_set():
+                # Already marked CANCELLED by the queue; don't count it as a failure
+                logger.info("🚫 Worker %s stopped cancelled task %s", worker_id, task.task_id)
+            elif success:
                 self.task_queue.update_task_status(task.task_id, TaskStatus.COMPLETED, 100.0)
-                print(f"✅ Worker {worker_id} completed task {task.task_id}")
+                logger.info("✅ Worker %s completed task %s", worker_id, task.task_id)
                 
                 with self.lock:
                     worker.tasks_completed += 1
+                    self._tasks_completed_total += 1
             else:
                 self.task_queue.update_task_status(task.task_id, TaskStatus.FAILED, 
                                                  error_message="Task handler returned False")
-                print(f"❌ Worker {worker_id} failed task {task.task_id}")
+                logger.warning("❌ Worker %s failed task %s", worker_id, task.task_id)
                 
                 with self.lock:
                     worker.tasks_failed += 1
+                    self._tasks_failed_total += 1
             
         except Exception as e:
             error_msg = str(e)
+            if cancel_event.is_set():
+                logger.info("🚫 Worker %s stopped cancelled task %s: %s", worker_id, task.task_id, error_msg)
+                return
             self.task_queue.update_task_status(task.task_id, TaskStatus.FAILED, error_message=error_msg)
-            print(f"❌ Worker {worker_id} failed task {task.task_id}: {error_msg}")
+            logger.warning("❌ Worker %s failed task %s: %s", worker_id, task.task_id, error_msg)
             
             with self.lock:
                 worker.tasks_failed += 1
+                self._tasks_failed_total += 1
         
         finally:
-            # Reset worker status
+            # Reset worker status, unless the worker was stopped meanwhile
             with self.lock:
                 if worker_id in self.workers:
                     worker = self.workers[worker_id]
-                    worker.status = WorkerStatus.IDLE
+                    if worker.status == WorkerStatus.BUSY:
+                        worker.status = WorkerStatus.IDLE
                     worker.current_task = None
                     worker.last_activity = datetime.now().isoformat()
     
-    def _assign_tasks(self):
-        """Assign tasks to idle workers."""
-        with self.lock:
-            idle_workers = [w for w in self.workers.values() if w.status == WorkerStatus.IDLE]
-        
-        # Tasks will be picked up by workers in their main loop
-        # This method can be used for more sophisticated assignment logic if needed
-        pass
-    
     def _cleanup_workers(self):
         """Cleanup stopped worker threads."""
         with self.lock:
@@ -295,7 +342,8 @@ class JobScheduler:
                     if not thread.is_alive():
                         del self.worker_threads[worker_id]
                         del self.workers[worker_id]
-                        print(f"🗑️ Cleaned up stopped worker: {worker_id}")
+                        self.task_queue.unregister_worker(worker_id)
+                        logger.debug("🗑️ Cleaned up stopped worker: %s", worker_id)
     
     def get_worker_status(self) -> List[WorkerInfo]:
         """Get status of all workers."""
@@ -303,20 +351,31 @@ class JobScheduler:
             return list(self.workers.values())
     
     def get_scheduler_statistics(self) -> Dict[str, Any]:
-        """Get scheduler statistics."""
-        with self.lock:
-            workers = list(self.workers.values())
+        """Get scheduler statistics without blocking workers on self.lock."""
+        # Copying the dict values and reading int totals are atomic under the GIL
+        workers = list(self.workers.values())
         
         queue_stats = self.task_queue.get_queue_statistics()
         
+        # Count worker states in one pass
+        active = busy = idle = 0
+        for worker in workers:
+            status = worker.status
+            if status != WorkerStatus.STOPPED:
+                active += 1
+            if status == WorkerStatus.BUSY:
+                busy += 1
+            elif status == WorkerStatus.IDLE:
+                idle += 1
+        
         return {
             "scheduler_running": self.is_running,
             "total_workers": len(workers),
-            "active_workers": len([w for w in workers if w.status != WorkerStatus.STOPPED]),
-            "busy_workers": len([w for w in workers if w.status == WorkerStatus.BUSY]),
-            "idle_workers": len([w for w in workers if w.status == WorkerStatus.IDLE]),
-            "total_tasks_completed": sum(w.tasks_completed for w in workers),
-            "total_tasks_failed": sum(w.tasks_failed for w in workers),
+            "active_workers": active,
+            "busy_workers": busy,
+            "idle_workers": idle,
+            "total_tasks_completed": self._tasks_completed_total,
+            "total_tasks_failed": self._tasks_failed_total,
             "queue_statistics": queue_stats,
             "system_resources": self._get_system_resources()
         }
@@ -328,7 +387,7 @@ class JobScheduler:
             
         try:
             return {
-                "cpu_percent": psutil.cpu_percent(interval=0.1),
+                "cpu_percent": self._sample_cpu_percent(),
                 "memory_percent": psutil.virtual_memory().percent,
                 "disk_usage": psutil.disk_usage('/').percent if os.path.exists('/') else 0
             }
@@ -338,53 +397,65 @@ class JobScheduler:
     # Default task handlers
     def _handle_video_translation(self, task: TaskDefinition) -> bool:
         """Handle video translation task."""
-        print(f"🎬 Processing video translation: {task.input_file}")
+        logger.info("🎬 Processing video translation: %s", task.input_file)
+        
+        cancel_event = self.task_queue.get_cancel_event(task.task_id)
         
         # Simulate video translation process
         stages = ["audio_extraction", "transcription", "translation", "tts_generation", "video_mixing"]
         
         for i, stage in enumerate(stages):
             progress = (i + 1) / len(stages) * 100
-            self.task_queue.update_task_status(task.task_id, TaskStatus.RUNNING, progress)
-            print(f"  📊 {stage}: {progress:.1f}%")
+            self.task_queue.update_progress(task.task_id, progress)
+            logger.debug("  📊 %s: %.1f%%", stage, progress)
             
-            # Simulate processing time
-            time.sleep(2)
+            # Simulate processing time; stop early if the task is cancelled
+            if cancel_event.wait(2):
+                return False
         
         return True
     
     def _handle_audio_extraction(self, task: TaskDefinition) -> bool:
         """Handle audio extraction task."""
-        print(f"🎵 Extracting audio: {task.input_file}")
+        logger.info("🎵 Extracting audio: %s", task.input_file)
+        
+        cancel_event = self.task_queue.get_cancel_event(task.task_id)
         
         # Simulate audio extraction
         for i in range(10):
             progress = (i + 1) / 10 * 100
-            self.task_queue.update_task_status(task.task_id, TaskStatus.RUNNING, progress)
-            time.sleep(0.5)
+            self.task_queue.update_progress(task.task_id, progress)
+            if cancel_event.wait(0.5):
+                return False
         
         return True
     
     def _handle_subtitle_generation(self, task: TaskDefinition) -> bool:
         """Handle subtitle generation task."""
-        print(f"📝 Generating subtitles: {task.input_file}")
+        logger.info("📝 Generating subtitles: %s", task.input_file)
+        
+        cancel_event = self.task_queue.get_cancel_event(task.task_id)
         
         # Simulate subtitle generation
         for i in range(8):
             progress = (i + 1) / 8 * 100
-            self.task_queue.update_task_status(task.task_id, TaskStatus.RUNNING, progress)
-            time.sleep(0.3)
+            self.task_queue.update_progress(task.task_id, progress)
+            if cancel_event.wait(0.3):
+                return False
         
         return True
     
     def _handle_video_transcoding(self, task: TaskDefinition) -> bool:
         """Handle video transcoding task."""
-        print(f"🎞️ Transcoding video: {task.input_file}")
+        logger.info("🎞️ Transcoding video: %s", task.input_file)
+        
+        cancel_event = self.task_queue.get_cancel_event(task.task_id)
         
         # Simulate video transcoding
         for i in range(15):
             progress = (i + 1) / 15 * 100
-            self.task_queue.update_task_status(task.task_id, TaskStatus.RUNNING, progress)
-            time.sleep(0.2)
+            self.task_queue.update_progress(task.task_id, progress)
+            if cancel_event.wait(0.2):
+                return False
         
         return True
\ No newline at end of file
@@ -5,16 +5,29 @@ Manages task queuing, scheduling, and execution for batch processing.
 """
 
 import json
+import logging
 import os
 import time
 import threading
-from datetime import datetime, timedelta
-from dataclasses import dataclass, asdict
-from typing import List, Dict, Any, Optional, Callable
+from datetime import datetime
+from dataclasses import dataclass, field, fields
+from typing import List, Dict, Any, Optional, Callable, Collection, Tuple
 from pathlib import Path
 from enum import Enum
+import operator
 import uuid
 import queue
+import heapq
+import random
+from collections import Counter, defaultdict, deque
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
 
 class TaskStatus(Enum):
     """Task execution status."""
@@ -33,7 +46,23 @@ class TaskPriority(Enum):
     HIGH = 3
     CRITICAL = 4
 
-@dataclass
+# Status groups, as frozensets so membership tests hash instead of building a list
+PENDING_STATUSES = frozenset({TaskStatus.PENDING, TaskStatus.QUEUED})
+ACTIVE_STATUSES = PENDING_STATUSES | {TaskStatus.RUNNING}
+FINISHED_STATUSES = frozenset({TaskStatus.COMPLETED, TaskStatus.FAILED, TaskStatus.CANCELLED})
+# Completed and cancelled tasks never change again; failed tasks can still be retried
+TERMINAL_STATUSES = frozenset({TaskStatus.COMPLETED, TaskStatus.CANCELLED})
+
+# Seconds between write-behind snapshots of the queue file
+QUEUE_SNAPSHOT_INTERVAL = 2.0
+
+# Finished tasks kept in the queue by default; older ones are dropped as new ones finish
+MAX_FINISHED_TASKS = 1000
+
+# Most tasks moved by one steal, to keep the victim's lock hold short
+STEAL_BATCH_MAX = 100
+
+@dataclass(slots=True)
 class TaskDefinition:
     """Definition of a processing task."""
     task_id: str
@@ -55,23 +84,117 @@ class TaskDefinition:
     progress_percentage: float = 0.0
     dependencies: List[str] = None
     tags: List[str] = None
+    # Epoch mirrors of the ISO timestamps, so elapsed-time math needs no parsing
+    created_at_epoch: Optional[float] = None
+    started_at_epoch: Optional[float] = None
+    completed_at_epoch: Optional[float] = None
+    # Display values derived once from task_id/input_file; not constructor arguments
+    input_basename: str = field(init=False, repr=False, compare=False)
+    short_id: str = field(init=False, repr=False, compare=False)
+    # Dependencies not completed yet; kept current by the owning TaskQueue
+    unmet_dependencies: int = field(init=False, repr=False, compare=False)
     
     def __post_init__(self):
         if self.dependencies is None:
             self.dependencies = []
         if self.tags is None:
             self.tags = []
+        
+        # Tasks saved before the epoch fields existed get them from the ISO strings
+        if self.created_at_epoch is None and self.created_at:
+            self.created_at_epoch = datetime.fromisoformat(self.created_at).timestamp()
+        if self.started_at_epoch is None and self.started_at:
+            self.started_at_epoch = datetime.fromisoformat(self.started_at).timestamp()
+        if self.completed_at_epoch is None and self.completed_at:
+            self.completed_at_epoch = datetime.fromisoformat(self.completed_at).timestamp()
+        
+        self.input_basename = os.path.basename(self.input_file)
+        self.short_id = self.task_id[:8]
+        self.unmet_dependencies = len(self.dependencies)
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "TaskDefinition":
+        """Build a task from saved data, ignoring the derived fields."""
+        task_data = {f.name: data[f.name] for f in fields(cls) if f.init and f.name in data}
+        task_data["status"] = _load_enum(TaskStatus, task_data["status"])
+        task_data["priority"] = _load_enum(TaskPriority, task_data["priority"])
+        return cls(**task_data)
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Saved form of the task, without the derived fields."""
+        data = dict(zip(_SAVED_FIELDS, _get_saved_values(self)))
+        data["status"] = self.status.value
+        data["priority"] = self.priority.value
+        return data
+
+# Constructor fields, i.e. what to_dict saves, looked up once instead of per task
+_SAVED_FIELDS = tuple(f.name for f in fields(TaskDefinition) if f.init)
+_get_saved_values = operator.attrgetter(*_SAVED_FIELDS)
+
+def _load_enum(enum_cls, value):
+    """Read a saved enum value; older queue files stored str(member), e.g. "TaskStatus.PENDING"."""
+    if isinstance(value, enum_cls):
+        return value
+    if isinstance(value, str) and value.startswith(enum_cls.__name__ + "."):
+        return enum_cls[value.split(".", 1)[1]]
+    return enum_cls(value)
+
+_thread_state = threading.local()
+
+def _thread_random() -> random.Random:
+    """Random generator owned by the calling thread, so thieves never share RNG state."""
+    rng = getattr(_thread_state, "rng", None)
+    if rng is None:
+        rng = _thread_state.rng = random.Random()
+    return rng
+
+def _dumps_json(data: Any) -> bytes:
+    """Serialize the queue to compact UTF-8 JSON, with orjson when installed."""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(data, default=str)
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":"), default=str).encode("utf-8")
+
+def _loads_json(raw: bytes) -> Any:
+    """Parse a saved queue, with orjson when installed."""
+    if ORJSON_AVAILABLE:
+        return orjson.loads(raw)
+    return json.loads(raw)
 
 class TaskQueue:
     """Manages task queue and execution."""
     
-    def __init__(self, storage_dir: str = "batch_processing"):
+    def __init__(self, storage_dir: str = "batch_processing", max_finished_tasks: Optional[int] = MAX_FINISHED_TASKS):
         self.storage_dir = Path(storage_dir)
         self.storage_dir.mkdir(exist_ok=True)
         self.queue_file = self.storage_dir / "task_queue.json"
         self.lock = threading.Lock()
+        # Signalled once per task that becomes pending, waking one idle worker each
+        self._task_available = threading.Condition(self.lock)
         self.task_callbacks: Dict[str, Callable] = {}
-        self._running_tasks: Dict[str, threading.Thread] = {}
+        self._status_listeners: List[Callable[[TaskDefinition, Optional[TaskStatus]], None]] = []
+        self._removal_listeners: List[Callable[[TaskDefinition], None]] = []
+        # Cancellation flags polled by handlers of claimed tasks; dropped once a task finishes
+        self._cancel_flags: Dict[str, threading.Event] = {}
+        
+        # Write-behind persistence: mutations set _dirty, and flush() writes at most one snapshot
+        self._dirty = threading.Event()
+        self._snapshot_lock = threading.Lock()
+        self._persistence_stop = threading.Event()
+        self._persistence_thread: Optional[threading.Thread] = None
+        # Saved dicts of terminal tasks, reused by every snapshot; dropped when such a task changes
+        self._serialized: Dict[str, Dict[str, Any]] = {}
+        # task_id -> (progress, monotonic time) of the last progress update that marked the queue dirty
+        self._progress_marks: Dict[str, Tuple[float, float]] = {}
+        
+        # Per-worker heaps of ready keys (see _ready_key), each guarded by its worker's
+        # lock, which the owner and thieves take only briefly. self.tasks stays the
+        # source of truth, and get_next_task still finds tasks that are in no worker heap.
+        self.worker_queues: Dict[str, List[Tuple[int, str, str]]] = {}
+        self._worker_locks: Dict[str, threading.Lock] = {}
+        self._route_index = 0
+        
+        # Finished tasks kept in self.tasks; None keeps them all
+        self.max_finished_tasks = max_finished_tasks
         
         # Load existing queue
         self._load_queue()
@@ -80,28 +203,294 @@ class TaskQueue:
         """Load task queue from storage."""
         if self.queue_file.exists():
             try:
-                with open(self.queue_file, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    self.tasks = {
-                        task_id: TaskDefinition(**task_data)
-                        for task_id, task_data in data.items()
-                    }
+                data = _loads_json(self.queue_file.read_bytes())
+                self.tasks = {
+                    task_id: TaskDefinition.from_dict(task_data)
+                    for task_id, task_data in data.items()
+                }
             except (FileNotFoundError, json.JSONDecodeError):
                 self.tasks = {}
         else:
             self.tasks = {}
+        
+        # A queued task in the file was claimed by a worker that is gone
+        for task in self.tasks.values():
+            if task.status == TaskStatus.QUEUED:
+                task.status = TaskStatus.PENDING
+        
+        self._rebuild_project_index()
+        self._rebuild_statistics()
+        self._rebuild_dependency_index()
+        self._rebuild_ready_heap()
+        self._rebuild_finished_ring()
+    
+    def _rebuild_finished_ring(self):
+        """Rebuild the ring of terminal task IDs in completion order, dropping any beyond the limit.
+        
+        Failed tasks can still be retried, so they are never in the ring and never evicted.
+        """
+        self._finished_ring: deque = deque(maxlen=self.max_finished_tasks)
+        finished = [task for task in self.tasks.values() if task.status in TERMINAL_STATUSES]
+        finished.sort(key=lambda t: t.completed_at_epoch or 0)
+        for task in finished:
+            self._record_finished(task)
+    
+    def _record_finished(self, task: TaskDefinition):
+        """Add a task that became terminal to the ring, removing the oldest terminal task
+        from the queue when the ring is full. Callers must hold self.lock."""
+        ring = self._finished_ring
+        if ring.maxlen is not None and len(ring) == ring.maxlen:
+            self._evict_task(ring[0])  # The append below pushes it out of the ring
+        ring.append(task.task_id)
+    
+    def _forget_finished(self, task_id: str):
+        """Drop a task that is no longer terminal from the ring, so finishing again
+        does not give it a second slot. Callers must hold self.lock."""
+        try:
+            self._finished_ring.remove(task_id)
+        except ValueError:
+            pass  # Already pushed out of the ring
+    
+    def _has_live_dependents(self, task_id: str) -> bool:
+        """Whether a task that has not reached a terminal state depends on this one.
+        
+        A completed dependency missing from the queue file would count as unmet when the
+        queue reloads, so such tasks are kept. Callers must hold self.lock.
+        """
+        for dependent_id in self._dependents.get(task_id, ()):
+            dependent = self.tasks.get(dependent_id)
+            if dependent is not None and dependent.status not in TERMINAL_STATUSES:
+                return True
+        return False
+    
+    def _evict_task(self, task_id: str):
+        """Remove a terminal task from the queue and its indexes. Callers must hold self.lock.
+        
+        Tasks that live dependents still need are left in the queue, out of the ring;
+        the ring is rebuilt when the queue reloads, and they are evicted then if no longer needed.
+        """
+        task = self.tasks.get(task_id)
+        if task is None or task.status not in TERMINAL_STATUSES:
+            return  # Already cleared, or retried since it finished
+        if self._has_live_dependents(task_id):
+            return
+        
+        del self.tasks[task_id]
+        self._serialized.pop(task_id, None)
+        self._count_task(task, -1)
+        project_task_ids = self.project_index.get(task.project_id)
+        if project_task_ids and task_id in project_task_ids:
+            project_task_ids.remove(task_id)
+        # Dependents keep counting a removed completed task as met
+        self._dependents.pop(task_id, None)
+        self._notify_task_removed(task)
+        self._dirty.set()
+    
+    def _rebuild_ready_heap(self):
+        """Rebuild the heap of pending tasks that get_next_task pops from."""
+        # Entries are (-priority, created_at, task_id); entries for tasks that are no
+        # longer pending are skipped when popped rather than removed eagerly
+        self._ready_heap: List[Tuple[int, str, str]] = [
+            self._ready_key(task) for task in self.tasks.values()
+            if task.status == TaskStatus.PENDING and not task.unmet_dependencies
+        ]
+        heapq.heapify(self._ready_heap)
+    
+    @staticmethod
+    def _ready_key(task: TaskDefinition) -> Tuple[int, str, str]:
+        """Heap key: highest priority first, then oldest creation time."""
+        return (-task.priority.value, task.created_at, task.task_id)
+    
+    def _rebuild_dependency_index(self):
+        """Rebuild the dependency -> dependent task ids index and the unmet counts."""
+        self._dependents: Dict[str, List[str]] = defaultdict(list)
+        for task in self.tasks.values():
+            self._index_dependencies(task, is_new=True)
+    
+    def _index_dependencies(self, task: TaskDefinition, is_new: bool):
+        """Count a task's unmet dependencies and, for a new task, record it as
+        their dependent. Callers must hold self.lock."""
+        unmet = 0
+        for dep_id in task.dependencies:
+            if is_new:
+                self._dependents[dep_id].append(task.task_id)
+            dep = self.tasks.get(dep_id)
+            if dep is None or dep.status != TaskStatus.COMPLETED:
+                unmet += 1  # Unknown dependencies count as unmet until they are added and complete
+        task.unmet_dependencies = unmet
+    
+    def _on_completion_change(self, task: TaskDefinition, old_status: Optional[TaskStatus]):
+        """Update the task's dependents if it entered or left COMPLETED. Callers must hold self.lock."""
+        completed = task.status == TaskStatus.COMPLETED
+        if completed != (old_status == TaskStatus.COMPLETED):
+            self._update_dependents(task, -1 if completed else 1)
+    
+    def _update_dependents(self, task: TaskDefinition, delta: int):
+        """Adjust the unmet counts of a task's dependents after it enters (delta=-1) or
+        leaves (delta=1) COMPLETED, queueing any that became ready. Callers must hold self.lock."""
+        ready = []
+        for dependent_id in self._dependents.get(task.task_id, ()):
+            dependent = self.tasks.get(dependent_id)
+            if dependent is None:
+                continue
+            dependent.unmet_dependencies += delta
+            if not dependent.unmet_dependencies:
+                ready.append(dependent)
+        self._route_tasks(ready)
+    
+    def _rebuild_statistics(self):
+        """Recount the running statistics from self.tasks."""
+        # Status/priority keys are pre-populated so these dicts never resize on update,
+        # which lets get_queue_statistics copy them without taking the lock
+        self._status_counts: Dict[TaskStatus, int] = dict.fromkeys(TaskStatus, 0)
+        self._priority_counts: Dict[TaskPriority, int] = dict.fromkeys(TaskPriority, 0)
+        self._type_counts: Counter = Counter()
+        self._exec_time_total = 0
+        self._exec_time_samples = 0
+        # Bumped on every counter change; get_queue_statistics reuses its last result until then
+        self._stats_version = 0
+        self._stats_cache: Optional[Tuple[int, Dict[str, Any]]] = None
+        for task in self.tasks.values():
+            self._count_task(task, 1)
+    
+    def _count_task(self, task: TaskDefinition, sign: int):
+        """Add (sign=1) or remove (sign=-1) a task from the running statistics.
+        
+        Writers hold self.lock; readers only copy the counters.
+        """
+        self._status_counts[task.status] = self._status_counts.get(task.status, 0) + sign
+        self._priority_counts[task.priority] = self._priority_counts.get(task.priority, 0) + sign
+        self._type_counts[task.task_type] += sign
+        if task.status == TaskStatus.COMPLETED and task.actual_duration:
+            self._exec_time_total += sign * task.actual_duration
+            self._exec_time_samples += sign
+        self._stats_version += 1
+    
+    def on_status_change(self, callback: Callable[[TaskDefinition, Optional[TaskStatus]], None]):
+        """Register callback(task, old_status), run under self.lock whenever a task
+        is added (old_status is None) or changes status."""
+        self._status_listeners.append(callback)
+    
+    def on_task_removed(self, callback: Callable[[TaskDefinition], None]):
+        """Register callback(task), run under self.lock whenever a finished task is
+        evicted or cleared from the queue."""
+        self._removal_listeners.append(callback)
+    
+    def _notify_task_removed(self, task: TaskDefinition):
+        """Run the removal listeners for a task. Callers must hold self.lock."""
+        for callback in self._removal_listeners:
+            callback(task)
+    
+    def _notify_status_change(self, task: TaskDefinition, old_status: Optional[TaskStatus]):
+        """Run the status listeners for a task. Callers must hold self.lock."""
+        if old_status == task.status:
+            return
+        for callback in self._status_listeners:
+            callback(task, old_status)
+    
+    def _rebuild_project_index(self):
+        """Rebuild the project_id -> task ids index from self.tasks."""
+        self.project_index: Dict[str, List[str]] = defaultdict(list)
+        for task_id, task in self.tasks.items():
+            self.project_index[task.project_id].append(task_id)
     
-    def _save_queue(self):
-        """Save task queue to storage."""
+    def flush(self):
+        """Write the queue to storage if anything changed since the last write.
+        
+        _snapshot_lock spans the copy and the write, so overlapping flushes (the persistence
+        thread, _submit_tasks, stop_persistence) cannot land an older snapshot last.
+        """
+        with self._snapshot_lock:
+            if not self._dirty.is_set():
+                return
+            try:
+                self._write_snapshot()
+            except OSError:
+                self._dirty.set()  # The changes are still unsaved
+                raise
+    
+    def _write_snapshot(self):
+        """Copy the tasks under the lock, then write them to a temp file and swap it in.
+        
+        Callers must hold _snapshot_lock.
+        """
         with self.lock:
-            data = {
-                task_id: asdict(task) for task_id, task in self.tasks.items()
-            }
-            
-            with open(self.queue_file, 'w', encoding='utf-8') as f:
-                json.dump(data, f, ensure_ascii=False, indent=2, default=str)
+            # Cleared with the copy, so changes made while writing mark the queue dirty again
+            self._dirty.clear()
+            serialized = self._serialized
+            data = {}
+            for task_id, task in self.tasks.items():
+                saved = serialized.get(task_id)
+                if saved is None:
+                    saved = task.to_dict()
+                    if task.status in TERMINAL_STATUSES:
+                        serialized[task_id] = saved
+                data[task_id] = saved
+        
+        tmp_file = self.queue_file.with_suffix(".json.tmp")
+        tmp_file.write_bytes(_dumps_json(data))
+        os.replace(tmp_file, self.queue_file)
     
-    def add_task(
+    def start_persistence(self):
+        """Start the background thread that flushes the queue every QUEUE_SNAPSHOT_INTERVAL seconds."""
+        if self._persistence_thread and self._persistence_thread.is_alive():
+            return
+        
+        self._persistence_stop.clear()
+        self._persistence_thread = threading.Thread(target=self._persistence_loop, daemon=True)
+        self._persistence_thread.start()
+    
+    def stop_persistence(self):
+        """Stop the background flusher and write any remaining changes."""
+        self._persistence_stop.set()
+        if self._persistence_thread and self._persistence_thread.is_alive():
+            self._persistence_thread.join(timeout=5)
+        self._persistence_thread = None
+        self.flush()
+    
+    def _persistence_loop(self):
+        """Flush the queue periodically until stop_persistence is called."""
+        while not self._persistence_stop.wait(QUEUE_SNAPSHOT_INTERVAL):
+            try:
+                self.flush()
+            except OSError as e:
+                # flush() left the queue dirty, so the next interval tries again
+                logger.error("❌ Failed to save task queue: %s", e)
+    
+    def register_worker(self, worker_id: str):
+        """Create the local heap that add_tasks routes new tasks to."""
+        with self.lock:
+            self.worker_queues[worker_id] = []
+            self._worker_locks[worker_id] = threading.Lock()
+    
+    def unregister_worker(self, worker_id: str):
+        """Drop a worker's heap; its tasks stay pending and are found by get_next_task."""
+        with self.lock:
+            self.worker_queues.pop(worker_id, None)
+            self._worker_locks.pop(worker_id, None)
+    
+    def _route_tasks(self, tasks: List[TaskDefinition]):
+        """Push ready pending tasks on the ready heap, spread them round-robin over
+        the worker heaps and wake waiting workers. Callers must hold self.lock."""
+        worker_ids = list(self.worker_queues)
+        
+        routed = 0
+        for task in tasks:
+            if task.status != TaskStatus.PENDING or task.unmet_dependencies:
+                continue  # Blocked tasks are routed by _update_dependents once ready
+            key = self._ready_key(task)
+            heapq.heappush(self._ready_heap, key)
+            if worker_ids:
+                worker_id = worker_ids[self._route_index % len(worker_ids)]
+                with self._worker_locks[worker_id]:
+                    heapq.heappush(self.worker_queues[worker_id], key)
+                self._route_index += 1
+            routed += 1
+        
+        if routed:
+            self._task_available.notify(routed)
+    
+    def create_task(
         self,
         task_type: str,
         project_id: str,
@@ -112,13 +501,12 @@ class TaskQueue:
         dependencies: List[str] = None,
         tags: List[str] = None,
         estimated_duration: int = 60
-    ) -> str:
-        """Add a new task to the queue."""
-        
-        task_id = str(uuid.uuid4())[:12]
+    ) -> TaskDefinition:
+        """Build a pending task without adding it to the queue."""
         
-        task = TaskDefinition(
-            task_id=task_id,
+        now = datetime.now()
+        return TaskDefinition(
+            task_id=uuid.uuid4().hex[:12],
             task_type=task_type,
             project_id=project_id,
             input_file=input_file,
@@ -126,22 +514,69 @@ class TaskQueue:
             config=config,
             priority=priority,
             status=TaskStatus.PENDING,
-            created_at=datetime.now().isoformat(),
+            created_at=now.isoformat(),
             dependencies=dependencies or [],
             tags=tags or [],
-            estimated_duration=estimated_duration
+            estimated_duration=estimated_duration,
+            created_at_epoch=now.timestamp()
         )
+    
+    def add_task(
+        self,
+        task_type: str,
+        project_id: str,
+        input_file: str,
+        output_dir: str,
+        config: Dict[str, Any],
+        priority: TaskPriority = TaskPriority.NORMAL,
+        dependencies: List[str] = None,
+        tags: List[str] = None,
+        estimated_duration: int = 60
+    ) -> str:
+        """Add a new task to the queue."""
+        
+        task = self.create_task(
+            task_type, project_id, input_file, output_dir, config,
+            priority, dependencies, tags, estimated_duration
+        )
+        return self.add_tasks([task])[0]
+    
+    def add_tasks(self, tasks: List[TaskDefinition]) -> List[str]:
+        """Add several tasks with a single lock acquisition."""
+        
+        if not tasks:
+            return []
         
         with self.lock:
-            self.tasks[task_id] = task
-            self._save_queue()
+            for task in tasks:
+                previous = self.tasks.get(task.task_id)
+                self._serialized.pop(task.task_id, None)
+                if previous is None:
+                    self.project_index[task.project_id].append(task.task_id)
+                else:
+                    self._count_task(previous, -1)
+                self.tasks[task.task_id] = task
+                self._count_task(task, 1)
+                self._index_dependencies(task, is_new=previous is None)
+                self._notify_status_change(task, previous.status if previous else None)
+                self._on_completion_change(task, previous.status if previous else None)
+            self._route_tasks(tasks)
+            self._dirty.set()
         
-        return task_id
+        return [task.task_id for task in tasks]
     
     def get_task(self, task_id: str) -> Optional[TaskDefinition]:
         """Get a specific task by ID."""
         return self.tasks.get(task_id)
     
+    def get_tasks_by_ids(self, task_ids: List[str]) -> List[TaskDefinition]:
+        """Get tasks for the given IDs, skipping any that no longer exist."""
+        return [self.tasks[task_id] for task_id in task_ids if task_id in self.tasks]
+    
+    def get_project_task_ids(self, project_id: str) -> List[str]:
+        """Get the IDs of all tasks belonging to a project."""
+        return list(self.project_index.get(project_id, ()))
+    
     def update_task_status(
         self,
         task_id: str,
@@ -149,13 +584,28 @@ class TaskQueue:
         progress: Optional[float] = None,
         error_message: Optional[str] = None
     ):
-        """Update task status and progress."""
+        """Update task status and progress.
+        
+        Returns False for unknown tasks and for cancelled tasks being started.
+        """
         
         with self.lock:
             if task_id not in self.tasks:
                 return False
             
             task = self.tasks[task_id]
+            old_status = task.status
+            if old_status == TaskStatus.CANCELLED and status == TaskStatus.RUNNING:
+                return False  # Cancelled before its worker got to start it
+            self._serialized.pop(task_id, None)
+            if status != TaskStatus.RUNNING:
+                self._progress_marks.pop(task_id, None)
+            if status in FINISHED_STATUSES:
+                self._cancel_flags.pop(task_id, None)
+            # Progress-only updates leave the counters (and the cached statistics) alone
+            recount = status != old_status or status == TaskStatus.COMPLETED
+            if recount:
+                self._count_task(task, -1)
             task.status = status
             
             if progress is not None:
@@ -166,208 +616,445 @@ class TaskQueue:
             
             # Update timestamps
             if status == TaskStatus.RUNNING and not task.started_at:
-                task.started_at = datetime.now().isoformat()
-            elif status in [TaskStatus.COMPLETED, TaskStatus.FAILED, TaskStatus.CANCELLED]:
+                now = datetime.now()
+                task.started_at = now.isoformat()
+                task.started_at_epoch = now.timestamp()
+            elif status in FINISHED_STATUSES:
                 if not task.completed_at:
-                    task.completed_at = datetime.now().isoformat()
+                    now = datetime.now()
+                    task.completed_at = now.isoformat()
+                    task.completed_at_epoch = now.timestamp()
                 
                 # Calculate actual duration
-                if task.started_at:
-                    start_time = datetime.fromisoformat(task.started_at)
-                    end_time = datetime.fromisoformat(task.completed_at)
-                    duration = (end_time - start_time).total_seconds() / 60
+                if task.started_at_epoch is not None:
+                    duration = (task.completed_at_epoch - task.started_at_epoch) / 60
                     task.actual_duration = int(duration)
             
-            self._save_queue()
+            if recount:
+                self._count_task(task, 1)
+            self._notify_status_change(task, old_status)
+            self._on_completion_change(task, old_status)
+            if status in TERMINAL_STATUSES and old_status not in TERMINAL_STATUSES:
+                self._record_finished(task)
+            elif old_status in TERMINAL_STATUSES and status not in TERMINAL_STATUSES:
+                self._forget_finished(task_id)
+            self._dirty.set()
             return True
     
-    def get_next_task(self, worker_capabilities: List[str] = None) -> Optional[TaskDefinition]:
-        """Get the next task to execute based on priority and dependencies."""
+    def get_cancel_event(self, task_id: str) -> threading.Event:
+        """Get the event that is set once the task is cancelled.
+        
+        Handlers poll it (or wait on it instead of sleeping) between steps and return
+        early when it is set. Unknown and already-cancelled tasks get a set event.
+        """
         
         with self.lock:
-            # Filter available tasks
-            available_tasks = []
-            
-            for task in self.tasks.values():
-                # Skip if not pending/queued
-                if task.status not in [TaskStatus.PENDING, TaskStatus.QUEUED]:
-                    continue
-                
-                # Check worker capabilities
-                if worker_capabilities and task.task_type not in worker_capabilities:
-                    continue
-                
-                # Check dependencies
-                if task.dependencies:
-                    deps_met = all(
-                        self.tasks.get(dep_id, TaskDefinition("", "", "", "", "", {}, TaskPriority.NORMAL, TaskStatus.FAILED, "")).status == TaskStatus.COMPLETED
-                        for dep_id in task.dependencies
-                    )
-                    if not deps_met:
-                        continue
-                
-                available_tasks.append(task)
-            
-            if not available_tasks:
-                return None
-            
-            # Sort by priority (highest first), then by creation time (oldest first)
-            available_tasks.sort(
-                key=lambda t: (-t.priority.value, t.created_at)
-            )
+            flag = self._cancel_flags.get(task_id)
+            if flag is None:
+                flag = threading.Event()
+                task = self.tasks.get(task_id)
+                if task is None or task.status == TaskStatus.CANCELLED:
+                    flag.set()
+                elif task.status not in FINISHED_STATUSES:
+                    self._cancel_flags[task_id] = flag
+            return flag
+    
+    def update_progress(
+        self, task_id: str, progress: float, min_delta: float = 1.0, min_interval: float = 0.5
+    ) -> bool:
+        """Set a running task's progress without notifying listeners.
+        
+        Returns False unless the task is running, so a late update from a cancelled or
+        timed-out handler cannot overwrite a finished task. The queue is only marked for
+        saving when progress moved by min_delta or min_interval seconds passed since the
+        last marked update; the latest value is still written with the next snapshot either way.
+        """
+        
+        with self.lock:
+            task = self.tasks.get(task_id)
+            if task is None or task.status != TaskStatus.RUNNING:
+                return False
             
-            # Mark task as queued and return
-            next_task = available_tasks[0]
-            next_task.status = TaskStatus.QUEUED
-            self._save_queue()
+            progress = min(100.0, max(0.0, progress))
+            task.progress_percentage = progress
+            self._serialized.pop(task_id, None)
             
+            now = time.monotonic()
+            mark = self._progress_marks.get(task_id)
+            if mark is None or abs(progress - mark[0]) >= min_delta or now - mark[1] >= min_interval:
+                self._progress_marks[task_id] = (progress, now)
+                self._dirty.set()
+            return True
+    
+    def wake_workers(self):
+        """Wake every worker waiting in get_next_task, e.g. so they notice a stop."""
+        with self.lock:
+            self._task_available.notify_all()
+    
+    def get_next_task(
+        self,
+        worker_capabilities: Optional[Collection[str]] = None,
+        timeout: Optional[float] = None,
+        stop_event: Optional[threading.Event] = None
+    ) -> Optional[TaskDefinition]:
+        """Get the next task to execute based on priority and dependencies.
+        
+        Pops the ready heap, so workers call it only after pop_local and steal
+        come back empty. With a timeout, waits up to that long for a new task
+        when none is ready, then tries once more. A set stop_event skips the wait;
+        it is checked under the lock, so a wake_workers call made after setting
+        it cannot be missed.
+        """
+        
+        with self.lock:
+            next_task = self._pop_ready_task(worker_capabilities)
+            if next_task is None and timeout and not (stop_event and stop_event.is_set()):
+                self._task_available.wait(timeout)
+                next_task = self._pop_ready_task(worker_capabilities)
             return next_task
     
+    def _pop_ready_task(self, worker_capabilities: Optional[Collection[str]]) -> Optional[TaskDefinition]:
+        """Claim the best ready task this worker can run. Callers must hold self.lock."""
+        next_task = None
+        skipped = []  # Pending tasks this worker cannot run yet
+        
+        while self._ready_heap:
+            entry = heapq.heappop(self._ready_heap)
+            task = self.tasks.get(entry[2])
+            if task is None or task.status != TaskStatus.PENDING:
+                continue  # Stale entry; the task was claimed, cancelled or removed
+            
+            if self._is_claimable(task, worker_capabilities):
+                next_task = task
+                break
+            skipped.append(entry)
+        
+        for entry in skipped:
+            heapq.heappush(self._ready_heap, entry)
+        
+        if next_task:
+            self._claim_task(next_task)
+        return next_task
+    
+    def pop_local(self, worker_id: str, worker_capabilities: Optional[Collection[str]] = None) -> Optional[TaskDefinition]:
+        """Claim the most urgent runnable task from the worker's own heap.
+        
+        Tasks of one priority run oldest first. When the shared ready heap holds a
+        higher-priority task, e.g. one routed to a busy worker, that task is claimed
+        instead and the local one stays queued here.
+        """
+        
+        local, local_lock = self.worker_queues.get(worker_id), self._worker_locks.get(worker_id)
+        if local is None or local_lock is None:
+            return None
+        
+        while True:
+            with local_lock:
+                if not local:
+                    return None
+                key = heapq.heappop(local)
+            with self.lock:
+                task = self._claim_routed(key, worker_capabilities)
+            if task is not None:
+                if task.task_id != key[2]:
+                    with local_lock:
+                        heapq.heappush(local, key)
+                return task
+    
+    def steal(self, worker_id: str, worker_capabilities: Optional[Collection[str]] = None) -> Optional[TaskDefinition]:
+        """Move a batch of tasks from another worker's heap, starting at a random
+        victim, and claim one of them from the local heap."""
+        
+        victims = [wid for wid in list(self.worker_queues) if wid != worker_id]
+        if not victims:
+            return None
+        
+        # Start at a random victim so idle thieves spread out instead of all hitting the first one
+        offset = _thread_random().randrange(len(victims))
+        for victim_id in victims[offset:] + victims[:offset]:
+            if self.steal_batch(worker_id, victim_id):
+                task = self.pop_local(worker_id, worker_capabilities)
+                if task:
+                    return task
+        return None
+    
+    def steal_batch(self, worker_id: str, victim_id: str, max_n: int = STEAL_BATCH_MAX) -> int:
+        """Move the most urgent half of a victim's heap, at most max_n tasks, to the worker's heap.
+        
+        Returns the number of tasks moved.
+        """
+        
+        local, local_lock = self.worker_queues.get(worker_id), self._worker_locks.get(worker_id)
+        victim, victim_lock = self.worker_queues.get(victim_id), self._worker_locks.get(victim_id)
+        if local is None or local_lock is None or not victim or victim_lock is None:
+            return 0
+        
+        batch = []
+        with victim_lock:
+            for _ in range(min(max(len(victim) // 2, 1), max_n)):
+                if not victim:
+                    break  # The owner took the rest
+                batch.append(heapq.heappop(victim))
+        with local_lock:
+            for key in batch:
+                heapq.heappush(local, key)
+        return len(batch)
+    
+    def _peek_ready_key(self) -> Optional[Tuple[int, str, str]]:
+        """Key of the best pending task on the ready heap, dropping stale entries
+        from the top. Callers must hold self.lock."""
+        heap = self._ready_heap
+        while heap:
+            task = self.tasks.get(heap[0][2])
+            if task is not None and task.status == TaskStatus.PENDING:
+                return heap[0]
+            heapq.heappop(heap)
+        return None
+    
+    def _claim_routed(self, key: Tuple[int, str, str], worker_capabilities: Optional[Collection[str]]) -> Optional[TaskDefinition]:
+        """Claim the task a worker heap key points to, or a higher-priority one from
+        the ready heap. Callers must hold self.lock."""
+        task = self.tasks.get(key[2])
+        if task is None or task.status != TaskStatus.PENDING:
+            return None  # Stale key; the task was claimed, cancelled or removed
+        
+        best = self._peek_ready_key()
+        if best is not None and best[0] < key[0]:
+            urgent = self._pop_ready_task(worker_capabilities)
+            if urgent is not None:
+                return urgent
+        
+        if self._is_claimable(task, worker_capabilities):
+            self._claim_task(task)
+            return task
+        # Another worker has to run it; wake a waiting one now rather than at its timeout
+        self._task_available.notify()
+        return None
+    
+    def _is_claimable(self, task: TaskDefinition, worker_capabilities: Optional[Collection[str]]) -> bool:
+        """Whether a worker may take the task. Callers must hold self.lock."""
+        if task.status != TaskStatus.PENDING:
+            return False
+        if worker_capabilities and task.task_type not in worker_capabilities:
+            return False
+        return not task.unmet_dependencies
+    
+    def _claim_task(self, task: TaskDefinition):
+        """Mark a pending task as queued for one worker. Callers must hold self.lock."""
+        self._count_task(task, -1)
+        task.status = TaskStatus.QUEUED
+        self._count_task(task, 1)
+        self._notify_status_change(task, TaskStatus.PENDING)
+        self._dirty.set()
+    
     def cancel_task(self, task_id: str) -> bool:
         """Cancel a task."""
+        return self.cancel_tasks([task_id]) == 1
+    
+    def cancel_tasks(self, task_ids: List[str]) -> int:
+        """Cancel several tasks with a single lock acquisition.
+        
+        Returns the number of tasks cancelled; unknown and finished tasks are skipped.
+        """
         
+        cancelled = 0
         with self.lock:
-            if task_id not in self.tasks:
-                return False
-            
-            task = self.tasks[task_id]
-            
-            if task.status in [TaskStatus.COMPLETED, TaskStatus.FAILED, TaskStatus.CANCELLED]:
-                return False  # Cannot cancel finished tasks
-            
-            # Stop running task if needed
-            if task_id in self._running_tasks:
-                # Note: In a real implementation, you'd need to implement task interruption
-                pass
+            now = datetime.now()
+            completed_at, completed_at_epoch = now.isoformat(), now.timestamp()
             
-            task.status = TaskStatus.CANCELLED
-            task.completed_at = datetime.now().isoformat()
-            self._save_queue()
+            for task_id in task_ids:
+                task = self.tasks.get(task_id)
+                if task is None or task.status in FINISHED_STATUSES:
+                    continue  # Cannot cancel finished tasks
+                
+                # Ask a running handler to stop at its next step
+                flag = self._cancel_flags.pop(task_id, None)
+                if flag is not None:
+                    flag.set()
+                self._progress_marks.pop(task_id, None)
+                
+                old_status = task.status
+                self._count_task(task, -1)
+                task.status = TaskStatus.CANCELLED
+                task.completed_at = completed_at
+                task.completed_at_epoch = completed_at_epoch
+                self._count_task(task, 1)
+                self._notify_status_change(task, old_status)
+                self._record_finished(task)
+                cancelled += 1
             
-            return True
+            if cancelled:
+                self._dirty.set()
+        
+        return cancelled
     
     def retry_task(self, task_id: str) -> bool:
         """Retry a failed task."""
+        return self.retry_tasks([task_id]) == 1
+    
+    def retry_tasks(self, task_ids: List[str]) -> int:
+        """Retry several failed tasks with a single lock acquisition.
+        
+        Returns the number of tasks reset; tasks that are not failed or are out of
+        retries are skipped.
+        """
         
+        retried = []
         with self.lock:
-            if task_id not in self.tasks:
-                return False
-            
-            task = self.tasks[task_id]
-            
-            if task.status != TaskStatus.FAILED:
-                return False
-            
-            if task.retry_count >= task.max_retries:
-                return False
-            
-            # Reset task for retry
-            task.status = TaskStatus.PENDING
-            task.retry_count += 1
-            task.started_at = None
-            task.completed_at = None
-            task.error_message = None
-            task.progress_percentage = 0.0
+            for task_id in task_ids:
+                task = self.tasks.get(task_id)
+                if task is None or task.status != TaskStatus.FAILED:
+                    continue
+                
+                if task.retry_count >= task.max_retries:
+                    continue
+                
+                # Reset task for retry
+                self._count_task(task, -1)
+                task.status = TaskStatus.PENDING
+                task.retry_count += 1
+                task.started_at = None
+                task.completed_at = None
+                task.started_at_epoch = None
+                task.completed_at_epoch = None
+                task.error_message = None
+                task.progress_percentage = 0.0
+                self._count_task(task, 1)
+                self._notify_status_change(task, TaskStatus.FAILED)
+                retried.append(task)
             
-            self._save_queue()
-            return True
+            if retried:
+                self._route_tasks(retried)
+                self._dirty.set()
+        
+        return len(retried)
     
     def list_tasks(
         self,
         status_filter: Optional[TaskStatus] = None,
         project_filter: Optional[str] = None,
         type_filter: Optional[str] = None,
-        tag_filter: Optional[str] = None
+        tag_filter: Optional[str] = None,
+        limit: Optional[int] = None
     ) -> List[TaskDefinition]:
-        """List tasks with optional filters."""
+        """List tasks with optional filters, newest first, keeping at most `limit` tasks."""
         
-        tasks = list(self.tasks.values())
+        # Project filtering goes through the index so it only touches that project's tasks
+        if project_filter:
+            tasks = self.get_tasks_by_ids(self.project_index.get(project_filter, ()))
+        else:
+            tasks = list(self.tasks.values())
         
         # Apply filters
         if status_filter:
             tasks = [t for t in tasks if t.status == status_filter]
         
-        if project_filter:
-            tasks = [t for t in tasks if t.project_id == project_filter]
-        
         if type_filter:
             tasks = [t for t in tasks if t.task_type == type_filter]
         
         if tag_filter:
             tasks = [t for t in tasks if tag_filter in t.tags]
         
-        # Sort by creation time (newest first)
+        # Sort by creation time (newest first); a bounded top-k avoids a full sort
+        if limit is not None:
+            return heapq.nlargest(limit, tasks, key=lambda t: t.created_at)
+        
         tasks.sort(key=lambda t: t.created_at, reverse=True)
         
         return tasks
     
     def get_queue_statistics(self) -> Dict[str, Any]:
-        """Get queue statistics."""
+        """Get queue statistics from the running counters, without taking the lock.
+        
+        The result is cached until the counters change, so callers must not modify it.
+        """
         
+        cached = self._stats_cache
+        version = self._stats_version
+        if cached is not None and cached[0] == version:
+            return cached[1]
+        
+        status_counts = self._status_counts.copy()
+        priority_counts = self._priority_counts.copy()
+        type_counts = self._type_counts.copy()
+        exec_time_total, exec_time_samples = self._exec_time_total, self._exec_time_samples
+        
+        # Counters return 0 for missing keys, so callers can index any status directly
         stats = {
-            "total_tasks": len(self.tasks),
-            "by_status": {},
-            "by_type": {},
-            "by_priority": {},
+            "total_tasks": sum(status_counts.values()),
+            "by_status": Counter({status.value: n for status, n in status_counts.items() if n}),
+            "by_type": Counter({task_type: n for task_type, n in type_counts.items() if n}),
+            "by_priority": Counter({priority.value: n for priority, n in priority_counts.items() if n}),
             "avg_wait_time": 0,
             "avg_execution_time": 0,
             "success_rate": 0
         }
         
-        # Count by status
-        for task in self.tasks.values():
-            status = task.status.value
-            stats["by_status"][status] = stats["by_status"].get(status, 0) + 1
-        
-        # Count by type
-        for task in self.tasks.values():
-            task_type = task.task_type
-            stats["by_type"][task_type] = stats["by_type"].get(task_type, 0) + 1
-        
-        # Count by priority
-        for task in self.tasks.values():
-            priority = task.priority.value
-            stats["by_priority"][priority] = stats["by_priority"].get(priority, 0) + 1
-        
-        # Calculate averages and success rate
-        completed_tasks = [t for t in self.tasks.values() if t.status == TaskStatus.COMPLETED]
-        failed_tasks = [t for t in self.tasks.values() if t.status == TaskStatus.FAILED]
-        
-        if completed_tasks:
-            # Average execution time
-            exec_times = [t.actual_duration for t in completed_tasks if t.actual_duration]
-            if exec_times:
-                stats["avg_execution_time"] = sum(exec_times) / len(exec_times)
+        # Average execution time of completed tasks
+        if exec_time_samples:
+            stats["avg_execution_time"] = exec_time_total / exec_time_samples
         
         # Success rate
-        finished_tasks = completed_tasks + failed_tasks
-        if finished_tasks:
-            stats["success_rate"] = len(completed_tasks) / len(finished_tasks) * 100
+        completed = status_counts.get(TaskStatus.COMPLETED, 0)
+        finished = completed + status_counts.get(TaskStatus.FAILED, 0)
+        if finished:
+            stats["success_rate"] = completed / finished * 100
         
+        # A writer racing this read bumps the version again, so a stale result is not reused
+        self._stats_cache = (version, stats)
         return stats
     
     def clear_completed_tasks(self, older_than_days: int = 7):
         """Clear completed tasks older than specified days."""
         
-        cutoff_date = datetime.now() - timedelta(days=older_than_days)
+        return len(self.pop_completed_tasks(older_than_days))
+    
+    def pop_completed_tasks(self, older_than_days: int = 7) -> List[TaskDefinition]:
+        """Remove completed tasks older than specified days and return them."""
+        
+        cutoff_epoch = time.time() - older_than_days * 86400
         
         with self.lock:
-            tasks_to_remove = []
+            # The finished ring is in completion order, so only its expired front is visited
+            ring = self._finished_ring
+            kept = []  # Tasks without a completion time, or still needed by dependents, stay in the ring
+            removed = []
+            removed_ids = set()
+            touched_projects = set()
             
-            for task_id, task in self.tasks.items():
-                if task.status in [TaskStatus.COMPLETED, TaskStatus.CANCELLED]:
-                    if task.completed_at:
-                        completion_date = datetime.fromisoformat(task.completed_at)
-                        if completion_date < cutoff_date:
-                            tasks_to_remove.append(task_id)
-            
-            for task_id in tasks_to_remove:
+            while ring:
+                task = self.tasks.get(ring[0])
+                if task is not None and task.completed_at_epoch is not None and task.completed_at_epoch >= cutoff_epoch:
+                    break
+                
+                task_id = ring.popleft()
+                if task is None or task.status not in TERMINAL_STATUSES:
+                    continue  # Already removed, or retried since it finished
+                if task.completed_at_epoch is None or self._has_live_dependents(task_id):
+                    kept.append(task_id)
+                    continue
+                
                 del self.tasks[task_id]
+                self._serialized.pop(task_id, None)
+                self._count_task(task, -1)
+                # Dependents keep counting a removed completed task as met
+                self._dependents.pop(task_id, None)
+                self._notify_task_removed(task)
+                removed.append(task)
+                removed_ids.add(task_id)
+                touched_projects.add(task.project_id)
+            
+            ring.extendleft(reversed(kept))
             
-            if tasks_to_remove:
-                self._save_queue()
+            if removed_ids:
+                # Rewrite only the project lists that lost tasks
+                for project_id in touched_projects:
+                    self.project_index[project_id] = [
+                        task_id for task_id in self.project_index[project_id] if task_id not in removed_ids
+                    ]
+                self._dirty.set()
             
-            return len(tasks_to_remove)
+            return removed
     
     def estimate_queue_time(self, task_id: str) -> int:
         """Estimate how long until a task will start execution (in minutes)."""
@@ -379,20 +1066,20 @@ class TaskQueue:
         # Get tasks ahead in queue
         ahead_tasks = []
         for t in self.tasks.values():
-            if (t.status in [TaskStatus.PENDING, TaskStatus.QUEUED, TaskStatus.RUNNING] and
+            if (t.status in ACTIVE_STATUSES and
                 (t.priority.value > task.priority.value or 
                  (t.priority.value == task.priority.value and t.created_at < task.created_at))):
                 ahead_tasks.append(t)
         
         # Estimate total time for tasks ahead
         total_time = 0
+        now_epoch = time.time()
         for ahead_task in ahead_tasks:
             if ahead_task.status == TaskStatus.RUNNING:
                 # Use remaining time for running tasks
                 elapsed = 0
-                if ahead_task.started_at:
-                    start_time = datetime.fromisoformat(ahead_task.started_at)
-                    elapsed = (datetime.now() - start_time).total_seconds() / 60
+                if ahead_task.started_at_epoch is not None:
+                    elapsed = (now_epoch - ahead_task.started_at_epoch) / 60
                 
                 remaining = max(0, ahead_task.estimated_duration - elapsed)
                 total_time += remaining
@@ -5,15 +5,34 @@ Provides advanced consistency checking and cross-validation for emotion analysis
 """
 
 import json
-import statistics
+from bisect import bisect_left
+from collections import Counter
 from typing import List, Dict, Any, Optional, Tuple
 from dataclasses import dataclass
 from datetime import datetime
 
-from .emotion_detector import EmotionDetector, EmotionAnalysisResult, EmotionLabel
+import numpy as np
+
+from .emotion_detector import EmotionDetector, EmotionAnalysisResult, EmotionLabel, EMOTION_CODES
 from .emotion_analyzer import ProjectEmotionAnalysis, SegmentEmotionData
 
-@dataclass
+# Overall-score penalty per issue severity, scaled by the issue's confidence
+_SEVERITY_PENALTIES = {
+    "critical": 0.3,
+    "high": 0.2,
+    "medium": 0.1,
+    "low": 0.05
+}
+
+def _build_conflict_matrix(pairs) -> np.ndarray:
+    """Build a read-only boolean matrix, indexed by emotion codes, marking conflicting pairs."""
+    matrix = np.zeros((len(EMOTION_CODES), len(EMOTION_CODES)), dtype=bool)
+    for first, second in pairs:
+        matrix[EMOTION_CODES[first], EMOTION_CODES[second]] = True
+    matrix.flags.writeable = False
+    return matrix
+
+@dataclass(slots=True)
 class ConsistencyIssue:
     """Represents a consistency issue."""
     issue_type: str
@@ -24,6 +43,22 @@ class ConsistencyIssue:
     suggested_fix: str
 
 @dataclass
+class _SegmentArrays:
+    """Per-segment values of a project, extracted once per report into NumPy arrays."""
+    segment_ids: List[str]
+    emotion_match_score: np.ndarray
+    issue_count: np.ndarray
+    keyword_preservation: np.ndarray  # NaN where the original has no emotional keywords
+    original_confidence: np.ndarray
+    translated_confidence: np.ndarray
+    original_intensity: np.ndarray
+    translated_intensity: np.ndarray
+    original_emotion: np.ndarray
+    translated_emotion: np.ndarray
+    original_sentiment: np.ndarray
+    translated_sentiment: np.ndarray
+
+@dataclass(slots=True)
 class ConsistencyReport:
     """Complete consistency analysis report."""
     project_id: str
@@ -38,6 +73,21 @@ class ConsistencyReport:
 class ConsistencyChecker:
     """Advanced emotion consistency checker."""
     
+    # Conflicting emotion pairs, stored in both orders for a single hash lookup
+    _CONFLICT_PAIRS = frozenset(
+        pair
+        for first, second in [
+            (EmotionLabel.HAPPY, EmotionLabel.SAD),
+            (EmotionLabel.HAPPY, EmotionLabel.ANGRY),
+            (EmotionLabel.CALM, EmotionLabel.ANXIOUS),
+            (EmotionLabel.EXCITED, EmotionLabel.CALM),
+            (EmotionLabel.LOVING, EmotionLabel.ANGRY),
+            (EmotionLabel.LOVING, EmotionLabel.DISGUSTED)
+        ]
+        for pair in ((first, second), (second, first))
+    )
+    _CONFLICT_MATRIX = _build_conflict_matrix(_CONFLICT_PAIRS)
+    
     def __init__(self):
         self.detector = EmotionDetector()
         
@@ -57,39 +107,54 @@ class ConsistencyChecker:
             "medium": {"min_score": 0.5, "max_score": 0.7},
             "low": {"min_score": 0.7, "max_score": 1.0}
         }
+        # Upper bounds of the (ascending, contiguous) severity ranges for bisection
+        self._severity_labels = tuple(self.severity_mapping)
+        self._severity_bounds = [info["max_score"] for info in self.severity_mapping.values()]
+        self._severity_floor = self.severity_mapping[self._severity_labels[0]]["min_score"]
     
     def check_project_consistency(self, analysis: ProjectEmotionAnalysis) -> ConsistencyReport:
         """Perform comprehensive consistency checking on a project."""
         
-        # Run various consistency checks
-        emotion_issues = self._check_emotion_consistency(analysis.segments)
-        sentiment_issues = self._check_sentiment_consistency(analysis.segments)
-        confidence_issues = self._check_confidence_consistency(analysis.segments)
-        keyword_issues = self._check_keyword_preservation(analysis.segments)
-        context_issues = self._check_context_consistency(analysis.segments)
-        pattern_issues = self._check_pattern_consistency(analysis.segments)
-        
-        # Combine all issues
-        all_issues = (emotion_issues + sentiment_issues + confidence_issues + 
-                     keyword_issues + context_issues + pattern_issues)
-        
-        # Calculate segment-level consistency scores
-        segment_scores = self._calculate_segment_scores(analysis.segments)
-        
-        # Calculate overall consistency score
-        overall_score = self._calculate_overall_score(segment_scores, all_issues)
-        
-        # Generate recommendations
-        recommendations = self._generate_consistency_recommendations(all_issues, overall_score)
-        
-        # Calculate quality metrics
-        quality_metrics = self._calculate_quality_metrics(analysis.segments, all_issues)
+        if not analysis.segments:
+            # Nothing to check; the report matches what the full pipeline yields for no segments
+            all_issues: List[ConsistencyIssue] = []
+            segment_scores: Dict[str, float] = {}
+            overall_score = 0.0
+            recommendations = self._generate_consistency_recommendations(all_issues, overall_score)
+            quality_metrics: Dict[str, float] = {}
+        else:
+            arrays = self._build_segment_arrays(analysis.segments)
+            
+            # Run various consistency checks
+            emotion_issues = self._check_emotion_consistency(analysis.segments, arrays)
+            sentiment_issues = self._check_sentiment_consistency(arrays)
+            confidence_issues = self._check_confidence_consistency(arrays)
+            keyword_issues = self._check_keyword_preservation(arrays)
+            context_issues = self._check_context_consistency(analysis.segments)
+            pattern_issues = self._check_pattern_consistency(arrays)
+            
+            # Combine all issues
+            all_issues = (emotion_issues + sentiment_issues + confidence_issues + 
+                         keyword_issues + context_issues + pattern_issues)
+            
+            # Calculate segment-level consistency scores
+            segment_scores = self._calculate_segment_scores(arrays)
+            
+            # Calculate overall consistency score
+            overall_score = self._calculate_overall_score(segment_scores, all_issues)
+            
+            # Generate recommendations
+            recommendations = self._generate_consistency_recommendations(all_issues, overall_score)
+            
+            # Calculate quality metrics
+            quality_metrics = self._calculate_quality_metrics(all_issues, arrays)
         
         # Create report
+        now = datetime.now()
         report = ConsistencyReport(
             project_id=analysis.project_id,
-            report_id=f"consistency_{analysis.project_id}_{int(datetime.now().timestamp())}",
-            generated_at=datetime.now().isoformat(),
+            report_id=f"consistency_{analysis.project_id}_{int(now.timestamp())}",
+            generated_at=now.isoformat(),
             overall_score=overall_score,
             issues=all_issues,
             segment_scores=segment_scores,
@@ -99,116 +164,149 @@ class ConsistencyChecker:
         
         return report
     
-    def _check_emotion_consistency(self, segments: List[SegmentEmotionData]) -> List[ConsistencyIssue]:
+    def _build_segment_arrays(self, segments: List[SegmentEmotionData]) -> _SegmentArrays:
+        """Extract everything the checks need from the segments in a single pass.
+        
+        The checks and metrics then work on these arrays instead of walking the
+        segments and their nested emotion results again.
+        """
+        segment_ids, emotion_match_score, issue_count, keyword_preservation = [], [], [], []
+        original_confidence, translated_confidence = [], []
+        original_intensity, translated_intensity = [], []
+        original_emotion, translated_emotion = [], []
+        original_sentiment, translated_sentiment = [], []
+        sentiment_codes: Dict[str, int] = {}
+        
+        for segment in segments:
+            original, translated = segment.original_emotion, segment.translated_emotion
+            segment_ids.append(segment.segment_id)
+            emotion_match_score.append(segment.emotion_match_score)
+            issue_count.append(len(segment.consistency_issues))
+            
+            # Share of the original keywords that survive translation; new keywords in
+            # the translation don't make up for lost ones
+            original_keywords = frozenset(original.emotional_keywords)
+            keyword_preservation.append(
+                len(original_keywords.intersection(translated.emotional_keywords)) / len(original_keywords)
+                if original_keywords else np.nan
+            )
+            
+            original_confidence.append(original.primary_emotion.confidence)
+            translated_confidence.append(translated.primary_emotion.confidence)
+            original_intensity.append(original.primary_emotion.intensity)
+            translated_intensity.append(translated.primary_emotion.intensity)
+            original_emotion.append(EMOTION_CODES[original.primary_emotion.emotion])
+            translated_emotion.append(EMOTION_CODES[translated.primary_emotion.emotion])
+            original_sentiment.append(sentiment_codes.setdefault(original.overall_sentiment, len(sentiment_codes)))
+            translated_sentiment.append(sentiment_codes.setdefault(translated.overall_sentiment, len(sentiment_codes)))
+        
+        # float64 keeps the variance as accurate as statistics.variance
+        return _SegmentArrays(
+            segment_ids=segment_ids,
+            emotion_match_score=np.array(emotion_match_score, dtype=np.float64),
+            issue_count=np.array(issue_count, dtype=np.int32),
+            keyword_preservation=np.array(keyword_preservation, dtype=np.float64),
+            original_confidence=np.array(original_confidence, dtype=np.float64),
+            translated_confidence=np.array(translated_confidence, dtype=np.float64),
+            original_intensity=np.array(original_intensity, dtype=np.float64),
+            translated_intensity=np.array(translated_intensity, dtype=np.float64),
+            original_emotion=np.array(original_emotion, dtype=np.int8),
+            translated_emotion=np.array(translated_emotion, dtype=np.int8),
+            original_sentiment=np.array(original_sentiment, dtype=np.int32),
+            translated_sentiment=np.array(translated_sentiment, dtype=np.int32)
+        )
+    
+    def _check_emotion_consistency(self, segments: List[SegmentEmotionData], arrays: _SegmentArrays) -> List[ConsistencyIssue]:
         """Check for emotion consistency issues."""
         issues = []
         
-        for segment in segments:
+        # Check for emotion category mismatches
+        conflicting = self._CONFLICT_MATRIX[arrays.original_emotion, arrays.translated_emotion]
+        for i in np.flatnonzero(conflicting):
+            segment = segments[i]
             original_emotion = segment.original_emotion.primary_emotion.emotion
             translated_emotion = segment.translated_emotion.primary_emotion.emotion
             
-            # Check for emotion category mismatches
-            if self._are_conflicting_emotions(original_emotion, translated_emotion):
-                confidence = 1.0 - segment.emotion_match_score
-                
-                issues.append(ConsistencyIssue(
-                    issue_type="conflicting_emotions",
-                    severity=self._determine_severity(confidence),
-                    description=f"Conflicting emotions: {original_emotion.value} → {translated_emotion.value}",
-                    segment_ids=[segment.segment_id],
-                    confidence=confidence,
-                    suggested_fix=f"Revise translation to maintain {original_emotion.value} emotion"
-                ))
+            confidence = 1.0 - segment.emotion_match_score
+            
+            issues.append(ConsistencyIssue(
+                issue_type="conflicting_emotions",
+                severity=self._determine_severity(confidence),
+                description=f"Conflicting emotions: {original_emotion.value} → {translated_emotion.value}",
+                segment_ids=[segment.segment_id],
+                confidence=confidence,
+                suggested_fix=f"Revise translation to maintain {original_emotion.value} emotion"
+            ))
         
         # Check for emotion pattern breaks
-        emotion_sequence_issues = self._check_emotion_sequence_consistency(segments)
+        emotion_sequence_issues = self._check_emotion_sequence_consistency(arrays)
         issues.extend(emotion_sequence_issues)
         
         return issues
     
-    def _check_sentiment_consistency(self, segments: List[SegmentEmotionData]) -> List[ConsistencyIssue]:
+    def _check_sentiment_consistency(self, arrays: _SegmentArrays) -> List[ConsistencyIssue]:
         """Check for sentiment consistency issues."""
         issues = []
         
-        sentiment_conflicts = []
-        
-        for segment in segments:
-            original_sentiment = segment.original_emotion.overall_sentiment
-            translated_sentiment = segment.translated_emotion.overall_sentiment
-            
-            if original_sentiment != translated_sentiment:
-                sentiment_conflicts.append(segment)
+        total_segments = len(arrays.segment_ids)
+        sentiment_conflicts = np.flatnonzero(arrays.original_sentiment != arrays.translated_sentiment)
         
         # If too many sentiment conflicts, create an issue
-        if len(sentiment_conflicts) > len(segments) * 0.2:  # More than 20% conflicts
-            confidence = len(sentiment_conflicts) / len(segments)
+        if len(sentiment_conflicts) > total_segments * 0.2:  # More than 20% conflicts
+            confidence = len(sentiment_conflicts) / total_segments
             
             issues.append(ConsistencyIssue(
                 issue_type="widespread_sentiment_conflicts",
                 severity=self._determine_severity(confidence),
                 description=f"Sentiment conflicts in {len(sentiment_conflicts)} segments",
-                segment_ids=[seg.segment_id for seg in sentiment_conflicts],
+                segment_ids=[arrays.segment_ids[i] for i in sentiment_conflicts],
                 confidence=confidence,
                 suggested_fix="Review translation approach to preserve sentiment polarity"
             ))
         
         return issues
     
-    def _check_confidence_consistency(self, segments: List[SegmentEmotionData]) -> List[ConsistencyIssue]:
+    def _check_confidence_consistency(self, arrays: _SegmentArrays) -> List[ConsistencyIssue]:
         """Check for confidence consistency issues."""
         issues = []
         
-        # Collect confidence scores
-        original_confidences = [seg.original_emotion.primary_emotion.confidence for seg in segments]
-        translated_confidences = [seg.translated_emotion.primary_emotion.confidence for seg in segments]
+        translated_confidences = arrays.translated_confidence
         
         # Check for large variance in confidence
         if len(translated_confidences) > 1:
-            confidence_variance = statistics.variance(translated_confidences)
+            confidence_variance = float(translated_confidences.var(ddof=1))
             
             if confidence_variance > self.thresholds["confidence_variance"]:
-                low_confidence_segments = [
-                    seg for seg in segments 
-                    if seg.translated_emotion.primary_emotion.confidence < 0.4
-                ]
+                low_confidence_indices = np.flatnonzero(translated_confidences < 0.4)
                 
-                if low_confidence_segments:
+                if low_confidence_indices.size:
                     issues.append(ConsistencyIssue(
                         issue_type="inconsistent_confidence",
                         severity=self._determine_severity(confidence_variance),
                         description=f"High variance in emotion detection confidence (σ²={confidence_variance:.3f})",
-                        segment_ids=[seg.segment_id for seg in low_confidence_segments],
+                        segment_ids=[arrays.segment_ids[i] for i in low_confidence_indices],
                         confidence=confidence_variance,
                         suggested_fix="Review low-confidence segments for ambiguous emotional content"
                     ))
         
         return issues
     
-    def _check_keyword_preservation(self, segments: List[SegmentEmotionData]) -> List[ConsistencyIssue]:
+    def _check_keyword_preservation(self, arrays: _SegmentArrays) -> List[ConsistencyIssue]:
         """Check for emotional keyword preservation issues."""
         issues = []
         
-        segments_with_keyword_loss = []
-        
-        for segment in segments:
-            original_keywords = set(segment.original_emotion.emotional_keywords)
-            translated_keywords = set(segment.translated_emotion.emotional_keywords)
-            
-            if original_keywords:
-                preservation_rate = len(translated_keywords) / len(original_keywords)
-                
-                if preservation_rate < self.thresholds["keyword_preservation"]:
-                    segments_with_keyword_loss.append((segment, preservation_rate))
+        # NaN entries (no original keywords) never compare below the threshold
+        keyword_loss = np.flatnonzero(arrays.keyword_preservation < self.thresholds["keyword_preservation"])
         
-        if segments_with_keyword_loss:
-            avg_preservation = sum(rate for _, rate in segments_with_keyword_loss) / len(segments_with_keyword_loss)
+        if keyword_loss.size:
+            avg_preservation = float(arrays.keyword_preservation[keyword_loss].mean())
             confidence = 1.0 - avg_preservation
             
             issues.append(ConsistencyIssue(
                 issue_type="poor_keyword_preservation",
                 severity=self._determine_severity(confidence),
-                description=f"Poor emotional keyword preservation in {len(segments_with_keyword_loss)} segments",
-                segment_ids=[seg.segment_id for seg, _ in segments_with_keyword_loss],
+                description=f"Poor emotional keyword preservation in {len(keyword_loss)} segments",
+                segment_ids=[arrays.segment_ids[i] for i in keyword_loss],
                 confidence=confidence,
                 suggested_fix="Include emotional equivalents for lost keywords in target language"
             ))
@@ -235,58 +333,51 @@ class ConsistencyChecker:
         
         return issues
     
-    def _check_pattern_consistency(self, segments: List[SegmentEmotionData]) -> List[ConsistencyIssue]:
+    def _check_pattern_consistency(self, arrays: _SegmentArrays) -> List[ConsistencyIssue]:
         """Check for pattern consistency issues."""
         issues = []
         
         # Check for systematic emotion downgrades
-        downgrades = []
-        for segment in segments:
-            original_intensity = segment.original_emotion.primary_emotion.intensity
-            translated_intensity = segment.translated_emotion.primary_emotion.intensity
-            
-            if translated_intensity < original_intensity - 0.3:
-                downgrades.append(segment)
+        downgrades = np.flatnonzero(arrays.translated_intensity < arrays.original_intensity - 0.3)
         
-        if len(downgrades) > len(segments) * 0.3:  # More than 30% downgraded
+        total_segments = len(arrays.segment_ids)
+        if len(downgrades) > total_segments * 0.3:  # More than 30% downgraded
             issues.append(ConsistencyIssue(
                 issue_type="systematic_emotion_downgrade",
                 severity="high",
                 description=f"Systematic emotion intensity reduction in {len(downgrades)} segments",
-                segment_ids=[seg.segment_id for seg in downgrades],
-                confidence=len(downgrades) / len(segments),
+                segment_ids=[arrays.segment_ids[i] for i in downgrades],
+                confidence=len(downgrades) / total_segments,
                 suggested_fix="Review translation to preserve emotional intensity"
             ))
         
         return issues
     
-    def _check_emotion_sequence_consistency(self, segments: List[SegmentEmotionData]) -> List[ConsistencyIssue]:
+    def _check_emotion_sequence_consistency(self, arrays: _SegmentArrays) -> List[ConsistencyIssue]:
         """Check for emotion sequence consistency."""
         issues = []
         
-        if len(segments) < 3:
+        total_segments = len(arrays.segment_ids)
+        if total_segments < 3:
             return issues
         
         # Look for patterns in emotion transitions
-        original_sequence = [seg.original_emotion.primary_emotion.emotion for seg in segments]
-        translated_sequence = [seg.translated_emotion.primary_emotion.emotion for seg in segments]
+        original_sequence = arrays.original_emotion
+        translated_sequence = arrays.translated_emotion
         
-        # Check for major sequence disruptions
-        disruptions = 0
-        for i in range(len(segments) - 1):
-            original_transition = (original_sequence[i], original_sequence[i + 1])
-            translated_transition = (translated_sequence[i], translated_sequence[i + 1])
-            
-            if self._is_disruptive_transition(original_transition, translated_transition):
-                disruptions += 1
+        # Check for major sequence disruptions: transitions that are compatible in the
+        # original but conflicting in the translation
+        original_compatible = ~self._CONFLICT_MATRIX[original_sequence[:-1], original_sequence[1:]]
+        translated_conflicting = self._CONFLICT_MATRIX[translated_sequence[:-1], translated_sequence[1:]]
+        disruptions = int(np.count_nonzero(original_compatible & translated_conflicting))
         
-        if disruptions > len(segments) * 0.2:  # More than 20% disruptions
+        if disruptions > total_segments * 0.2:  # More than 20% disruptions
             issues.append(ConsistencyIssue(
                 issue_type="emotion_sequence_disruption",
                 severity="medium",
                 description=f"Emotional sequence disruptions in {disruptions} transitions",
-                segment_ids=[segments[i].segment_id for i in range(len(segments) - 1)],
-                confidence=disruptions / (len(segments) - 1),
+                segment_ids=arrays.segment_ids[:-1],
+                confidence=disruptions / (total_segments - 1),
                 suggested_fix="Review emotional progression for narrative consistency"
             ))
         
@@ -294,16 +385,7 @@ class ConsistencyChecker:
     
     def _are_conflicting_emotions(self, emotion1: EmotionLabel, emotion2: EmotionLabel) -> bool:
         """Check if two emotions are conflicting."""
-        conflict_pairs = [
-            (EmotionLabel.HAPPY, EmotionLabel.SAD),
-            (EmotionLabel.HAPPY, EmotionLabel.ANGRY),
-            (EmotionLabel.CALM, EmotionLabel.ANXIOUS),
-            (EmotionLabel.EXCITED, EmotionLabel.CALM),
-            (EmotionLabel.LOVING, EmotionLabel.ANGRY),
-            (EmotionLabel.LOVING, EmotionLabel.DISGUSTED)
-        ]
-        
-        return (emotion1, emotion2) in conflict_pairs or (emotion2, emotion1) in conflict_pairs
+        return (emotion1, emotion2) in self._CONFLICT_PAIRS
     
     def _detect_emotional_flow_breaks(self, segments: List[SegmentEmotionData]) -> List[Dict[str, Any]]:
         """Detect breaks in emotional flow between segments."""
@@ -313,17 +395,20 @@ class ConsistencyChecker:
             current_seg = segments[i]
             next_seg = segments[i + 1]
             
-            # Check if emotions are drastically different without justification
-            original_similarity = self.detector.compare_emotions(
+            # Check if emotions are drastically different without justification.
+            # Only the similarity is needed, so skip the rest of compare_emotions
+            original_similarity = self.detector._calculate_emotion_similarity(
                 current_seg.original_emotion, next_seg.original_emotion
-            )["emotion_similarity"]
+            )
+            if original_similarity <= 0.6:
+                continue  # No flow in the original for the translation to break
             
-            translated_similarity = self.detector.compare_emotions(
+            translated_similarity = self.detector._calculate_emotion_similarity(
                 current_seg.translated_emotion, next_seg.translated_emotion
-            )["emotion_similarity"]
+            )
             
             # If original has good flow but translation breaks it
-            if original_similarity > 0.6 and translated_similarity < 0.3:
+            if translated_similarity < 0.3:
                 breaks.append({
                     "segment_id": next_seg.segment_id,
                     "original_similarity": original_similarity,
@@ -334,37 +419,30 @@ class ConsistencyChecker:
         return breaks
     
     def _is_disruptive_transition(self, original_transition: Tuple, translated_transition: Tuple) -> bool:
-        """Check if a translation disrupts emotional transition."""
-        original_start, original_end = original_transition
-        translated_start, translated_end = translated_transition
-        
-        # If original transition makes sense but translated doesn't
-        original_compatible = not self._are_conflicting_emotions(original_start, original_end)
-        translated_compatible = not self._are_conflicting_emotions(translated_start, translated_end)
-        
-        return original_compatible and not translated_compatible
+        """Check if a translation disrupts emotional transition.
+        
+        Scalar form of the conflict-matrix test in _check_emotion_sequence_consistency.
+        """
+        # If original transition makes sense but translated doesn't; transitions are
+        # (start, end) pairs, so they are looked up in the conflict set directly
+        return (
+            tuple(original_transition) not in self._CONFLICT_PAIRS
+            and tuple(translated_transition) in self._CONFLICT_PAIRS
+        )
     
-    def _calculate_segment_scores(self, segments: List[SegmentEmotionData]) -> Dict[str, float]:
+    def _calculate_segment_scores(self, arrays: _SegmentArrays) -> Dict[str, float]:
         """Calculate consistency scores for individual segments."""
-        scores = {}
+        # Base score from emotion match
+        emotion_score = arrays.emotion_match_score
         
-        for segment in segments:
-            # Base score from emotion match
-            emotion_score = segment.emotion_match_score
-            
-            # Penalize for consistency issues
-            issue_penalty = len(segment.consistency_issues) * 0.1
-            
-            # Boost for high confidence
-            confidence_boost = (
-                segment.original_emotion.primary_emotion.confidence * 
-                segment.translated_emotion.primary_emotion.confidence
-            ) * 0.2
-            
-            final_score = max(0.0, min(1.0, emotion_score + confidence_boost - issue_penalty))
-            scores[segment.segment_id] = final_score
+        # Penalize for consistency issues
+        issue_penalty = arrays.issue_count * 0.1
         
-        return scores
+        # Boost for high confidence
+        confidence_boost = (arrays.original_confidence * arrays.translated_confidence) * 0.2
+        
+        final_scores = np.clip(emotion_score + confidence_boost - issue_penalty, 0.0, 1.0)
+        return dict(zip(arrays.segment_ids, final_scores.tolist()))
     
     def _calculate_overall_score(self, segment_scores: Dict[str, float], issues: List[ConsistencyIssue]) -> float:
         """Calculate overall consistency score."""
@@ -377,24 +455,17 @@ class ConsistencyChecker:
         # Apply penalties for issues
         total_penalty = 0.0
         for issue in issues:
-            severity_penalty = {
-                "critical": 0.3,
-                "high": 0.2,
-                "medium": 0.1,
-                "low": 0.05
-            }.get(issue.severity, 0.1)
-            
-            total_penalty += severity_penalty * issue.confidence
+            total_penalty += _SEVERITY_PENALTIES.get(issue.severity, 0.1) * issue.confidence
         
         final_score = max(0.0, min(1.0, base_score - total_penalty))
         return final_score
     
     def _determine_severity(self, confidence: float) -> str:
         """Determine issue severity based on confidence score."""
-        for severity, range_info in self.severity_mapping.items():
-            if range_info["min_score"] <= confidence <= range_info["max_score"]:
-                return severity
-        return "medium"  # Default
+        # Ranges include both ends, so a score on a boundary takes the lower range
+        if not self._severity_floor <= confidence <= self._severity_bounds[-1]:
+            return "medium"  # Default, also for NaN
+        return self._severity_labels[bisect_left(self._severity_bounds, confidence)]
     
     def _generate_consistency_recommendations(self, issues: List[ConsistencyIssue], overall_score: float) -> List[str]:
         """Generate recommendations based on consistency analysis."""
@@ -410,10 +481,8 @@ class ConsistencyChecker:
                 "Emotion consistency needs improvement. Focus on preserving emotional tone."
             )
         
-        # Issue-specific recommendations
-        issue_counts = {}
-        for issue in issues:
-            issue_counts[issue.issue_type] = issue_counts.get(issue.issue_type, 0) + 1
+        # Issue-specific recommendations, in order of first occurrence
+        issue_counts = Counter(issue.issue_type for issue in issues)
         
         for issue_type, count in issue_counts.items():
             if issue_type == "conflicting_emotions" and count > 3:
@@ -430,49 +499,42 @@ class ConsistencyChecker:
                 )
         
         # Critical issues
-        critical_issues = [issue for issue in issues if issue.severity == "critical"]
-        if critical_issues:
+        critical_count = sum(1 for issue in issues if issue.severity == "critical")
+        if critical_count:
             recommendations.append(
-                f"Address {len(critical_issues)} critical emotion consistency issues immediately."
+                f"Address {critical_count} critical emotion consistency issues immediately."
             )
         
         return recommendations
     
-    def _calculate_quality_metrics(self, segments: List[SegmentEmotionData], issues: List[ConsistencyIssue]) -> Dict[str, float]:
+    def _calculate_quality_metrics(self, issues: List[ConsistencyIssue], arrays: _SegmentArrays) -> Dict[str, float]:
         """Calculate detailed quality metrics."""
-        if not segments:
+        if not arrays.segment_ids:
             return {}
         
         # Basic metrics
-        total_segments = len(segments)
-        segments_with_issues = len([seg for seg in segments if seg.consistency_issues])
-        
-        # Emotion match statistics
-        emotion_matches = sum(1 for seg in segments 
-                            if seg.original_emotion.primary_emotion.emotion == 
-                               seg.translated_emotion.primary_emotion.emotion)
+        total_segments = len(arrays.segment_ids)
+        segments_with_issues = int(np.count_nonzero(arrays.issue_count))
         
-        # Sentiment match statistics
-        sentiment_matches = sum(1 for seg in segments 
-                              if seg.original_emotion.overall_sentiment == 
-                                 seg.translated_emotion.overall_sentiment)
+        # Emotion and sentiment match statistics
+        emotion_match_rate = float((arrays.original_emotion == arrays.translated_emotion).mean())
+        sentiment_match_rate = float((arrays.original_sentiment == arrays.translated_sentiment).mean())
         
         # Confidence statistics
-        avg_original_confidence = sum(seg.original_emotion.primary_emotion.confidence for seg in segments) / total_segments
-        avg_translated_confidence = sum(seg.translated_emotion.primary_emotion.confidence for seg in segments) / total_segments
+        avg_original_confidence = float(arrays.original_confidence.mean())
+        avg_translated_confidence = float(arrays.translated_confidence.mean())
         
         # Issue statistics
-        critical_issues = len([issue for issue in issues if issue.severity == "critical"])
-        high_issues = len([issue for issue in issues if issue.severity == "high"])
+        severity_counts = Counter(issue.severity for issue in issues)
         
         return {
-            "emotion_match_rate": emotion_matches / total_segments,
-            "sentiment_match_rate": sentiment_matches / total_segments,
+            "emotion_match_rate": emotion_match_rate,
+            "sentiment_match_rate": sentiment_match_rate,
             "segments_with_issues_rate": segments_with_issues / total_segments,
             "avg_original_confidence": avg_original_confidence,
             "avg_translated_confidence": avg_translated_confidence,
             "confidence_drop": max(0, avg_original_confidence - avg_translated_confidence),
-            "critical_issues_count": critical_issues,
-            "high_issues_count": high_issues,
+            "critical_issues_count": severity_counts["critical"],
+            "high_issues_count": severity_counts["high"],
             "total_issues_count": len(issues)
         }
\ No newline at end of file
@@ -6,14 +6,50 @@ High-level interface for emotion analysis and management in video translation pr
 
 import json
 import os
+import sqlite3
+from collections import OrderedDict
+from contextlib import closing
 from datetime import datetime
 from typing import List, Dict, Any, Optional, Tuple
 from pathlib import Path
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass, asdict, fields, is_dataclass
+from enum import Enum, IntFlag, auto
 
-from .emotion_detector import EmotionDetector, EmotionAnalysisResult, EmotionLabel, EmotionScore
+import numpy as np
 
-@dataclass
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+from .emotion_detector import EmotionDetector, EmotionAnalysisResult, EmotionLabel, EmotionScore, EMOTION_CODES
+
+def _json_default(obj: Any) -> Any:
+    """Serialize dataclasses as dicts, enums by value and any other unknown object as a string."""
+    if is_dataclass(obj):
+        return asdict(obj)
+    if isinstance(obj, Enum):
+        return obj.value
+    return str(obj)
+
+def _dump_json(data: Any, indent: bool = False) -> bytes:
+    """Serialize data to UTF-8 JSON, with orjson when installed."""
+    if ORJSON_AVAILABLE:
+        # orjson walks dataclasses directly, without an asdict() copy
+        return orjson.dumps(data, default=_json_default, option=orjson.OPT_INDENT_2 if indent else 0)
+    return json.dumps(
+        data, ensure_ascii=False, default=_json_default,
+        indent=2 if indent else None, separators=None if indent else (",", ":")
+    ).encode("utf-8")
+
+def _load_json(raw: bytes) -> Any:
+    """Parse a saved analysis, with orjson when installed."""
+    if ORJSON_AVAILABLE:
+        return orjson.loads(raw)
+    return json.loads(raw)
+
+@dataclass(slots=True)
 class SegmentEmotionData:
     """Emotion data for a translation segment."""
     segment_id: str
@@ -25,7 +61,7 @@ class SegmentEmotionData:
     consistency_issues: List[str]
     recommendations: List[str]
 
-@dataclass
+@dataclass(slots=True)
 class ProjectEmotionAnalysis:
     """Complete emotion analysis for a project."""
     project_id: str
@@ -39,6 +75,49 @@ class ProjectEmotionAnalysis:
     quality_issues: List[Dict[str, Any]]
     recommendations: List[str]
 
+class _SegmentIssue(IntFlag):
+    """Kinds of consistency issue found in a segment, alongside their messages."""
+    PRIMARY_EMOTION_MISMATCH = auto()
+    SENTIMENT_MISMATCH = auto()
+    LARGE_CONFIDENCE_DIFFERENCE = auto()
+    LOW_EMOTION_SIMILARITY = auto()
+    LOST_KEYWORDS = auto()
+
+@dataclass
+class _SegmentStatistics:
+    """Project-level aggregates over all segments, gathered in a single pass."""
+    total_segments: int
+    mean_match_score: float
+    segments_with_issues: int
+    low_confidence_segments: int
+    original_emotion_counts: np.ndarray  # Indexed by EMOTION_CODES
+    translated_emotion_counts: np.ndarray
+    original_emotions: List[EmotionLabel]  # Distinct, in order of first appearance
+    issue_counts: Dict[_SegmentIssue, int]  # Segments with each kind of issue, in order of first appearance
+
+class _SegmentValues:
+    """Per-segment values needed for the project statistics, filled in as segments are analyzed."""
+    
+    def __init__(self, size: int):
+        self.match_scores = np.empty(size, dtype=np.float64)
+        self.has_issues = np.empty(size, dtype=bool)
+        self.translated_confidences = np.empty(size, dtype=np.float64)
+        self.original_codes = np.empty(size, dtype=np.int8)
+        self.translated_codes = np.empty(size, dtype=np.int8)
+        self.issue_flags = np.empty(size, dtype=np.uint8)
+        self.count = 0
+    
+    def add(self, segment: SegmentEmotionData, issue_flags: _SegmentIssue):
+        """Record the next segment's values."""
+        i = self.count
+        self.match_scores[i] = segment.emotion_match_score
+        self.has_issues[i] = bool(segment.consistency_issues)
+        self.translated_confidences[i] = segment.translated_emotion.primary_emotion.confidence
+        self.original_codes[i] = EMOTION_CODES[segment.original_emotion.primary_emotion.emotion]
+        self.translated_codes[i] = EMOTION_CODES[segment.translated_emotion.primary_emotion.emotion]
+        self.issue_flags[i] = issue_flags
+        self.count += 1
+
 class EmotionAnalyzer:
     """High-level emotion analysis manager."""
     
@@ -46,6 +125,16 @@ class EmotionAnalyzer:
         self.detector = EmotionDetector()
         self.storage_dir = Path(storage_dir)
         self.storage_dir.mkdir(exist_ok=True)
+        # Segment data lives apart from the small per-analysis header files
+        self.segments_dir = self.storage_dir / "segments"
+        self.segments_dir.mkdir(exist_ok=True)
+        # SQLite manifest indexing the analysis headers by project
+        self.manifest_path = self.storage_dir / "manifest.db"
+        self._init_manifest()
+        
+        # LRU cache of project summaries keyed on (project_id, manifest mtime); most recently used last
+        self._summary_cache: "OrderedDict[Tuple[str, int], Dict[str, Any]]" = OrderedDict()
+        self.summary_cache_max_size = 128
         
         # Analysis thresholds
         self.consistency_threshold = 0.7
@@ -69,25 +158,58 @@ class EmotionAnalyzer:
         if not segments:
             raise ValueError("No segments found in translation data")
         
-        # Analyze each segment
+        # One clock reading stamps the analysis and any segments it has to fill in
+        now = datetime.now()
+        timestamp = now.timestamp()
+        # Results are immutable, so every segment with missing text can share one default
+        default_emotion = EmotionAnalysisResult(
+            text="",
+            primary_emotion=EmotionScore(EmotionLabel.NEUTRAL, 0.0, 0.0, []),
+            secondary_emotions=[],
+            overall_sentiment="neutral",
+            emotional_keywords=[],
+            analysis_timestamp=timestamp
+        )
+        
+        # Detect emotions for all complete segments with one batch call per language
+        segment_texts = [self._get_segment_texts(segment) for segment in segments]
+        complete = [texts for texts in segment_texts if texts[1] and texts[2]]
+        original_emotions = iter(self.detector.batch_analyze(
+            [original_text for _, original_text, _ in complete], source_language
+        ))
+        translated_emotions = iter(self.detector.batch_analyze(
+            [translated_text for _, _, translated_text in complete], target_language
+        ))
+        
+        # Analyze each segment, recording the values the statistics need as we go
         segment_emotions = []
-        for segment in segments:
-            segment_emotion = self._analyze_segment_emotion(
-                segment, source_language, target_language
-            )
+        segment_values = _SegmentValues(len(segment_texts))
+        for segment_id, original_text, translated_text in segment_texts:
+            if original_text and translated_text:
+                segment_emotion, flags = self._build_segment_emotion(
+                    segment_id, original_text, translated_text,
+                    next(original_emotions), next(translated_emotions)
+                )
+            else:
+                segment_emotion = self._missing_text_segment_emotion(
+                    segment_id, original_text, translated_text, default_emotion
+                )
+                flags = _SegmentIssue(0)
             segment_emotions.append(segment_emotion)
+            segment_values.add(segment_emotion, flags)
         
         # Calculate overall metrics
-        overall_consistency = self._calculate_overall_consistency(segment_emotions)
-        emotion_distribution = self._calculate_emotion_distribution(segment_emotions)
-        quality_issues = self._identify_quality_issues(segment_emotions)
-        recommendations = self._generate_recommendations(segment_emotions, quality_issues)
+        statistics = self._collect_segment_statistics(segment_values)
+        overall_consistency = statistics.mean_match_score
+        emotion_distribution = self._calculate_emotion_distribution(statistics)
+        quality_issues = self._identify_quality_issues(statistics)
+        recommendations = self._generate_recommendations(statistics, quality_issues)
         
         # Create analysis result
         analysis = ProjectEmotionAnalysis(
             project_id=project_id,
-            analysis_id=f"emotion_{project_id}_{int(datetime.now().timestamp())}",
-            created_at=datetime.now().isoformat(),
+            analysis_id=f"emotion_{project_id}_{int(timestamp)}",
+            created_at=now.isoformat(),
             source_language=source_language,
             target_language=target_language,
             segments=segment_emotions,
@@ -102,59 +224,60 @@ class EmotionAnalyzer:
         
         return analysis
     
-    def _analyze_segment_emotion(
-        self,
-        segment: Dict[str, Any],
-        source_language: str,
-        target_language: str
-    ) -> SegmentEmotionData:
-        """Analyze emotion for a single segment."""
-        
+    def _get_segment_texts(self, segment: Dict[str, Any]) -> Tuple[str, str, str]:
+        """Get a segment's ID, original text and translated text."""
         segment_id = str(segment.get("id", "unknown"))
         original_text = segment.get("original_text", segment.get("text", ""))
         translated_text = segment.get("translated_text", segment.get("translation", ""))
+        return segment_id, original_text, translated_text
+    
+    def _missing_text_segment_emotion(
+        self,
+        segment_id: str,
+        original_text: str,
+        translated_text: str,
+        default_emotion: EmotionAnalysisResult
+    ) -> SegmentEmotionData:
+        """Create default emotion data for a segment with missing text."""
+        return SegmentEmotionData(
+            segment_id=segment_id,
+            original_text=original_text,
+            translated_text=translated_text,
+            original_emotion=default_emotion,
+            translated_emotion=default_emotion,
+            emotion_match_score=0.0,
+            consistency_issues=["Missing text for analysis"],
+            recommendations=["Provide complete text for accurate emotion analysis"]
+        )
+    
+    def _build_segment_emotion(
+        self,
+        segment_id: str,
+        original_text: str,
+        translated_text: str,
+        original_emotion: EmotionAnalysisResult,
+        translated_emotion: EmotionAnalysisResult
+    ) -> Tuple[SegmentEmotionData, _SegmentIssue]:
+        """Compare a segment's detected emotions and derive its issues and recommendations.
         
-        if not original_text or not translated_text:
-            # Create default emotion data for missing text
-            default_emotion = EmotionAnalysisResult(
-                text="",
-                primary_emotion=EmotionScore(EmotionLabel.NEUTRAL, 0.0, 0.0, []),
-                secondary_emotions=[],
-                overall_sentiment="neutral",
-                emotional_keywords=[],
-                analysis_timestamp=datetime.now().timestamp()
-            )
-            
-            return SegmentEmotionData(
-                segment_id=segment_id,
-                original_text=original_text,
-                translated_text=translated_text,
-                original_emotion=default_emotion,
-                translated_emotion=default_emotion,
-                emotion_match_score=0.0,
-                consistency_issues=["Missing text for analysis"],
-                recommendations=["Provide complete text for accurate emotion analysis"]
-            )
-        
-        # Analyze emotions
-        original_emotion = self.detector.detect_emotion(original_text, source_language)
-        translated_emotion = self.detector.detect_emotion(translated_text, target_language)
+        Returns the segment data and the kinds of issue it has.
+        """
         
         # Calculate emotion match score
         emotion_comparison = self.detector.compare_emotions(original_emotion, translated_emotion)
         emotion_match_score = emotion_comparison["emotion_similarity"]
         
         # Identify consistency issues
-        consistency_issues = self._identify_segment_issues(
+        consistency_issues, issue_flags = self._identify_segment_issues(
             original_emotion, translated_emotion, emotion_comparison
         )
         
         # Generate recommendations
         recommendations = self._generate_segment_recommendations(
-            original_emotion, translated_emotion, consistency_issues
+            original_emotion, translated_emotion, issue_flags
         )
         
-        return SegmentEmotionData(
+        segment_emotion = SegmentEmotionData(
             segment_id=segment_id,
             original_text=original_text,
             translated_text=translated_text,
@@ -164,18 +287,21 @@ class EmotionAnalyzer:
             consistency_issues=consistency_issues,
             recommendations=recommendations
         )
+        return segment_emotion, issue_flags
     
     def _identify_segment_issues(
         self,
         original_emotion: EmotionAnalysisResult,
         translated_emotion: EmotionAnalysisResult,
         comparison: Dict[str, Any]
-    ) -> List[str]:
-        """Identify consistency issues for a segment."""
+    ) -> Tuple[List[str], _SegmentIssue]:
+        """Identify consistency issues for a segment, as messages and as flags."""
         issues = []
+        flags = _SegmentIssue(0)
         
         # Check primary emotion match
         if not comparison["primary_emotion_match"]:
+            flags |= _SegmentIssue.PRIMARY_EMOTION_MISMATCH
             issues.append(
                 f"Primary emotion mismatch: {original_emotion.primary_emotion.emotion.value} "
                 f"→ {translated_emotion.primary_emotion.emotion.value}"
@@ -183,6 +309,7 @@ class EmotionAnalyzer:
         
         # Check sentiment match
         if not comparison["sentiment_match"]:
+            flags |= _SegmentIssue.SENTIMENT_MISMATCH
             issues.append(
                 f"Sentiment mismatch: {original_emotion.overall_sentiment} "
                 f"→ {translated_emotion.overall_sentiment}"
@@ -190,51 +317,52 @@ class EmotionAnalyzer:
         
         # Check confidence differences
         if comparison["confidence_diff"] > 0.4:
+            flags |= _SegmentIssue.LARGE_CONFIDENCE_DIFFERENCE
             issues.append(
                 f"Large confidence difference: {comparison['confidence_diff']:.2f}"
             )
         
         # Check low emotion similarity
         if comparison["emotion_similarity"] < self.emotion_match_threshold:
+            flags |= _SegmentIssue.LOW_EMOTION_SIMILARITY
             issues.append(
                 f"Low emotion similarity: {comparison['emotion_similarity']:.2f}"
             )
         
         # Check for lost emotional keywords
-        original_keywords = set(original_emotion.emotional_keywords)
-        translated_keywords = set(translated_emotion.emotional_keywords)
-        lost_keywords = original_keywords - translated_keywords
+        lost_keywords = comparison["lost_keywords"]
         
         if len(lost_keywords) > 0:
+            flags |= _SegmentIssue.LOST_KEYWORDS
             issues.append(f"Lost emotional keywords: {', '.join(list(lost_keywords)[:3])}")
         
-        return issues
+        return issues, flags
     
     def _generate_segment_recommendations(
         self,
         original_emotion: EmotionAnalysisResult,
         translated_emotion: EmotionAnalysisResult,
-        issues: List[str]
+        issue_flags: _SegmentIssue
     ) -> List[str]:
         """Generate recommendations for improving emotion consistency."""
         recommendations = []
         
-        if any("Primary emotion mismatch" in issue for issue in issues):
+        if issue_flags & _SegmentIssue.PRIMARY_EMOTION_MISMATCH:
             recommendations.append(
                 f"Consider revising translation to better convey {original_emotion.primary_emotion.emotion.value} emotion"
             )
         
-        if any("Sentiment mismatch" in issue for issue in issues):
+        if issue_flags & _SegmentIssue.SENTIMENT_MISMATCH:
             recommendations.append(
                 f"Adjust translation to maintain {original_emotion.overall_sentiment} sentiment"
             )
         
-        if any("Lost emotional keywords" in issue for issue in issues):
+        if issue_flags & _SegmentIssue.LOST_KEYWORDS:
             recommendations.append(
                 "Include emotional equivalents for lost keywords in target language"
             )
         
-        if any("Low emotion similarity" in issue for issue in issues):
+        if issue_flags & _SegmentIssue.LOW_EMOTION_SIMILARITY:
             recommendations.append(
                 "Review translation for emotional tone preservation"
             )
@@ -247,35 +375,52 @@ class EmotionAnalyzer:
         
         return recommendations
     
-    def _calculate_overall_consistency(self, segment_emotions: List[SegmentEmotionData]) -> float:
-        """Calculate overall emotion consistency score."""
-        if not segment_emotions:
-            return 0.0
-        
-        total_score = sum(seg.emotion_match_score for seg in segment_emotions)
-        return total_score / len(segment_emotions)
+    def _collect_segment_statistics(self, values: _SegmentValues) -> _SegmentStatistics:
+        """Derive the project-level aggregates from the recorded segment values."""
+        # Distinct original emotions in order of first appearance, as the dict-based counts had them
+        codes, first_seen = np.unique(values.original_codes, return_index=True)
+        labels = list(EmotionLabel)
+        
+        return _SegmentStatistics(
+            total_segments=values.count,
+            mean_match_score=float(np.mean(values.match_scores)) if values.count else 0.0,
+            segments_with_issues=int(np.count_nonzero(values.has_issues)),
+            low_confidence_segments=int(np.count_nonzero(
+                values.translated_confidences < self.quality_thresholds["low_confidence"]
+            )),
+            original_emotion_counts=np.bincount(values.original_codes, minlength=len(labels)),
+            translated_emotion_counts=np.bincount(values.translated_codes, minlength=len(labels)),
+            original_emotions=[labels[code] for code in codes[np.argsort(first_seen)]],
+            issue_counts=self._count_segment_issues(values.issue_flags)
+        )
     
-    def _calculate_emotion_distribution(self, segment_emotions: List[SegmentEmotionData]) -> Dict[str, int]:
+    def _count_segment_issues(self, issue_flags: np.ndarray) -> Dict[_SegmentIssue, int]:
+        """Count the segments having each kind of issue, ordered by first appearance."""
+        issue_counts = {}
+        first_seen = {}
+        for issue in _SegmentIssue:
+            affected = np.flatnonzero(issue_flags & issue)
+            if affected.size:
+                issue_counts[issue] = int(affected.size)
+                first_seen[issue] = int(affected[0])
+        # Within a segment issues appear in declaration order, so stable sorting keeps ties right
+        return {issue: issue_counts[issue] for issue in sorted(issue_counts, key=first_seen.__getitem__)}
+    
+    def _calculate_emotion_distribution(self, statistics: _SegmentStatistics) -> Dict[str, int]:
         """Calculate distribution of emotions across segments."""
-        distribution = {}
-        
-        for segment in segment_emotions:
-            primary_emotion = segment.original_emotion.primary_emotion.emotion.value
-            distribution[primary_emotion] = distribution.get(primary_emotion, 0) + 1
-        
-        return distribution
+        return {
+            emotion.value: int(statistics.original_emotion_counts[EMOTION_CODES[emotion]])
+            for emotion in statistics.original_emotions
+        }
     
-    def _identify_quality_issues(self, segment_emotions: List[SegmentEmotionData]) -> List[Dict[str, Any]]:
+    def _identify_quality_issues(self, statistics: _SegmentStatistics) -> List[Dict[str, Any]]:
         """Identify overall quality issues in the project."""
         issues = []
         
         # Calculate statistics
-        total_segments = len(segment_emotions)
-        segments_with_issues = len([seg for seg in segment_emotions if seg.consistency_issues])
-        low_confidence_segments = len([
-            seg for seg in segment_emotions 
-            if seg.translated_emotion.primary_emotion.confidence < self.quality_thresholds["low_confidence"]
-        ])
+        total_segments = statistics.total_segments
+        segments_with_issues = statistics.segments_with_issues
+        low_confidence_segments = statistics.low_confidence_segments
         
         # Issue: High percentage of segments with problems
         if segments_with_issues / total_segments > 0.3:
@@ -295,32 +440,27 @@ class EmotionAnalyzer:
                 "affected_segments": low_confidence_segments
             })
         
-        # Issue: Dominant emotion loss
-        original_emotions = [seg.original_emotion.primary_emotion.emotion for seg in segment_emotions]
-        translated_emotions = [seg.translated_emotion.primary_emotion.emotion for seg in segment_emotions]
-        
-        from collections import Counter
-        original_counts = Counter(original_emotions)
-        translated_counts = Counter(translated_emotions)
-        
-        for emotion, original_count in original_counts.items():
-            translated_count = translated_counts.get(emotion, 0)
-            loss_rate = (original_count - translated_count) / original_count
-            
-            if loss_rate > 0.5 and original_count >= 3:
+        # Issue: Dominant emotion loss, computed for every emotion at once
+        original_counts = statistics.original_emotion_counts
+        loss_rates = (original_counts - statistics.translated_emotion_counts) / np.maximum(original_counts, 1)
+        lost = (loss_rates > 0.5) & (original_counts >= 3)
+
+        for emotion in statistics.original_emotions:
+            code = EMOTION_CODES[emotion]
+            if lost[code]:
                 issues.append({
                     "type": "emotion_loss",
                     "severity": "high",
                     "description": f"Significant loss of {emotion.value} emotion in translation",
                     "emotion": emotion.value,
-                    "loss_rate": loss_rate
+                    "loss_rate": float(loss_rates[code])
                 })
         
         return issues
     
     def _generate_recommendations(
         self,
-        segment_emotions: List[SegmentEmotionData],
+        statistics: _SegmentStatistics,
         quality_issues: List[Dict[str, Any]]
     ) -> List[str]:
         """Generate overall recommendations for the project."""
@@ -347,8 +487,7 @@ class EmotionAnalyzer:
                 )
         
         # General recommendations based on consistency score
-        overall_consistency = self._calculate_overall_consistency(segment_emotions)
-        
+        overall_consistency = statistics.mean_match_score
         if overall_consistency < 0.5:
             recommendations.append(
                 "Overall emotion consistency is low. Consider comprehensive review of translation approach."
@@ -359,20 +498,14 @@ class EmotionAnalyzer:
             )
         
         # Specific recommendations for frequent issues
-        common_issues = {}
-        for segment in segment_emotions:
-            for issue in segment.consistency_issues:
-                issue_type = issue.split(":")[0]
-                common_issues[issue_type] = common_issues.get(issue_type, 0) + 1
-        
-        for issue_type, count in common_issues.items():
-            if count >= len(segment_emotions) * 0.2:  # If issue affects 20% or more segments
-                if issue_type == "Primary emotion mismatch":
+        for issue, count in statistics.issue_counts.items():
+            if count >= statistics.total_segments * 0.2:  # If issue affects 20% or more segments
+                if issue == _SegmentIssue.PRIMARY_EMOTION_MISMATCH:
                     recommendations.append(
                         "Frequent primary emotion mismatches detected. "
                         "Review emotion preservation strategies."
                     )
-                elif issue_type == "Sentiment mismatch":
+                elif issue == _SegmentIssue.SENTIMENT_MISMATCH:
                     recommendations.append(
                         "Frequent sentiment conflicts detected. "
                         "Ensure positive/negative tone consistency."
@@ -380,18 +513,77 @@ class EmotionAnalyzer:
         
         return recommendations
     
+    def _connect_manifest(self) -> sqlite3.Connection:
+        """Open a connection to the manifest.
+        
+        Connections are short-lived, so an analyzer can be shared across threads.
+        """
+        return sqlite3.connect(self.manifest_path)
+    
+    def _init_manifest(self):
+        """Create the manifest, indexing any analyses saved before it existed."""
+        with closing(self._connect_manifest()) as db, db:
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS analyses ("
+                "analysis_id TEXT PRIMARY KEY, project_id TEXT NOT NULL, created_at TEXT NOT NULL, "
+                "overall_consistency REAL NOT NULL, segments_count INTEGER NOT NULL, "
+                "quality_issues_count INTEGER NOT NULL)"
+            )
+            db.execute("CREATE INDEX IF NOT EXISTS analyses_by_project ON analyses (project_id, created_at)")
+            
+            # user_version marks a storage directory whose existing files were indexed
+            if db.execute("PRAGMA user_version").fetchone()[0] == 0:
+                with os.scandir(self.storage_dir) as entries:
+                    analysis_paths = [
+                        entry.path for entry in entries
+                        if entry.name.endswith(".json") and entry.is_file()
+                    ]
+                for analysis_path in analysis_paths:
+                    try:
+                        with open(analysis_path, "rb") as f:
+                            data = _load_json(f.read())
+                        db.execute(
+                            "INSERT OR REPLACE INTO analyses VALUES (?, ?, ?, ?, ?, ?)",
+                            (
+                                data["analysis_id"], data["project_id"], data["created_at"],
+                                data.get("overall_consistency", 0),
+                                data.get("segments_count", len(data.get("segments", []))),
+                                len(data.get("quality_issues", []))
+                            )
+                        )
+                    except (FileNotFoundError, json.JSONDecodeError, KeyError, TypeError):
+                        continue
+                db.execute("PRAGMA user_version = 1")
+    
     def _save_analysis(self, analysis: ProjectEmotionAnalysis):
-        """Save emotion analysis to storage."""
+        """Save emotion analysis to storage.
+        
+        The segments, the bulk of an analysis, go to segments/<analysis_id>.json; the
+        header file holds everything else plus the segment count, so listing analyses
+        never has to parse segment data. The header is written last, so it only
+        exists for complete analyses.
+        """
+        segments_file = self.segments_dir / f"{analysis.analysis_id}.json"
+        segments_file.write_bytes(_dump_json(analysis.segments))
+        
+        header = {
+            field.name: getattr(analysis, field.name)
+            for field in fields(analysis) if field.name != "segments"
+        }
+        header["segments_count"] = len(analysis.segments)
         analysis_file = self.storage_dir / f"{analysis.analysis_id}.json"
-        
-        # Convert to serializable format
-        analysis_data = asdict(analysis)
-        
-        # Handle datetime serialization
-        analysis_data["created_at"] = analysis.created_at
-        
-        with open(analysis_file, 'w', encoding='utf-8') as f:
-            json.dump(analysis_data, f, ensure_ascii=False, indent=2, default=str)
+        analysis_file.write_bytes(_dump_json(header, indent=True))
+        
+        with closing(self._connect_manifest()) as db, db:
+            db.execute(
+                "INSERT OR REPLACE INTO analyses VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    analysis.analysis_id, analysis.project_id, analysis.created_at,
+                    analysis.overall_consistency, len(analysis.segments), len(analysis.quality_issues)
+                )
+            )
+        # The manifest mtime may not have ticked on a coarse-grained filesystem
+        self._summary_cache.clear()
     
     def load_analysis(self, analysis_id: str) -> Optional[ProjectEmotionAnalysis]:
         """Load emotion analysis from storage."""
@@ -401,8 +593,13 @@ class EmotionAnalyzer:
             return None
         
         try:
-            with open(analysis_file, 'r', encoding='utf-8') as f:
-                data = json.load(f)
+            data = _load_json(analysis_file.read_bytes())
+            
+            # Analyses saved before the header/segments split keep their segments inline
+            if "segments" not in data:
+                segments_file = self.segments_dir / f"{analysis_id}.json"
+                data["segments"] = _load_json(segments_file.read_bytes())
+            data.pop("segments_count", None)
             
             # Reconstruct the analysis object
             # Note: This is simplified - full reconstruction would need to rebuild nested objects
@@ -412,56 +609,69 @@ class EmotionAnalyzer:
             return None
     
     def list_project_analyses(self, project_id: str) -> List[Dict[str, Any]]:
-        """List all emotion analyses for a project."""
-        analyses = []
-        
-        for analysis_file in self.storage_dir.glob("*.json"):
-            try:
-                with open(analysis_file, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                
-                if data.get("project_id") == project_id:
-                    analyses.append({
-                        "analysis_id": data["analysis_id"],
-                        "created_at": data["created_at"],
-                        "overall_consistency": data.get("overall_consistency", 0),
-                        "segments_count": len(data.get("segments", [])),
-                        "quality_issues_count": len(data.get("quality_issues", []))
-                    })
-            
-            except (FileNotFoundError, json.JSONDecodeError):
-                continue
-        
-        # Sort by creation time (newest first)
-        analyses.sort(key=lambda x: x["created_at"], reverse=True)
-        
-        return analyses
+        """List all emotion analyses for a project, newest first."""
+        with closing(self._connect_manifest()) as db:
+            db.row_factory = sqlite3.Row
+            rows = db.execute(
+                "SELECT analysis_id, created_at, overall_consistency, segments_count, quality_issues_count "
+                "FROM analyses WHERE project_id = ? ORDER BY created_at DESC, analysis_id DESC",
+                (project_id,)
+            ).fetchall()
+        
+        return [dict(row) for row in rows]
     
     def get_project_emotion_summary(self, project_id: str) -> Dict[str, Any]:
-        """Get emotion analysis summary for a project."""
-        analyses = self.list_project_analyses(project_id)
-        
-        if not analyses:
-            return {
-                "project_id": project_id,
-                "total_analyses": 0,
-                "latest_consistency": None,
-                "average_consistency": None,
-                "improvement_trend": None
-            }
-        
-        latest_analysis = analyses[0]
-        consistency_scores = []
-        
-        # Get detailed data for trend analysis
-        for analysis_info in analyses:
-            consistency_scores.append(analysis_info["overall_consistency"])
+        """Get emotion analysis summary for a project.
+        
+        Summaries are cached until the manifest changes, so dashboards can poll cheaply.
+        """
+        cache_key = (project_id, os.stat(self.manifest_path).st_mtime_ns)
+        summary = self._summary_cache.get(cache_key)
+        if summary is None:
+            summary = self._query_project_emotion_summary(project_id)
+            self._summary_cache[cache_key] = summary
+            while len(self._summary_cache) > self.summary_cache_max_size:
+                self._summary_cache.popitem(last=False)
+        else:
+            self._summary_cache.move_to_end(cache_key)
+        return dict(summary)
+    
+    def _query_project_emotion_summary(self, project_id: str) -> Dict[str, Any]:
+        """Compute a project's emotion analysis summary from the manifest."""
+        with closing(self._connect_manifest()) as db:
+            total_analyses, average_consistency = db.execute(
+                "SELECT COUNT(*), AVG(overall_consistency) FROM analyses WHERE project_id = ?",
+                (project_id,)
+            ).fetchone()
+            
+            if not total_analyses:
+                return {
+                    "project_id": project_id,
+                    "total_analyses": 0,
+                    "latest_consistency": None,
+                    "average_consistency": None,
+                    "improvement_trend": None
+                }
+            
+            # Newest and oldest three scores for trend analysis
+            recent = db.execute(
+                "SELECT analysis_id, overall_consistency FROM analyses WHERE project_id = ? "
+                "ORDER BY created_at DESC, analysis_id DESC LIMIT 3",
+                (project_id,)
+            ).fetchall()
+            older = db.execute(
+                "SELECT overall_consistency FROM analyses WHERE project_id = ? "
+                "ORDER BY created_at ASC, analysis_id ASC LIMIT 3",
+                (project_id,)
+            ).fetchall()
+        
+        latest_analysis_id, latest_consistency = recent[0]
         
         # Calculate trend
         improvement_trend = "stable"
-        if len(consistency_scores) >= 2:
-            recent_avg = sum(consistency_scores[:3]) / min(3, len(consistency_scores))
-            older_avg = sum(consistency_scores[-3:]) / min(3, len(consistency_scores))
+        if total_analyses >= 2:
+            recent_avg = sum(score for _, score in recent) / len(recent)
+            older_avg = sum(score for score, in older) / len(older)
             
             if recent_avg > older_avg + 0.1:
                 improvement_trend = "improving"
@@ -470,9 +680,9 @@ class EmotionAnalyzer:
         
         return {
             "project_id": project_id,
-            "total_analyses": len(analyses),
-            "latest_consistency": latest_analysis["overall_consistency"],
-            "average_consistency": sum(consistency_scores) / len(consistency_scores),
+            "total_analyses": total_analyses,
+            "latest_consistency": latest_consistency,
+            "average_consistency": average_consistency,
             "improvement_trend": improvement_trend,
-            "latest_analysis_id": latest_analysis["analysis_id"]
+            "latest_analysis_id": latest_analysis_id
         }
\ No newline at end of file
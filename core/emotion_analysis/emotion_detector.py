@@ -6,10 +6,10 @@ Provides AI-powered emotion detection and classification for text content.
 
 import json
 import re
+from collections import OrderedDict
 from typing import List, Dict, Any, Optional, Tuple
 from dataclasses import dataclass
 from enum import Enum
-import hashlib
 import time
 
 class EmotionLabel(Enum):
@@ -27,7 +27,10 @@ class EmotionLabel(Enum):
     LOVING = "loving"
     NOSTALGIC = "nostalgic"
 
-@dataclass
+# Stable integer codes for emotion labels, for counting and comparing emotions as NumPy arrays
+EMOTION_CODES = {label: code for code, label in enumerate(EmotionLabel)}
+
+@dataclass(frozen=True, slots=True)
 class EmotionScore:
     """Emotion detection result."""
     emotion: EmotionLabel
@@ -35,7 +38,7 @@ class EmotionScore:
     intensity: float  # 0.0 to 1.0
     context_clues: List[str]
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class EmotionAnalysisResult:
     """Complete emotion analysis result."""
     text: str
@@ -53,8 +56,8 @@ class EmotionDetector:
         self.sentiment_patterns = self._load_sentiment_patterns()
         self.context_rules = self._load_context_rules()
         
-        # Cache for expensive operations
-        self._analysis_cache = {}
+        # LRU cache of results keyed on (text, language); most recently used last
+        self._analysis_cache: "OrderedDict[Tuple[str, str], EmotionAnalysisResult]" = OrderedDict()
         self.cache_max_size = 1000
     
     def _load_emotion_keywords(self) -> Dict[EmotionLabel, List[str]]:
@@ -163,9 +166,11 @@ class EmotionDetector:
     def detect_emotion(self, text: str, language: str = "en") -> EmotionAnalysisResult:
         """Detect emotions in text."""
         # Check cache first
-        cache_key = hashlib.md5(f"{text}_{language}".encode()).hexdigest()
-        if cache_key in self._analysis_cache:
-            return self._analysis_cache[cache_key]
+        cache_key = (text, language)
+        cached = self._analysis_cache.get(cache_key)
+        if cached is not None:
+            self._analysis_cache.move_to_end(cache_key)
+            return cached
         
         # Clean and normalize text
         normalized_text = self._normalize_text(text)
@@ -198,14 +203,10 @@ class EmotionDetector:
             analysis_timestamp=time.time()
         )
         
-        # Cache result
-        if len(self._analysis_cache) >= self.cache_max_size:
-            # Remove oldest entries
-            oldest_key = min(self._analysis_cache.keys(), 
-                           key=lambda k: self._analysis_cache[k].analysis_timestamp)
-            del self._analysis_cache[oldest_key]
-        
+        # Cache result, evicting the least recently used entries
         self._analysis_cache[cache_key] = result
+        while len(self._analysis_cache) > self.cache_max_size:
+            self._analysis_cache.popitem(last=False)
         return result
     
     def _normalize_text(self, text: str) -> str:
@@ -389,16 +390,20 @@ class EmotionDetector:
         return list(set(keywords))  # Remove duplicates
     
     def batch_analyze(self, texts: List[str], language: str = "en") -> List[EmotionAnalysisResult]:
-        """Analyze emotions for multiple texts."""
-        results = []
+        """Analyze emotions for multiple texts.
+        
+        Each distinct text is detected once; repeated texts share its result.
+        """
+        distinct_results: Dict[str, EmotionAnalysisResult] = {}
         
         for text in texts:
+            if text in distinct_results:
+                continue
             try:
-                result = self.detect_emotion(text, language)
-                results.append(result)
+                distinct_results[text] = self.detect_emotion(text, language)
             except Exception as e:
                 # Create error result
-                error_result = EmotionAnalysisResult(
+                distinct_results[text] = EmotionAnalysisResult(
                     text=text,
                     primary_emotion=EmotionScore(EmotionLabel.NEUTRAL, 0.0, 0.0, []),
                     secondary_emotions=[],
@@ -406,19 +411,21 @@ class EmotionDetector:
                     emotional_keywords=[],
                     analysis_timestamp=time.time()
                 )
-                results.append(error_result)
         
-        return results
+        return [distinct_results[text] for text in texts]
     
     def compare_emotions(self, result1: EmotionAnalysisResult, result2: EmotionAnalysisResult) -> Dict[str, Any]:
         """Compare emotions between two analysis results."""
+        keywords1 = set(result1.emotional_keywords)
+        keywords2 = set(result2.emotional_keywords)
         return {
             "primary_emotion_match": result1.primary_emotion.emotion == result2.primary_emotion.emotion,
             "sentiment_match": result1.overall_sentiment == result2.overall_sentiment,
             "confidence_diff": abs(result1.primary_emotion.confidence - result2.primary_emotion.confidence),
             "intensity_diff": abs(result1.primary_emotion.intensity - result2.primary_emotion.intensity),
             "emotion_similarity": self._calculate_emotion_similarity(result1, result2),
-            "keyword_overlap": len(set(result1.emotional_keywords) & set(result2.emotional_keywords))
+            "keyword_overlap": len(keywords1 & keywords2),
+            "lost_keywords": keywords1 - keywords2  # In result1 but missing from result2
         }
     
     def _calculate_emotion_similarity(self, result1: EmotionAnalysisResult, result2: EmotionAnalysisResult) -> float:
@@ -100,14 +100,26 @@ def create_custom_voice(audio_path, text, custom_name=None):
 @except_handler("Failed to merge audio")
 def merge_audio(files, output):
     """Merge audio files, add a brief silence"""
-    # Create an empty audio segment
-    combined = AudioSegment.empty()
-    silence = AudioSegment.silent(duration=100)  # 100ms silence
+    # Accumulate raw PCM in a single buffer at the first clip's format; only clips that
+    # differ are converted, and ffmpeg resamples once to the export format below
+    buffer = bytearray()
+    params = None  # (frame_rate, channels, sample_width) of the first clip
+    silence = b""
     
     # Add audio files one by one
     for file in files:
         audio = AudioSegment.from_wav(file)
-        combined += audio + silence
+        clip_params = (audio.frame_rate, audio.channels, audio.sample_width)
+        if params is None:
+            params = clip_params
+            silence = AudioSegment.silent(duration=100, frame_rate=audio.frame_rate) \
+                .set_channels(audio.channels).set_sample_width(audio.sample_width).raw_data  # 100ms silence
+        elif clip_params != params:
+            audio = audio.set_frame_rate(params[0]).set_channels(params[1]).set_sample_width(params[2])
+        buffer.extend(audio.raw_data)
+        buffer.extend(silence)
+    frame_rate, channels, sample_width = params or (16000, 1, 2)
+    combined = AudioSegment(data=bytes(buffer), sample_width=sample_width, frame_rate=frame_rate, channels=channels)
     
     # Export the combined file
     combined.export(output, format="wav", parameters=["-acodec", "pcm_s16le", "-ar", "16000", "-ac", "1"])
@@ -1,5 +1,9 @@
 import streamlit as st
+import atexit
+import logging
+import logging.handlers
 import os, sys
+import queue
 from core.st_utils.imports_and_utils import *
 from core import *
 
@@ -10,6 +14,30 @@ sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 st.set_page_config(page_title="VideoLingo", page_icon="docs/logo.svg")
 
+# 日志输出由应用入口统一配置：core 模块（如批处理）的 INFO 日志输出到终端，第三方库保持 WARNING
+# basicConfig 在根 logger 已有 handler 时不做任何事，Streamlit 每次重跑脚本也不会重复添加
+logging.basicConfig(stream=sys.stdout, format="%(message)s")
+
+def setup_core_logging():
+    """core 的日志只放入队列，由一个后台线程写到终端，批处理 worker 不必争用 stdout。
+    Streamlit 每次重跑都会执行本脚本，logging 模块的状态却会保留，因此 handler 已存在时直接返回"""
+    core_logger = logging.getLogger("core")
+    if any(isinstance(h, logging.handlers.QueueHandler) for h in core_logger.handlers):
+        return
+    
+    log_queue = queue.SimpleQueue()
+    stream_handler = logging.StreamHandler(sys.stdout)
+    stream_handler.setFormatter(logging.Formatter("%(message)s"))
+    listener = logging.handlers.QueueListener(log_queue, stream_handler)
+    listener.start()
+    atexit.register(listener.stop)  # 退出前写完队列中剩余的日志
+    
+    core_logger.addHandler(logging.handlers.QueueHandler(log_queue))
+    core_logger.setLevel(logging.INFO)
+    core_logger.propagate = False  # 已由监听线程输出，不再交给根 logger 同步写一次
+
+setup_core_logging()
+
 SUB_VIDEO = "output/output_sub.mp4"
 DUB_VIDEO = "output/output_dub.mp4"
 
@@ -12,6 +12,7 @@ import tempfile
 import shutil
 import time
 import threading
+import pytest
 from datetime import datetime
 from pathlib import Path
 
@@ -91,6 +92,31 @@ class TestTaskQueue:
         assert task.completed_at is not None
         assert task.actual_duration is not None
     
+    def test_update_progress_throttles_saves(self):
+        """Test small, quick progress steps update the task without marking the queue dirty."""
+        task_id = self.queue.add_task("test", "proj", "/input", "/out", {})
+        self.queue.update_task_status(task_id, TaskStatus.RUNNING)
+        self.queue.flush()
+        
+        assert self.queue.update_progress(task_id, 10.0, min_interval=60)
+        assert self.queue._dirty.is_set()
+        self.queue.flush()
+        
+        assert self.queue.update_progress(task_id, 10.5, min_interval=60)
+        assert self.queue.get_task(task_id).progress_percentage == 10.5
+        assert not self.queue._dirty.is_set()
+        
+        assert self.queue.update_progress(task_id, 150.0, min_interval=60)
+        assert self.queue.get_task(task_id).progress_percentage == 100.0
+        assert self.queue._dirty.is_set()
+        assert not self.queue.update_progress("missing", 50.0)
+        
+        # Late updates from a handler whose task already finished are ignored
+        self.queue.cancel_task(task_id)
+        assert task_id not in self.queue._progress_marks
+        assert not self.queue.update_progress(task_id, 20.0)
+        assert self.queue.get_task(task_id).progress_percentage == 100.0
+    
     def test_get_next_task_priority(self):
         """Test task priority ordering."""
         # Add tasks with different priorities
@@ -111,6 +137,30 @@ class TestTaskQueue:
         next_task = self.queue.get_next_task()
         assert next_task.task_id == low_id
     
+    def test_ready_heap_skips_stale_and_unrunnable_tasks(self):
+        """Test the ready heap drops claimed tasks and keeps tasks a worker cannot run."""
+        other_id = self.queue.add_task("other", "proj", "/other", "/out", {}, TaskPriority.CRITICAL)
+        cancelled_id = self.queue.add_task("test", "proj", "/cancelled", "/out", {}, TaskPriority.HIGH)
+        normal_id = self.queue.add_task("test", "proj", "/normal", "/out", {})
+        self.queue.cancel_task(cancelled_id)
+        
+        assert self.queue.get_next_task(["test"]).task_id == normal_id
+        assert self.queue.get_next_task(["test"]) is None
+        assert self.queue.get_next_task().task_id == other_id
+    
+    def test_get_next_task_waits_for_new_task(self):
+        """Test a waiting get_next_task wakes up when a task is added."""
+        adder = threading.Timer(0.2, self.queue.add_task, ("test", "proj", "/input", "/out", {}))
+        adder.start()
+        
+        start = time.monotonic()
+        task = self.queue.get_next_task(timeout=5.0)
+        adder.join()
+        
+        assert task is not None
+        assert time.monotonic() - start < 2.0
+        assert self.queue.get_next_task(timeout=0.1) is None
+    
     def test_task_dependencies(self):
         """Test task dependency resolution."""
         # Create dependent tasks
@@ -132,6 +182,123 @@ class TestTaskQueue:
         next_task = self.queue.get_next_task()
         assert next_task.task_id == task2_id
     
+    def test_worker_queues_and_stealing(self):
+        """Test tasks are routed to worker heaps and stolen when a heap is empty."""
+        self.queue.register_worker("w1")
+        self.queue.register_worker("w2")
+        ids = [self.queue.add_task("test", "proj", f"/input{i}", "/out", {}) for i in range(4)]
+        
+        # Round-robin: w1 holds ids 0 and 2, w2 holds ids 1 and 3, each run oldest first
+        assert self.queue.pop_local("w1").task_id == ids[0]
+        assert self.queue.pop_local("w1").task_id == ids[2]
+        assert self.queue.pop_local("w1") is None
+        
+        # The thief takes the victim's most urgent task
+        stolen = self.queue.steal("w1")
+        assert stolen.task_id == ids[1]
+        assert stolen.status == TaskStatus.QUEUED
+        
+        # Claimed tasks are not handed out again
+        assert self.queue.get_next_task().task_id == ids[3]
+        assert self.queue.pop_local("w2") is None
+        assert self.queue.get_next_task() is None
+    
+    def test_critical_task_runs_before_earlier_low_tasks(self):
+        """Test a critical task submitted after low ones is claimed first, whichever heap holds it."""
+        self.queue.register_worker("w1")
+        self.queue.register_worker("w2")
+        low_ids = [
+            self.queue.add_task("test", "proj", f"/low{i}", "/out", {}, TaskPriority.LOW) for i in range(3)
+        ]
+        # Routed to w2, but w1 must not start another low task before it
+        critical_id = self.queue.add_task("test", "proj", "/critical", "/out", {}, TaskPriority.CRITICAL)
+        
+        assert self.queue.pop_local("w1").task_id == critical_id
+        assert self.queue.pop_local("w1").task_id == low_ids[0]
+        assert self.queue.pop_local("w2").task_id == low_ids[1]
+    
+    def test_worker_without_capability_leaves_task_for_others(self):
+        """Test a task popped by a worker that cannot run it stays claimable elsewhere."""
+        self.queue.register_worker("w1")
+        task_id = self.queue.add_task("special", "proj", "/input", "/out", {})
+        
+        assert self.queue.pop_local("w1", {"test"}) is None
+        assert self.queue.get_next_task({"special"}).task_id == task_id
+    
+    def test_steal_batch_takes_most_urgent_half(self):
+        """Test a steal moves the most urgent half of the victim's heap, capped at max_n."""
+        self.queue.register_worker("owner")
+        ids = [self.queue.add_task("test", "proj", f"/input{i}", "/out", {}) for i in range(6)]
+        self.queue.register_worker("thief")
+        
+        assert self.queue.steal_batch("thief", "owner") == 3
+        assert [key[2] for key in sorted(self.queue.worker_queues["thief"])] == ids[:3]
+        assert [key[2] for key in sorted(self.queue.worker_queues["owner"])] == ids[3:]
+        assert self.queue.steal_batch("thief", "owner", max_n=1) == 1
+        assert self.queue.steal_batch("owner", "missing") == 0
+    
+    def test_reload_releases_claims(self):
+        """Test saved statuses round-trip and unsaved claims return to pending."""
+        task_id = self.queue.add_task("test", "proj", "/input", "/out", {}, TaskPriority.HIGH)
+        assert self.queue.get_next_task().task_id == task_id
+        self.queue.flush()
+        
+        reloaded = TaskQueue(self.temp_dir).get_task(task_id)
+        assert reloaded.status == TaskStatus.PENDING
+        assert reloaded.priority == TaskPriority.HIGH
+    
+    def test_write_behind_persistence(self):
+        """Test updates are only written by flush or the background flusher."""
+        task_id = self.queue.add_task("test", "proj", "/input", "/out", {})
+        assert TaskQueue(self.temp_dir).get_task(task_id) is None
+        
+        self.queue.flush()
+        assert TaskQueue(self.temp_dir).get_task(task_id) is not None
+        
+        self.queue.start_persistence()
+        self.queue.update_task_status(task_id, TaskStatus.FAILED, error_message="boom")
+        self.queue.stop_persistence()
+        assert TaskQueue(self.temp_dir).get_task(task_id).status == TaskStatus.FAILED
+        assert not os.path.exists(os.path.join(self.temp_dir, "task_queue.json.tmp"))
+    
+    def test_dependency_counts_and_unblocking(self):
+        """Test dependents become ready once all their dependencies complete."""
+        self.queue.register_worker("w1")
+        dep1 = self.queue.add_task("step1", "proj", "/a", "/out", {})
+        dep2 = self.queue.add_task("step1", "proj", "/b", "/out", {})
+        final_id = self.queue.add_task("step2", "proj", "/c", "/out", {}, dependencies=[dep1, dep2])
+        
+        final = self.queue.get_task(final_id)
+        assert final.unmet_dependencies == 2
+        assert final_id not in [key[2] for key in self.queue.worker_queues["w1"]]
+        
+        self.queue.update_task_status(dep1, TaskStatus.COMPLETED)
+        assert final.unmet_dependencies == 1
+        self.queue.update_task_status(dep2, TaskStatus.COMPLETED)
+        assert final.unmet_dependencies == 0
+        assert self.queue.pop_local("w1").task_id == final_id
+        
+        self.queue.flush()
+        reloaded = TaskQueue(self.temp_dir)
+        assert reloaded.get_task(final_id).unmet_dependencies == 0
+    
+    def test_snapshot_reuses_terminal_task_dicts(self):
+        """Test saved dicts of completed tasks are cached and dropped when the task changes."""
+        done_id = self.queue.add_task("test", "proj", "/done", "/out", {})
+        live_id = self.queue.add_task("test", "proj", "/live", "/out", {})
+        self.queue.update_task_status(done_id, TaskStatus.COMPLETED, 100.0)
+        self.queue.flush()
+        
+        assert list(self.queue._serialized) == [done_id]
+        assert self.queue._serialized[done_id] == self.queue.get_task(done_id).to_dict()
+        
+        self.queue.update_task_status(done_id, TaskStatus.FAILED, error_message="late failure")
+        assert done_id not in self.queue._serialized
+        self.queue.flush()
+        reloaded = TaskQueue(self.temp_dir)
+        assert reloaded.get_task(done_id).status == TaskStatus.FAILED
+        assert reloaded.get_task(live_id).status == TaskStatus.PENDING
+    
     def test_cancel_task(self):
         """Test task cancellation."""
         task_id = self.queue.add_task("test", "proj", "/input", "/output", {})
@@ -144,6 +311,18 @@ class TestTaskQueue:
         assert task.status == TaskStatus.CANCELLED
         assert task.completed_at is not None
     
+    def test_cancel_event(self):
+        """Test cancelling sets the task's cancel event and blocks a late start."""
+        task_id = self.queue.add_task("test", "proj", "/input", "/output", {})
+        cancel_event = self.queue.get_cancel_event(task_id)
+        assert not cancel_event.is_set()
+        
+        self.queue.cancel_task(task_id)
+        assert cancel_event.is_set()
+        assert self.queue.get_cancel_event(task_id).is_set()
+        assert not self.queue.update_task_status(task_id, TaskStatus.RUNNING)
+        assert self.queue.get_task(task_id).status == TaskStatus.CANCELLED
+    
     def test_retry_failed_task(self):
         """Test task retry functionality."""
         task_id = self.queue.add_task("test", "proj", "/input", "/output", {})
@@ -163,7 +342,22 @@ class TestTaskQueue:
         assert task.status == TaskStatus.PENDING
         assert task.retry_count == 1
         assert task.error_message is None
-    
+
+    def test_bulk_cancel_and_retry(self):
+        """Test cancelling and retrying several tasks at once."""
+        ids = [self.queue.add_task("test", "proj", f"/input{i}", "/out", {}) for i in range(3)]
+        self.queue.update_task_status(ids[0], TaskStatus.COMPLETED, 100.0)
+
+        # Finished and unknown tasks are skipped
+        assert self.queue.cancel_tasks(ids + ["missing"]) == 2
+        assert self.queue.get_task(ids[0]).status == TaskStatus.COMPLETED
+        assert self.queue.get_task(ids[1]).status == TaskStatus.CANCELLED
+
+        failed_id = self.queue.add_task("test", "proj", "/input3", "/out", {})
+        self.queue.update_task_status(failed_id, TaskStatus.FAILED, error_message="Test error")
+        assert self.queue.retry_tasks([failed_id, ids[1]]) == 1
+        assert self.queue.get_task(failed_id).status == TaskStatus.PENDING
+
     def test_list_tasks_with_filters(self):
         """Test task listing with filters."""
         # Create various tasks
@@ -182,13 +376,157 @@ class TestTaskQueue:
         # Filter by tag
         tag1_tasks = self.queue.list_tasks(tag_filter="tag1")
         assert len(tag1_tasks) == 2
+    
+    def test_list_tasks_with_limit(self):
+        """Test listing only the newest tasks."""
+        task_ids = []
+        for i in range(5):
+            task_ids.append(self.queue.add_task("test", "proj", f"/input{i}", "/out", {}))
+            time.sleep(0.001)  # Ensure distinct creation times
+        
+        recent = self.queue.list_tasks(limit=2)
+        assert [t.task_id for t in recent] == task_ids[::-1][:2]
+        assert [t.task_id for t in self.queue.list_tasks()][:2] == task_ids[::-1][:2]
+
+    def test_project_index(self):
+        """Test the project index survives reloads."""
+        id1 = self.queue.add_task("test", "proj1", "/input1", "/out", {})
+        id2 = self.queue.add_task("test", "proj2", "/input2", "/out", {})
+
+        assert self.queue.get_project_task_ids("proj1") == [id1]
+        assert self.queue.get_project_task_ids("missing") == []
+
+        self.queue.flush()
+        reloaded = TaskQueue(self.temp_dir)
+        assert [t.task_id for t in reloaded.get_tasks_by_ids(reloaded.get_project_task_ids("proj2"))] == [id2]
+
+    def test_task_definition_is_slotted(self):
+        """Test tasks keep no __dict__ and reload their derived fields."""
+        task_id = self.queue.add_task("test", "proj", "/videos/clip.mp4", "/out", {})
+        task = self.queue.get_task(task_id)
+
+        assert not hasattr(task, "__dict__")
+        with pytest.raises(AttributeError):
+            task.undeclared = 1
+
+        self.queue.flush()
+        reloaded = TaskQueue(self.temp_dir).get_task(task_id)
+        assert reloaded.input_basename == "clip.mp4"
+        assert reloaded.short_id == task_id[:8]
+
+    def test_queue_statistics_follow_transitions(self):
+        """Test the running statistics track status changes."""
+        id1 = self.queue.add_task("type1", "proj", "/input1", "/out", {})
+        id2 = self.queue.add_task("type2", "proj", "/input2", "/out", {})
+
+        self.queue.update_task_status(id1, TaskStatus.COMPLETED, 100.0)
+        self.queue.update_task_status(id2, TaskStatus.FAILED, error_message="boom")
+        self.queue.retry_task(id2)
+
+        stats = self.queue.get_queue_statistics()
+        assert stats["total_tasks"] == 2
+        assert stats["by_status"]["completed"] == 1
+        assert stats["by_status"]["pending"] == 1
+        assert stats["by_status"]["failed"] == 0
+        assert stats["by_type"] == {"type1": 1, "type2": 1}
+        assert stats["success_rate"] == 100.0
+
+    def test_queue_statistics_cached_until_counts_change(self):
+        """Test statistics are reused across calls and refreshed after status changes."""
+        task_id = self.queue.add_task("type1", "proj", "/input", "/out", {})
+        stats = self.queue.get_queue_statistics()
+        assert self.queue.get_queue_statistics() is stats
+        
+        self.queue.update_task_status(task_id, TaskStatus.RUNNING)
+        running_stats = self.queue.get_queue_statistics()
+        assert running_stats is not stats
+        assert running_stats["by_status"]["running"] == 1
+        
+        # Progress updates do not change the counts
+        self.queue.update_task_status(task_id, TaskStatus.RUNNING, 50.0)
+        assert self.queue.get_queue_statistics() is running_stats
+
+    def test_finished_task_history_is_bounded(self):
+        """Test the oldest completed or cancelled tasks are dropped beyond max_finished_tasks."""
+        queue = TaskQueue(self.temp_dir, max_finished_tasks=2)
+        ids = [queue.add_task("test", "proj", f"/input{i}", "/out", {}) for i in range(5)]
+        
+        queue.update_task_status(ids[0], TaskStatus.COMPLETED)
+        queue.update_task_status(ids[1], TaskStatus.FAILED)
+        queue.cancel_task(ids[2])
+        queue.update_task_status(ids[3], TaskStatus.COMPLETED)
+        
+        # Failed tasks can still be retried, so they take no slot and are never dropped
+        assert queue.get_task(ids[0]) is None
+        assert queue.get_project_task_ids("proj") == ids[1:]
+        assert queue.get_queue_statistics()["total_tasks"] == 4
+        
+        # Unfinished tasks are never dropped, and reloads apply the same limit
+        queue.update_task_status(ids[4], TaskStatus.RUNNING)
+        queue.flush()
+        reloaded = TaskQueue(self.temp_dir, max_finished_tasks=1)
+        assert sorted(reloaded.tasks) == sorted([ids[1], ids[3], ids[4]])
+
+    def test_completed_dependency_of_pending_task_is_kept(self):
+        """Test a completed dependency is not evicted while a dependent still waits on it."""
+        queue = TaskQueue(self.temp_dir, max_finished_tasks=1)
+        first_id = queue.add_task("test", "proj", "/input0", "/out", {})
+        dependent_id = queue.add_task("test", "proj", "/input1", "/out", {}, dependencies=[first_id])
+        other_id = queue.add_task("test", "proj", "/input2", "/out", {})
+        
+        queue.update_task_status(first_id, TaskStatus.COMPLETED)
+        queue.update_task_status(other_id, TaskStatus.COMPLETED)
+        assert queue.get_task(first_id) is not None
+        
+        # The dependent is still runnable after a reload
+        queue.flush()
+        reloaded = TaskQueue(self.temp_dir, max_finished_tasks=1)
+        assert reloaded.get_task(first_id) is not None
+        assert reloaded.get_next_task().task_id == dependent_id
+
+    def test_retried_task_takes_one_finished_slot(self):
+        """Test a task that fails, is retried and finishes again is not evicted early."""
+        queue = TaskQueue(self.temp_dir, max_finished_tasks=2)
+        removed = []
+        queue.on_task_removed(lambda task: removed.append(task.task_id))
+        ids = [queue.add_task("test", "proj", f"/input{i}", "/out", {}) for i in range(2)]
+        
+        queue.update_task_status(ids[0], TaskStatus.FAILED)
+        assert queue.retry_task(ids[0])
+        queue.update_task_status(ids[0], TaskStatus.COMPLETED)
+        queue.update_task_status(ids[1], TaskStatus.COMPLETED)
+        
+        assert removed == []
+        assert queue.get_project_task_ids("proj") == ids
+        
+        extra_id = queue.add_task("test", "proj", "/input2", "/out", {})
+        queue.update_task_status(extra_id, TaskStatus.COMPLETED)
+        assert removed == [ids[0]]
+
+    def test_clear_completed_tasks_removes_only_expired(self):
+        """Test old completed/cancelled tasks are cleared while failed and recent ones stay."""
+        ids = [self.queue.add_task("test", "proj", f"/input{i}", "/out", {}) for i in range(4)]
+        self.queue.update_task_status(ids[0], TaskStatus.COMPLETED)
+        self.queue.cancel_task(ids[1])
+        self.queue.update_task_status(ids[2], TaskStatus.FAILED)
+        self.queue.update_task_status(ids[3], TaskStatus.COMPLETED)
+        
+        old_epoch = time.time() - 30 * 86400
+        for task_id in ids[:3]:
+            self.queue.get_task(task_id).completed_at_epoch = old_epoch
+        
+        assert self.queue.clear_completed_tasks(older_than_days=7) == 2
+        assert self.queue.get_project_task_ids("proj") == ids[2:]
+        assert self.queue.get_queue_statistics()["total_tasks"] == 2
+        assert self.queue.clear_completed_tasks(older_than_days=7) == 0
 
 class TestJobScheduler:
     """Test the job scheduler functionality."""
     
     def setup_method(self):
         """Setup test environment."""
-        self.scheduler = JobScheduler(max_workers=2)
+        self.temp_dir = tempfile.mkdtemp()
+        self.scheduler = JobScheduler(max_workers=2, storage_dir=self.temp_dir)
         
         # Custom test handler
         def test_handler(task):
@@ -200,6 +538,7 @@ class TestJobScheduler:
     def teardown_method(self):
         """Cleanup test environment."""
         self.scheduler.stop()
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
     
     def test_scheduler_start_stop(self):
         """Test scheduler start/stop functionality."""
@@ -216,6 +555,17 @@ class TestJobScheduler:
         self.scheduler.stop()
         assert not self.scheduler.is_running
     
+    def test_workers_start_with_scheduler_and_stop_promptly(self):
+        """Test start launches every worker at once and stop wakes idle workers."""
+        self.scheduler.start()
+        assert len(self.scheduler.get_worker_status()) == self.scheduler.max_workers
+        threads = list(self.scheduler.worker_threads.values())
+        
+        self.scheduler.stop()
+        for thread in threads:
+            thread.join(timeout=1.0)
+            assert not thread.is_alive()
+    
     def test_task_execution(self):
         """Test task execution by scheduler."""
         # Add a test task
@@ -237,6 +587,20 @@ class TestJobScheduler:
         assert task.status == TaskStatus.COMPLETED
         assert task.progress_percentage == 100.0
     
+    def test_handler_registered_after_start_reaches_running_workers(self):
+        """Test running workers pick up task types registered after they started."""
+        self.scheduler.start()
+        task_id = self.scheduler.task_queue.add_task("late_task", "test_proj", "/input", "/output", {})
+        self.scheduler.register_task_handler("late_task", lambda task: True)
+        
+        assert all("late_task" in w.capabilities for w in self.scheduler.get_worker_status())
+        start_time = time.time()
+        while time.time() - start_time < 3:  # Well under the workers' 5 second wait
+            if self.scheduler.task_queue.get_task(task_id).status == TaskStatus.COMPLETED:
+                break
+            time.sleep(0.05)
+        assert self.scheduler.task_queue.get_task(task_id).status == TaskStatus.COMPLETED
+    
     def test_multiple_task_execution(self):
         """Test execution of multiple tasks."""
         # Add multiple tasks (reduce count for faster testing)
@@ -267,13 +631,39 @@ class TestJobScheduler:
             task = self.scheduler.task_queue.get_task(task_id)
             assert task.status == TaskStatus.COMPLETED
 
+    def test_cancel_running_task(self):
+        """Test a cancelled task stops its handler and stays cancelled."""
+        task_id = self.scheduler.task_queue.add_task(
+            "video_translation", "test_proj", "/input", "/output", {}
+        )
+        
+        self.scheduler.start()
+        
+        start_time = time.time()
+        while time.time() - start_time < 3:
+            if self.scheduler.task_queue.get_task(task_id).status == TaskStatus.RUNNING:
+                break
+            time.sleep(0.05)
+        
+        assert self.scheduler.task_queue.cancel_task(task_id)
+        
+        # The handler would otherwise keep its worker busy for ~10 seconds
+        start_time = time.time()
+        while time.time() - start_time < 3:
+            if all(w.current_task != task_id for w in self.scheduler.get_worker_status()):
+                break
+            time.sleep(0.05)
+        
+        assert all(w.current_task != task_id for w in self.scheduler.get_worker_status())
+        assert self.scheduler.task_queue.get_task(task_id).status == TaskStatus.CANCELLED
+
 class TestBatchManager:
     """Test the batch manager functionality."""
     
     def setup_method(self):
         """Setup test environment."""
         self.temp_dir = tempfile.mkdtemp()
-        self.manager = BatchManager()
+        self.manager = BatchManager(storage_dir=os.path.join(self.temp_dir, "batch_processing"))
         
         # Create dummy video files for testing
         self.video_files = []
@@ -412,6 +802,24 @@ class TestBatchManager:
             elif project["project_id"] == "project2":
                 assert project["task_count"] == 1
     
+    def test_project_summary_tracks_status_changes(self):
+        """Test project summaries follow task status changes."""
+        task_ids = self.manager.add_video_batch(
+            video_files=self.video_files,
+            output_directory=os.path.join(self.temp_dir, "output"),
+            project_id="summary_test"
+        )
+        
+        self.manager.task_queue.update_task_status(task_ids[0], TaskStatus.RUNNING)
+        self.manager.task_queue.update_task_status(task_ids[0], TaskStatus.COMPLETED, 100.0)
+        self.manager.task_queue.update_task_status(task_ids[1], TaskStatus.FAILED, error_message="boom")
+        
+        project = next(p for p in self.manager.list_batch_projects() if p["project_id"] == "summary_test")
+        assert project["task_count"] == len(self.video_files)
+        assert project["completed_count"] == 1
+        assert project["failed_count"] == 1
+        assert project["running_count"] == 0
+    
     def test_export_batch_report(self):
         """Test exporting batch report."""
         # Add a batch
@@ -443,6 +851,77 @@ class TestBatchManager:
         # Verify detailed tasks
         detailed_tasks = report["detailed_tasks"]
         assert len(detailed_tasks) == len(self.video_files)
+    
+    def test_export_batch_report_json(self):
+        """Test exporting batch report as JSON bytes."""
+        self.manager.add_video_batch(
+            video_files=self.video_files,
+            output_directory=os.path.join(self.temp_dir, "output"),
+            project_id="json_report_test"
+        )
+        
+        report = json.loads(self.manager.export_batch_report_json("json_report_test"))
+        assert report["project_summary"]["project_id"] == "json_report_test"
+        assert len(report["detailed_tasks"]) == len(self.video_files)
+
+    def test_iter_batch_report_streams_chunks(self):
+        """Test the streamed report matches the in-memory report."""
+        self.manager.add_video_batch(
+            video_files=self.video_files,
+            output_directory=os.path.join(self.temp_dir, "output"),
+            project_id="stream_report_test"
+        )
+        
+        chunks = list(self.manager.iter_batch_report("stream_report_test"))
+        assert len(chunks) == len(self.video_files) + 2
+        
+        streamed = json.loads(b"".join(chunks))
+        report = self.manager.export_batch_report("stream_report_test")
+        assert streamed["detailed_tasks"] == report["detailed_tasks"]
+        assert streamed["project_summary"]["total_tasks"] == len(self.video_files)
+
+    def test_evicted_tasks_leave_project_summary(self):
+        """Test tasks evicted from the finished history also leave the project counts."""
+        manager = BatchManager(storage_dir=os.path.join(self.temp_dir, "evict_store"), max_finished_tasks=1)
+        queue = manager.task_queue
+        ids = [queue.add_task("test", "evict_test", f"/input{i}", "/out", {}) for i in range(3)]
+        queue.update_task_status(ids[0], TaskStatus.COMPLETED)
+        # Fold the first task into the report cache before it is evicted
+        assert manager.export_batch_report("evict_test")["task_type_breakdown"]["test"]["completed"] == 1
+        queue.update_task_status(ids[1], TaskStatus.COMPLETED)
+        
+        project = next(p for p in manager.list_batch_projects() if p["project_id"] == "evict_test")
+        assert project["task_count"] == 2
+        assert project["completed_count"] == 1
+        
+        report = manager.export_batch_report("evict_test")
+        assert report["task_type_breakdown"]["test"]["total"] == 2
+        assert report["task_type_breakdown"]["test"]["completed"] == 1
+        assert report["project_summary"]["total_tasks"] == 2
+
+    def test_cleanup_old_data_removes_stale_directories(self):
+        """Test that only cleared tasks' output directories older than the cutoff are removed."""
+        queue = self.manager.task_queue
+        stale_dir = os.path.join(self.temp_dir, "stale_output")
+        fresh_dir = os.path.join(self.temp_dir, "fresh_output")
+        unrelated_dir = self.manager.batch_storage_dir / "unrelated_cleanup_test"
+        os.makedirs(os.path.join(stale_dir, "nested"))
+        os.makedirs(fresh_dir)
+        unrelated_dir.mkdir(exist_ok=True)
+        old_epoch = time.time() - 40 * 86400
+        os.utime(stale_dir, (old_epoch, old_epoch))
+        os.utime(unrelated_dir, (old_epoch, old_epoch))
+        
+        for output_dir in (stale_dir, fresh_dir):
+            task_id = queue.add_task("test", "cleanup_test", "/input.mp4", output_dir, {})
+            queue.update_task_status(task_id, TaskStatus.COMPLETED)
+            queue.get_task(task_id).completed_at_epoch = old_epoch
+        
+        result = self.manager.cleanup_old_data(days_old=30)
+        assert result == {"cleared_tasks": 2, "cleared_directories": 1}
+        assert not os.path.exists(stale_dir)
+        assert os.path.exists(fresh_dir)
+        assert unrelated_dir.exists()
 
 def run_tests():
     """Run all batch processing tests."""